@@ -0,0 +1,107 @@
+import argparse
+import random
+import time
+from modules.db import DatabaseHandler
+from modules.compression import (
+    COMPRESSED_COLUMNS, ZlibCodec, ZstdCodec, compress_text, decompress_text, text_codecs, zstandard
+)
+from modules.package import Package
+
+# Benchmark of the codecs of the compressed text columns
+#
+# The texts of the packages in the database are compressed with each codec:
+# zlib + hex (the format before migration 003), binary zlib, zstd, and zstd with
+# a dictionary trained on half of the texts. For each one, the stored bytes and
+# the decompression throughput are shown. Then Package.get_package is timed for
+# some random packages, with the codecs currently stored in the database.
+#
+# Usage (from the root of the repository):
+# python -m benchmarks.compression --packages 5000 --loads 500
+#
+# Author: agent <agent@local>
+# Date: 2026-10-17
+# Project: TFG OLIVIA
+
+# Codec of the values written before migration 003
+class HexCodec:
+    name = 'zlib+hex'
+
+    def compress(self, data):
+        return compress_text(data.decode())
+
+    def decompress(self, value):
+        return decompress_text(value).encode()
+
+# Compress the texts with a codec and time the decompression
+def measure(codec, texts, repeat):
+    values = [codec.compress(text) for text in texts]
+    stored = sum(len(value) for value in values)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for value in values:
+            codec.decompress(value)
+    elapsed = time.perf_counter() - start
+
+    original = sum(len(text) for text in texts) * repeat
+    return stored, original / elapsed / 1024 / 1024, len(values) * repeat / elapsed
+
+# Script
+# -----------------------------------------------
+
+parser = argparse.ArgumentParser(description="Benchmark of the codecs of the compressed text columns")
+parser.add_argument("--packages", type=int, default=5000, help="Number of packages whose texts are compressed")
+parser.add_argument("--repeat", type=int, default=5, help="Number of times each value is decompressed")
+parser.add_argument("--loads", type=int, default=500, help="Number of packages loaded with get_package")
+parser.add_argument("--level", type=int, default=3, help="Compression level of zstd (default 3, the level of the crawls)")
+args = parser.parse_args()
+
+db = DatabaseHandler()
+cnx = db.get_connection()
+text_codecs.load_dictionaries(cnx)
+
+cursor = cnx.cursor()
+cursor.execute('SELECT name, description, author_data FROM packages ORDER BY RAND() LIMIT %s', (args.packages,))
+rows = cursor.fetchall()
+cursor.close()
+
+if not rows:
+    print("No packages in the database")
+    exit(1)
+
+names = [row[0] for row in rows]
+for index, column in enumerate(COMPRESSED_COLUMNS):
+    texts = [text_codecs.decode(row[index + 1]).encode() for row in rows if row[index + 1] is not None]
+    original = sum(len(text) for text in texts)
+
+    codecs = [HexCodec(), ZlibCodec()]
+    if zstandard is None:
+        print("zstandard is not installed: the zstd codecs are skipped")
+    else:
+        # The dictionary is trained with the first half of the texts
+        dictionary = zstandard.train_dictionary(64 * 1024, texts[:len(texts) // 2]).as_bytes()
+        codecs.append(ZstdCodec(args.level))
+        codecs.append(ZstdCodec(args.level, dictionary, 1))
+
+    print(f"\n{column}: {len(texts)} texts, {original} bytes")
+    print("codec\tbytes\tratio\tMB/s\tvalues/s")
+    for codec in codecs:
+        name = codec.name + (' (dictionary)' if getattr(codec, 'dictionary_id', 0) else '')
+
+        # The codec with a dictionary is measured with the texts not used to train it
+        sample = texts[len(texts) // 2:] if getattr(codec, 'dictionary_id', 0) else texts
+        scale = len(texts) / max(len(sample), 1)
+
+        stored, mb_per_second, values_per_second = measure(codec, sample, args.repeat)
+        stored = int(stored * scale)
+        print(f"{name}\t{stored}\t{original / max(stored, 1):.2f}\t{mb_per_second:.1f}\t{values_per_second:.0f}")
+
+# Time get_package with the codecs stored in the database
+sample = random.sample(names, min(args.loads, len(names)))
+start = time.perf_counter()
+for name in sample:
+    Package(name).get_package(cnx)
+elapsed = time.perf_counter() - start
+print(f"\nget_package: {len(sample) / elapsed:.0f} packages/s, {elapsed / len(sample) * 1000:.2f} ms/package")
+
+cnx.close()
@@ -0,0 +1,247 @@
+import argparse
+import json
+import multiprocessing
+import queue
+import resource
+import threading
+import time
+from benchmarks.fake_cran import FakeCran
+from modules.async_crawler import AsyncCrawler
+from modules.cran_listing import package_names
+from modules.cran_scraper import PackageScraper
+from modules.log import setup_logging
+from modules.metrics import metrics
+from modules.pipeline import FetchParsePipeline
+from modules.proxy_request import RequestHandler
+from modules.retry_policy import RetryPolicy
+from modules.storage import SQLiteBackend
+
+# End-to-end benchmark of a crawl, without network and without database
+#
+# For each size of the catalogue, a local CRAN server (see benchmarks/fake_cran.py)
+# is started in its own process, and the crawl runs in another process: it
+# downloads the list of packages, fetches and parses the page of each package
+# and saves it, with the same classes as tool.py. The packages are saved in
+# NullDatabase, a stand-in of the MySQL connection that accepts the statements
+# without storing them; each statement can be delayed to simulate the round
+# trip to a database server. With --sqlite, they are saved in a SQLite file
+# instead (see modules/storage.py).
+#
+# For each run, the packages per second, the p50 and p99 latencies of each stage
+# (estimated from the histograms of modules/metrics.py) and the peak memory
+# (RSS) of the crawl process are shown. With --json, the results are also
+# written to a file, to compare them between two versions of the code.
+#
+# Usage (from the root of the repository):
+# python -m benchmarks.crawl --packages 1000 20000 200000 --concurrency 32 --latency 0.02
+# python -m benchmarks.crawl --packages 20000 --parse-workers 4 --error-rate 0.01 --json results.json
+#
+# Author: agent <agent@local>
+# Date: 2026-10-17
+# Project: TFG OLIVIA
+
+STAGES = ('listing', 'fetch', 'parse', 'dependency_parse', 'db_save')
+
+
+class NullCursor:
+    '''
+    Cursor of NullDatabase
+    '''
+
+    def __init__(self, database):
+        self.database = database
+        self.lastrowid = None
+
+    def execute(self, sql, params=None):
+        self.lastrowid = self.database.round_trip()
+
+    def executemany(self, sql, params):
+        self.lastrowid = self.database.round_trip()
+
+    def fetchall(self):
+        return []
+
+    def fetchone(self):
+        return None
+
+    def close(self):
+        pass
+
+
+class NullDatabase:
+    '''
+    Stand-in of a MySQL connection that accepts the statements without storing them.
+    Each statement returns a new id, and each statement and commit waits `latency` seconds.
+    '''
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.statements = 0
+        self.lock = threading.Lock()
+
+    # Wait for the simulated server, and return a new id
+    def round_trip(self) -> int:
+        if self.latency > 0:
+            time.sleep(self.latency)
+        with self.lock:
+            self.statements += 1
+            return self.statements
+
+    def cursor(self, **kwargs):
+        return NullCursor(self)
+
+    def commit(self):
+        self.round_trip()
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+# Run the local CRAN server until the parent process stops it
+def serve(num_packages, args, ports, stop):
+    server = FakeCran(num_packages, args.latency, args.jitter, args.error_rate, args.pages)
+    server.start()
+    ports.put(server.port)
+    stop.wait()
+    server.stop()
+
+
+# Crawl the local CRAN server and return the results of the run
+def crawl(url, args) -> dict:
+    # Only the errors are shown, not each retry
+    log_listener = setup_logging('ERROR')
+
+    # The rate limiter slows down after each 503 answer. By default the rate is
+    # fixed, so that the errors of the server only cost their retries
+    rh = RequestHandler(pool_size=max(args.concurrency, 10), direct=True, user_agents=['r_scraper-benchmark'],
+                        retry_policy=RetryPolicy(max_attempts=args.max_attempts, base_delay=0.01, max_delay=0.1),
+                        breaker_options={'failure_threshold': 1000},
+                        rate_options={'rate': args.rate, 'adaptive': args.adaptive_rate})
+    scraper = PackageScraper(rh, args.parser, url)
+    cnx = SQLiteBackend({'path': args.sqlite}).connect() if args.sqlite else NullDatabase(args.db_latency)
+    start = time.perf_counter()
+
+    # List of packages
+    with metrics.timer('stage_seconds', stage='listing'):
+        names = list(package_names(rh, url))
+
+    # Fetch and parse the packages, and save them in this thread
+    if args.parse_workers > 0:
+        results = FetchParsePipeline(scraper, args.concurrency, args.parse_workers).run(names)
+    else:
+        results = AsyncCrawler(scraper, args.concurrency).run(names)
+
+    saved = 0
+    failed = 0
+    for _, package in results:
+        if isinstance(package, Exception):
+            failed += 1
+            continue
+        with metrics.timer('stage_seconds', stage='db_save'):
+            result = package.save(cnx)
+        if result is True:
+            saved += 1
+        else:
+            failed += 1
+
+    elapsed = time.perf_counter() - start
+    rh.close()
+    log_listener.stop()
+
+    # Latencies of each stage
+    stages = {}
+    for stage in STAGES:
+        histogram = metrics.histogram('stage_seconds', stage=stage)
+        if histogram.count:
+            stages[stage] = {'count': histogram.count, 'p50': histogram.quantile(0.5), 'p99': histogram.quantile(0.99)}
+
+    return {
+        'packages': len(names),
+        'saved': saved,
+        'failed': failed,
+        'seconds': elapsed,
+        'packages_per_second': saved / elapsed,
+        'retries': metrics.counter('retries_total').value,
+        'statements': getattr(cnx, 'statements', None),
+        # ru_maxrss is in KB on Linux
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'stages': stages,
+    }
+
+
+# Crawl in a new process, so that the peak memory of each run is measured alone
+def crawl_process(url, args, results):
+    results.put(crawl(url, args))
+
+
+# Run the benchmark for a size of the catalogue
+def run(num_packages, args) -> dict:
+    ports = multiprocessing.Queue()
+    results = multiprocessing.Queue()
+    stop = multiprocessing.Event()
+
+    server = multiprocessing.Process(target=serve, args=(num_packages, args, ports, stop), daemon=True)
+    server.start()
+    try:
+        url = 'http://127.0.0.1:' + str(ports.get(timeout=60))
+        crawler = multiprocessing.Process(target=crawl_process, args=(url, args, results))
+        crawler.start()
+
+        # Wait for the results, unless the crawl process fails
+        while True:
+            try:
+                result = results.get(timeout=1)
+                break
+            except queue.Empty:
+                if not crawler.is_alive():
+                    raise RuntimeError("The crawl of " + str(num_packages) + " packages ended without results")
+        crawler.join()
+    finally:
+        stop.set()
+        server.join()
+
+    return result
+
+
+# Script
+# -----------------------------------------------
+
+# The runs are made in child processes, which import this module again with the
+# spawn and forkserver start methods: the script only runs in the main process
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="End-to-end benchmark of a crawl against a local CRAN server")
+    parser.add_argument("--packages", type=int, nargs="+", default=[1000, 20000], help="Sizes of the catalogue")
+    parser.add_argument("--concurrency", type=int, default=32, help="Number of packages fetched at the same time")
+    parser.add_argument("--parse-workers", type=int, default=0, help="Parse the pages in this number of processes (see tool.py)")
+    parser.add_argument("--parser", default="html.parser", help="Backend used to read the package pages")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds that the server delays each answer")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Maximum random seconds added to the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Part of the requests answered with a 503 error (0 to 1)")
+    parser.add_argument("--pages", metavar="DIRECTORY", default=None, help="Serve these saved CRAN pages (*.html) instead of the synthetic ones")
+    parser.add_argument("--db-latency", type=float, default=0.0, help="Seconds of each statement of the stand-in database")
+    parser.add_argument("--sqlite", metavar="FILE", default=None, help="Save the packages in this SQLite file instead of the stand-in database")
+    parser.add_argument("--max-attempts", type=int, default=5, help="Maximum number of attempts of each request")
+    parser.add_argument("--rate", type=float, default=100000, help="Initial number of requests per second (not limited by default)")
+    parser.add_argument("--adaptive-rate", action="store_true", help="Slow down after the 503 answers, like tool.py")
+    parser.add_argument("--json", metavar="FILE", default=None, help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    print("packages\tsaved\tfailed\tpkg/s\tpeak RSS (MB)\t" + "\t".join(stage + " p50/p99 (ms)" for stage in STAGES))
+    all_results = []
+    for num_packages in args.packages:
+        result = run(num_packages, args)
+        all_results.append(result)
+
+        latencies = []
+        for stage in STAGES:
+            values = result['stages'].get(stage)
+            latencies.append(f"{values['p50'] * 1000:.2f}/{values['p99'] * 1000:.2f}" if values else '-')
+        print(f"{result['packages']}\t{result['saved']}\t{result['failed']}\t{result['packages_per_second']:.1f}\t"
+              f"{result['peak_rss_mb']:.1f}\t" + "\t".join(latencies))
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump({'arguments': vars(args), 'results': all_results}, file, indent=2)
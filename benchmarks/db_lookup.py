@@ -0,0 +1,84 @@
+import argparse
+import random
+import time
+from modules.db import DatabaseHandler
+
+# Benchmark of the lookups made for every package, with and without the indexes
+# of migration 002 (config/db/migrations/002_indexes_and_unique_keys.sql)
+#
+# Two scratch tables are filled with the same synthetic dependencies, one with
+# the unique key on (name, version, type) and one without it. The tables are
+# dropped at the end.
+#
+# Usage (from the root of the repository):
+# python -m benchmarks.db_lookup --rows 20000 200000
+#
+# Author: agent <agent@local>
+# Date: 2026-10-17
+# Project: TFG OLIVIA
+
+TABLES = {
+    'bench_dependencies_noindex': '',
+    'bench_dependencies_index': ', UNIQUE KEY uq_bench (name, version, type)',
+}
+
+# Create a scratch table like the dependencies table
+def create_table(cursor, table, keys):
+    cursor.execute(f'DROP TABLE IF EXISTS {table}')
+    cursor.execute(f'''
+        CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY AUTO_INCREMENT,
+            name VARCHAR(255) NOT NULL,
+            version VARCHAR(255) NOT NULL,
+            type VARCHAR(255) NOT NULL
+            {keys}
+        )
+    ''')
+
+# Generate synthetic dependencies
+def synthetic_rows(num_rows):
+    return [(f'pkg{i}', f'>= {i % 7}.{i % 13}.0', 'IMP' if i % 2 else 'DEP') for i in range(num_rows)]
+
+# Time the lookups of some random rows
+def time_lookups(cursor, table, rows, num_lookups):
+    sample = random.sample(rows, min(num_lookups, len(rows)))
+    sql = f'SELECT id FROM {table} WHERE name = %s AND version = %s AND type = %s'
+
+    start = time.perf_counter()
+    for row in sample:
+        cursor.execute(sql, row)
+        cursor.fetchall()
+    elapsed = time.perf_counter() - start
+
+    return elapsed / len(sample) * 1000
+
+# Script
+# -----------------------------------------------
+
+parser = argparse.ArgumentParser(description="Benchmark of dependency lookups with and without indexes")
+parser.add_argument("--rows", type=int, nargs="+", default=[20000, 200000], help="Sizes of the table")
+parser.add_argument("--lookups", type=int, default=500, help="Number of lookups for each size")
+args = parser.parse_args()
+
+db = DatabaseHandler()
+cnx = db.get_connection()
+cursor = cnx.cursor()
+
+print("rows\ttable\tms/lookup")
+try:
+    for num_rows in args.rows:
+        rows = synthetic_rows(num_rows)
+
+        for table, keys in TABLES.items():
+            create_table(cursor, table, keys)
+            cursor.executemany(f'INSERT INTO {table} (name, version, type) VALUES (%s, %s, %s)', rows)
+            cnx.commit()
+
+            ms = time_lookups(cursor, table, rows, args.lookups)
+            print(f"{num_rows}\t{table}\t{ms:.3f}")
+
+finally:
+    for table in TABLES:
+        cursor.execute(f'DROP TABLE IF EXISTS {table}')
+    cursor.close()
+    cnx.close()
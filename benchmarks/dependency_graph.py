@@ -0,0 +1,91 @@
+import argparse
+import random
+import time
+import numpy as np
+from modules.dependency_graph import DependencyGraph
+
+# Benchmark of the queries of the dependency graph
+#
+# By default a synthetic graph with the shape of CRAN is used: each package
+# depends on a few others, chosen with a preference for the popular ones. With
+# --db, the graph is loaded from the database.
+#
+# Usage (from the root of the repository):
+# python -m benchmarks.dependency_graph --packages 20000 200000
+# python -m benchmarks.dependency_graph --db
+#
+# Author: agent <agent@local>
+# Date: 2026-10-17
+# Project: TFG OLIVIA
+
+# Build a synthetic graph
+def synthetic_graph(num_packages, mean_dependencies):
+    rng = np.random.default_rng(0)
+    names = [f'pkg{i}' for i in range(num_packages)]
+
+    # Popular packages (low index) get most of the edges
+    counts = rng.poisson(mean_dependencies, num_packages)
+    sources = np.repeat(np.arange(num_packages), counts)
+    targets = (num_packages * rng.random(len(sources)) ** 3).astype(np.int32)
+    keep = sources != targets
+    types = rng.integers(0, 2, len(sources))
+
+    return DependencyGraph.from_edges(names, sources[keep], targets[keep], types[keep], ['DEP', 'IMP'])
+
+# Time a query for some random packages, without and with memoization
+def time_query(graph, query, names):
+    graph.memo.clear()
+    start = time.perf_counter()
+    for name in names:
+        query(name)
+    cold = (time.perf_counter() - start) / len(names) * 1000
+
+    start = time.perf_counter()
+    for name in names:
+        query(name)
+    warm = (time.perf_counter() - start) / len(names) * 1000
+
+    return cold, warm
+
+# Run the queries on a graph
+def run(graph, build_time, num_queries):
+    print(f"\n{len(graph)} nodes, {graph.num_edges()} edges, built in {build_time:.2f} s, {graph.memory_usage() / 1024 / 1024:.2f} MB")
+
+    names = random.sample(graph.names, min(num_queries, len(graph)))
+    pairs = list(zip(names, reversed(names)))
+    queries = {
+        'reverse_dependencies': graph.reverse_dependencies,
+        'transitive_dependencies': graph.transitive_dependencies,
+        'transitive (reverse)': lambda name: graph.transitive_dependencies(name, reverse=True),
+        'shortest_path': lambda i: graph.shortest_path(*pairs[i]),
+    }
+
+    print("query\tms (cold)\tms (memoized)")
+    for label, query in queries.items():
+        arguments = range(len(pairs)) if label == 'shortest_path' else names
+        cold, warm = time_query(graph, query, arguments)
+        print(f"{label}\t{cold:.3f}\t{warm:.4f}")
+
+# Script
+# -----------------------------------------------
+
+parser = argparse.ArgumentParser(description="Benchmark of the dependency graph queries")
+parser.add_argument("--packages", type=int, nargs="+", default=[20000], help="Sizes of the synthetic graph")
+parser.add_argument("--dependencies", type=float, default=8, help="Mean number of dependencies of a synthetic package")
+parser.add_argument("--queries", type=int, default=200, help="Number of packages queried")
+parser.add_argument("--db", action="store_true", help="Load the graph from the database instead")
+args = parser.parse_args()
+
+random.seed(0)
+if args.db:
+    from modules.db import DatabaseHandler
+    cnx = DatabaseHandler().get_connection()
+    start = time.perf_counter()
+    graph = DependencyGraph.load(cnx)
+    run(graph, time.perf_counter() - start, args.queries)
+    cnx.close()
+else:
+    for num_packages in args.packages:
+        start = time.perf_counter()
+        graph = synthetic_graph(num_packages, args.dependencies)
+        run(graph, time.perf_counter() - start, args.queries)
@@ -0,0 +1,83 @@
+import argparse
+import os
+import random
+import re
+import time
+from modules.dependency_parser import parse_dependencies, parse_dependencies_batch, _parse
+
+# Micro-benchmark and fuzz check of the dependency tokenizer
+#
+# The corpus (benchmarks/data/dependency_fields.txt) has Depends/Imports fields
+# taken from CRAN, one per line, with the spacing of both the DESCRIPTION files
+# and the HTML pages. The fuzz check adds random spaces and line breaks to the
+# fields and checks that the constraints do not change.
+#
+# Usage (from the root of the repository):
+# python -m benchmarks.dependency_parser --repeat 2000
+# python -m benchmarks.dependency_parser --fuzz 10000
+#
+# Author: agent <agent@local>
+# Date: 2026-10-17
+# Project: TFG OLIVIA
+
+CORPUS = os.path.join(os.path.dirname(__file__), 'data', 'dependency_fields.txt')
+
+# Previous implementation of PackageScraper.__parse_dependencies, for comparison
+def parse_dependencies_regex_zip(dependencies_str):
+    patron = r'\S+\s*(?:\(([^\)]*)\))?'
+    versiones = re.findall(patron, dependencies_str)
+    nombres = re.split(r'\s*,\s*', dependencies_str)
+    nombres = [re.sub(r'\s*\(.*\)', '', nombre) for nombre in nombres]
+    return list(zip(nombres, versiones))
+
+# Add random spaces and line breaks around the separators of a field
+def mutate(field, rng):
+    out = []
+    for char in field:
+        if char in ',()' or char == ' ':
+            out.append(rng.choice(['', ' ', '  ', '\n ', '\t']))
+            out.append(char if char != ' ' else '')
+            out.append(rng.choice(['', ' ', '\n ']))
+        else:
+            out.append(char)
+    return ''.join(out)
+
+# Time a function over the fields
+def timed(function, fields, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function(fields)
+    return time.perf_counter() - start
+
+parser = argparse.ArgumentParser(description="Benchmark and fuzz check of the dependency tokenizer")
+parser.add_argument("--repeat", type=int, default=1000, help="Number of passes over the corpus")
+parser.add_argument("--fuzz", type=int, default=0, help="Number of mutated fields to check")
+args = parser.parse_args()
+
+with open(CORPUS, encoding='utf-8') as file:
+    fields = [line.rstrip('\n') for line in file if line.strip()]
+
+# Fuzz check: the mutated fields must give the same names, operators and versions
+if args.fuzz:
+    rng = random.Random(0)
+    errors = 0
+    for i in range(args.fuzz):
+        field = rng.choice(fields)
+        mutated = mutate(field, rng)
+        if parse_dependencies(mutated) != parse_dependencies(field):
+            errors += 1
+            if errors <= 10:
+                print("Mismatch:", repr(field), "->", repr(mutated))
+    print(f"fuzz: {args.fuzz} fields, {errors} mismatches")
+
+# Benchmark
+num_fields = len(fields) * args.repeat
+results = {
+    'regex + zip (previous)': timed(lambda f: [parse_dependencies_regex_zip(x) for x in f], fields, args.repeat),
+    'tokenizer, one call per field': timed(lambda f: [_parse.__wrapped__(x) for x in f], fields, args.repeat),
+    'tokenizer, batch (cached)': timed(parse_dependencies_batch, fields, args.repeat),
+}
+
+print("implementation\tfields/s")
+for name, elapsed in results.items():
+    print(f"{name}\t{num_fields / elapsed:,.0f}")
@@ -0,0 +1,257 @@
+import argparse
+import glob
+import html
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+from modules.cran_listing import LISTING_PATH
+
+# Local HTTP server with the pages of CRAN used by the scraper, for the benchmarks
+#
+# It serves the list of packages (/web/packages/available_packages_by_name.html)
+# and the page of each package (/package=<name>), with the same structure as the
+# pages of CRAN. The catalogue is synthetic: each package imports a few other
+# packages, chosen with a preference for the popular ones, so the dependencies
+# repeat like in CRAN. The pages are generated when they are requested, so the
+# catalogue can have hundreds of thousands of packages without using memory.
+#
+# With a directory of saved CRAN pages (see benchmarks/parse_pages.py), the saved
+# pages are served instead, in turns, so the size of the pages is the real one.
+#
+# Each answer can be delayed (latency plus a random jitter), and a part of the
+# requests can fail with a 503 answer, to measure the retries.
+#
+# Usage (from the root of the repository):
+# python -m benchmarks.fake_cran --packages 20000 --port 8000 --latency 0.05 --error-rate 0.01
+# python tool.py --cran-url http://127.0.0.1:8000 --direct
+#
+# Usage example:
+# server = FakeCran(20000, latency=0.05)
+# server.start()
+# scraper = PackageScraper(RequestHandler(direct=True), base_url=server.url)
+# ...
+# server.stop()
+#
+# Author: agent <agent@local>
+# Date: 2026-10-17
+# Project: TFG OLIVIA
+
+LICENSES = ('GPL-2', 'GPL-3', 'GPL (>= 2)', 'MIT + file LICENSE', 'LGPL-3', 'Apache License 2.0', 'BSD_3_clause + file LICENSE')
+WORDS = ('analysis', 'bayesian', 'data', 'estimation', 'fast', 'functions', 'graphics', 'interface', 'linear',
+         'methods', 'models', 'regression', 'sampling', 'spatial', 'statistical', 'time', 'series', 'tools')
+
+
+class FakeCran:
+    '''
+    Local HTTP server with a synthetic CRAN catalogue
+
+    methods
+    -------
+    start(self) / stop(self)
+        Start or stop the server in a background thread
+
+    listing(self)
+        HTML of the list of packages
+
+    package_page(self, name)
+        HTML of the page of a package (None if it does not exist)
+    '''
+
+    def __init__(self, num_packages=1000, latency=0.0, jitter=0.0, error_rate=0.0, pages_dir=None,
+                 seed=0, host='127.0.0.1', port=0):
+        '''
+        class constructor
+
+        args:
+        -----
+            num_packages (int): Number of packages of the catalogue
+            latency (float): Seconds that each answer is delayed
+            jitter (float): Maximum random seconds added to the latency
+            error_rate (float): Part of the requests (0 to 1) answered with a 503 error
+            pages_dir (str): Directory with saved CRAN package pages (*.html), served instead of the synthetic ones
+            seed (int): Seed of the catalogue, the same seed gives the same pages
+            host (str): Address of the server
+            port (int): Port of the server (0 = any free port)
+        '''
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.seed = seed
+        self.host = host
+        self.port = port
+
+        # Saved pages, served in turns
+        self.pages = []
+        for path in sorted(glob.glob(os.path.join(pages_dir, '*.html'))) if pages_dir else []:
+            with open(path, 'rb') as file:
+                self.pages.append(file.read())
+
+        # Names of the packages, with their position in the catalogue
+        self.names = [f'pkg{i}' for i in range(num_packages)]
+        self.positions = {name: i for i, name in enumerate(self.names)}
+
+        # The list is the same for every request
+        self.listing_html = None
+
+        # Number of requests and of errors answered
+        self.requests = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+        self.random = random.Random(seed)
+
+        self.server = None
+        self.thread = None
+
+    # Address of the server
+    @property
+    def url(self) -> str:
+        return f'http://{self.host}:{self.port}'
+
+    # HTML of the list of packages
+    def listing(self) -> bytes:
+        if self.listing_html is None:
+            rows = [f'<tr><td><a href="../../web/packages/{name}/index.html"><span class="CRAN">{name}</span></a></td>'
+                    f'<td>{self.__title(i)}</td></tr>' for i, name in enumerate(self.names)]
+            self.listing_html = (
+                '<!DOCTYPE html>\n<html>\n<head>\n<title>CRAN: Available Packages By Name</title>\n</head>\n<body>\n'
+                '<h1>Available CRAN Packages By Name</h1>\n<table summary="Available CRAN packages by name.">\n'
+                + '\n'.join(rows) +
+                '\n</table>\n</body>\n</html>\n'
+            ).encode()
+        return self.listing_html
+
+    # Title of a package
+    def __title(self, position) -> str:
+        rng = random.Random(self.seed * 1000003 + position)
+        return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 6))).capitalize()
+
+    # HTML of the page of a package
+    def package_page(self, name) -> bytes | None:
+        position = self.positions.get(name)
+        if position is None:
+            return None
+        if self.pages:
+            return self.pages[position % len(self.pages)]
+
+        rng = random.Random(self.seed * 1000003 + position)
+        title = self.__title(position)
+        description = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(20, 120))).capitalize() + '.'
+
+        # Imports of popular packages (the ones at the start of the catalogue)
+        imports = []
+        for _ in range(rng.randint(0, 8) if position else 0):
+            dependency = self.names[int(position * rng.random() ** 3)]
+            if rng.random() < 0.3:
+                dependency += f' (&ge; {rng.randint(0, 3)}.{rng.randint(0, 9)}.0)'
+            if dependency not in imports:
+                imports.append(dependency)
+
+        rows = [
+            ('Version:', f'{rng.randint(0, 4)}.{rng.randint(0, 20)}-{rng.randint(0, 9)}'),
+            ('Depends:', f'R (&ge; {rng.choice(("2.10", "3.5.0", "4.0.0"))})'),
+            ('Imports:', ', '.join(imports)),
+            ('Published:', f'20{rng.randint(10, 25)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}'),
+            ('Author:', ' [aut, cre], '.join(f'Author {rng.randint(1, 10000)}' for _ in range(rng.randint(1, 4))) + ' [aut, cre]'),
+            ('Maintainer:', f'Author {rng.randint(1, 10000)} &lt;author at example.org&gt;'),
+            ('License:', html.escape(rng.choice(LICENSES))),
+            ('NeedsCompilation:', rng.choice(('yes', 'no'))),
+        ]
+        table = '\n'.join(f'<tr>\n<td>{label}</td>\n<td>{value}</td>\n</tr>' for label, value in rows if value)
+
+        return (
+            f'<!DOCTYPE html>\n<html>\n<head>\n<title>CRAN: Package {name}</title>\n</head>\n<body>\n'
+            f'<div class="container">\n<h2>{name}: {title}</h2>\n<p>{description}</p>\n'
+            f'<table summary="Package {name} summary">\n{table}\n</table>\n</div>\n</body>\n</html>\n'
+        ).encode()
+
+    # Start the server in a background thread
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            # Keep the connections open, like CRAN
+            # Without Nagle's algorithm, the body is not delayed until the headers are acknowledged
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                with fake.lock:
+                    fake.requests += 1
+                    delay = fake.latency + fake.random.random() * fake.jitter
+                    failed = fake.random.random() < fake.error_rate
+                    if failed:
+                        fake.errors += 1
+
+                if delay > 0:
+                    time.sleep(delay)
+
+                if failed:
+                    self.answer(503, b'Service Unavailable', {'Retry-After': '0'})
+                    return
+
+                path = unquote(self.path)
+                if path == LISTING_PATH:
+                    body = fake.listing()
+                elif path.startswith('/package='):
+                    body = fake.package_page(path[len('/package='):])
+                else:
+                    body = None
+
+                if body is None:
+                    self.answer(404, b'Not Found')
+                else:
+                    self.answer(200, body)
+
+            def answer(self, status, body, headers=None):
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            # The requests are not written to the console
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, name='fake-cran', daemon=True)
+        self.thread.start()
+
+    # Stop the server
+    def stop(self):
+        if self.server is None:
+            return
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.server = None
+
+
+# Script
+# -----------------------------------------------
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Local HTTP server with a synthetic CRAN catalogue")
+    parser.add_argument("--packages", type=int, default=20000, help="Number of packages of the catalogue")
+    parser.add_argument("--port", type=int, default=8000, help="Port of the server")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds that each answer is delayed")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Maximum random seconds added to the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Part of the requests answered with a 503 error (0 to 1)")
+    parser.add_argument("--pages", metavar="DIRECTORY", default=None, help="Serve these saved CRAN pages (*.html) instead of the synthetic ones")
+    args = parser.parse_args()
+
+    server = FakeCran(args.packages, args.latency, args.jitter, args.error_rate, args.pages, port=args.port)
+    server.start()
+    print("Serving", args.packages, "packages on", server.url)
+    try:
+        server.thread.join()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,53 @@
+import argparse
+import glob
+import os
+import time
+from modules.page_parser import parse_pkg_page, PARSERS
+
+# Benchmark of the backends used to read the CRAN package pages
+#
+# The pages are read from a directory of saved HTML files, for example:
+# mkdir pages && for p in ggplot2 dplyr A3; do
+#     curl -s "https://cran.r-project.org/package=$p" -o pages/$p.html; done
+#
+# Usage (from the root of the repository):
+# python -m benchmarks.parse_pages pages --repeat 20
+#
+# Author: agent <agent@local>
+# Date: 2026-10-17
+# Project: TFG OLIVIA
+
+parser = argparse.ArgumentParser(description="Benchmark of the package page parsers")
+parser.add_argument("directory", help="Directory with saved CRAN package pages (*.html)")
+parser.add_argument("--repeat", type=int, default=10, help="Number of times each page is parsed")
+parser.add_argument("--parsers", nargs="+", choices=PARSERS, default=list(PARSERS), help="Backends to compare")
+args = parser.parse_args()
+
+# Load the pages in memory, so that only the parsing is timed
+pages = []
+for path in sorted(glob.glob(os.path.join(args.directory, "*.html"))):
+    with open(path, encoding="utf-8", errors="replace") as file:
+        pages.append(file.read())
+
+if not pages:
+    print("No pages found in", args.directory)
+    exit(1)
+
+print("parser\tpages/s\tms/page")
+for backend in args.parsers:
+
+    # lxml is optional
+    try:
+        parse_pkg_page(pages[0], backend)
+    except Exception as e:
+        print(f"{backend}\tnot available ({e.__class__.__name__})")
+        continue
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for page in pages:
+            parse_pkg_page(page, backend)
+    elapsed = time.perf_counter() - start
+
+    num_pages = len(pages) * args.repeat
+    print(f"{backend}\t{num_pages / elapsed:.1f}\t{elapsed / num_pages * 1000:.3f}")
@@ -114,6 +114,22 @@ echo "[+] Creating tables..."
 mysql -u $DB_APP_USERNAME -p$DB_APP_PASSWORD $DB_NAME < config/db/db_schema.sql > /dev/null 2>&1
 print_status
 
+# Apply the schema migrations in order
+# The number of each file (002_...) is its version. The versions already
+# recorded in schema_version are skipped, so each migration is applied once
+for migration in config/db/migrations/*.sql; do
+    version=$((10#$(basename $migration | cut -d_ -f1)))
+    applied=$(mysql -u $DB_APP_USERNAME -p$DB_APP_PASSWORD $DB_NAME -N -e "SELECT COUNT(*) FROM schema_version WHERE version = $version;" 2>/dev/null)
+    if [ "$applied" = "1" ]; then
+        echo "[=] Migration $migration already applied"
+        continue
+    fi
+
+    echo "[+] Applying migration $migration..."
+    mysql -u $DB_APP_USERNAME -p$DB_APP_PASSWORD $DB_NAME < $migration > /dev/null 2>&1
+    print_status
+done
+
 # # Import the data
 # echo "Importing data"
 # mysql -u $DB_APP_USERNAME -p$DB_APP_PASSWORD $DB_NAME < db_data.sql
@@ -15,6 +15,9 @@ CREATE TABLE packages (
 );
 
 -- Tables to store dependencies
+-- version is the constraint as '<operator> <version>' with the operators of the
+-- DESCRIPTION files ('>= 3.5.0', '== 1.0'), or '' if there is no constraint.
+-- Rows saved before migration 002 used the text of the CRAN pages ('≥ 3.5.0')
 CREATE TABLE dependencies (
     id INTEGER PRIMARY KEY AUTO_INCREMENT,
     name VARCHAR(255) NOT NULL,
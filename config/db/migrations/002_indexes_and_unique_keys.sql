@@ -0,0 +1,70 @@
+-- Migration 002: unique keys and secondary indexes
+--
+-- packages.name and dependencies(name, version, type) are looked up for every
+-- package. Without an index each lookup is a full table scan. The unique keys
+-- also let the application use INSERT ... ON DUPLICATE KEY UPDATE instead of
+-- select-then-insert.
+--
+-- The versions of the dependencies are stored as '<operator> <version>' with the
+-- operators of the DESCRIPTION files ('>= 3.5.0'). The rows saved before kept the
+-- text of the CRAN pages ('≥ 3.5.0'), so they are normalized before the unique
+-- key is added, and the rows that become equal are merged.
+--
+-- The statements can not be run twice. db_config.sh skips the migration if
+-- version 2 is already in schema_version. Apply it by hand to an existing
+-- database only if
+--   SELECT version FROM schema_version WHERE version = 2
+-- returns no row, with:
+--   mysql -u scraper -p r_network < config/db/migrations/002_indexes_and_unique_keys.sql
+
+-- Table to store the version of the schema
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- The base schema (db_schema.sql) is version 1
+INSERT IGNORE INTO schema_version (version) VALUES (1);
+
+-- One row for each package name
+ALTER TABLE packages
+    ADD UNIQUE KEY uq_packages_name (name);
+
+-- Operators of the CRAN pages: ≥ -> >=, ≤ -> <=, = -> ==
+UPDATE dependencies SET version = CONCAT('>= ', TRIM(SUBSTRING(version, 2))) WHERE version LIKE '≥%';
+UPDATE dependencies SET version = CONCAT('<= ', TRIM(SUBSTRING(version, 2))) WHERE version LIKE '≤%';
+UPDATE dependencies SET version = CONCAT('== ', TRIM(SUBSTRING(version, 2))) WHERE version LIKE '=%' AND version NOT LIKE '==%';
+UPDATE dependencies SET version = TRIM(version) WHERE version <> TRIM(version);
+
+-- Dependencies that became equal are merged into the first one
+CREATE TEMPORARY TABLE dependency_merge AS
+    SELECT d.id AS old_id, k.id AS new_id
+    FROM dependencies d
+    JOIN (
+        SELECT name, version, type, MIN(id) AS id
+        FROM dependencies
+        GROUP BY name, version, type
+        HAVING COUNT(*) > 1
+    ) k ON d.name = k.name AND d.version = k.version AND d.type = k.type AND d.id <> k.id;
+
+-- A package that already has the merged dependency keeps a single relation
+UPDATE IGNORE package_dependency pd
+    JOIN dependency_merge m ON pd.dependency_id = m.old_id
+    SET pd.dependency_id = m.new_id;
+DELETE pd FROM package_dependency pd JOIN dependency_merge m ON pd.dependency_id = m.old_id;
+DELETE d FROM dependencies d JOIN dependency_merge m ON d.id = m.old_id;
+DROP TEMPORARY TABLE dependency_merge;
+
+-- One row for each (name, version, type) dependency
+ALTER TABLE dependencies
+    ADD UNIQUE KEY uq_dependencies_name_version_type (name, version, type);
+
+-- Reverse lookups: packages that use a dependency
+ALTER TABLE package_dependency
+    ADD INDEX idx_package_dependency_dependency (dependency_id);
+
+-- One row for each link of a package
+ALTER TABLE links
+    ADD UNIQUE KEY uq_links_package_url (package_id, url);
+
+INSERT INTO schema_version (version) VALUES (2);
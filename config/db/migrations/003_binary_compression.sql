@@ -0,0 +1,30 @@
+-- Migration 003: binary storage of the compressed texts
+--
+-- description and author_data were stored as zlib + hex in TEXT columns, which
+-- doubles their size. They are now BLOBs that start with the id of the codec
+-- that compressed them (see modules/compression.py). The hex values are kept as
+-- they are (as ASCII bytes) and are still read, so the application keeps working
+-- while migrate_compression.py rewrites them in small batches.
+--
+-- The statements can not be run twice. db_config.sh skips the migration if
+-- version 3 is already in schema_version. Apply it by hand to an existing
+-- database only if
+--   SELECT version FROM schema_version WHERE version = 3
+-- returns no row, with:
+--   mysql -u scraper -p r_network < config/db/migrations/003_binary_compression.sql
+
+-- zstd dictionaries trained on the texts of a column
+CREATE TABLE IF NOT EXISTS compression_dictionaries (
+    id INTEGER PRIMARY KEY AUTO_INCREMENT,
+    codec VARCHAR(32) NOT NULL,
+    column_name VARCHAR(64) NOT NULL,
+    data MEDIUMBLOB NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- The hex texts are converted to bytes without changes
+ALTER TABLE packages
+    MODIFY description BLOB,
+    MODIFY author_data BLOB;
+
+INSERT INTO schema_version (version) VALUES (3);
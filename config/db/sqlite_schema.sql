@@ -0,0 +1,73 @@
+-- Schema of the SQLite storage backend
+--
+-- The same tables as the MySQL schema (db_schema.sql) with the migrations
+-- applied (schema version 3). It is created when the database file is new
+-- (see modules/storage.py).
+
+-- Table to store the version of the schema
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Create the package table
+CREATE TABLE IF NOT EXISTS packages (
+    id INTEGER PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE,
+    description BLOB,
+    version VARCHAR(255) NOT NULL,
+    publication_date DATE NOT NULL,
+    requires_compilation BOOLEAN NOT NULL,
+    in_cran BOOLEAN,
+    in_bioconductor BOOLEAN,
+    mantainer VARCHAR(255) NOT NULL,
+    author_data BLOB,
+    license VARCHAR(255) NOT NULL
+);
+
+-- Tables to store dependencies
+-- version is the constraint as '<operator> <version>' with the operators of the
+-- DESCRIPTION files ('>= 3.5.0', '== 1.0'), or '' if there is no constraint
+CREATE TABLE IF NOT EXISTS dependencies (
+    id INTEGER PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    version VARCHAR(255) NOT NULL,
+    type VARCHAR(255) NOT NULL,
+    UNIQUE (name, version, type)
+);
+
+-- Table to store the dependencies of the packages
+CREATE TABLE IF NOT EXISTS package_dependency (
+    package_id INTEGER NOT NULL REFERENCES packages(id),
+    dependency_id INTEGER NOT NULL REFERENCES dependencies(id),
+    PRIMARY KEY (package_id, dependency_id)
+) WITHOUT ROWID;
+
+-- Reverse lookups: packages that use a dependency
+CREATE INDEX IF NOT EXISTS idx_package_dependency_dependency ON package_dependency (dependency_id);
+
+-- Tables to store the url of the packages
+CREATE TABLE IF NOT EXISTS links (
+    id INTEGER PRIMARY KEY,
+    url VARCHAR(255) NOT NULL,
+    package_id INTEGER NOT NULL REFERENCES packages(id),
+    UNIQUE (package_id, url)
+);
+
+-- Table to store the links of the packages
+CREATE TABLE IF NOT EXISTS package_link (
+    package_id INTEGER NOT NULL REFERENCES packages(id),
+    url_id INTEGER NOT NULL REFERENCES links(id),
+    PRIMARY KEY (package_id, url_id)
+) WITHOUT ROWID;
+
+-- zstd dictionaries trained on the texts of a column
+CREATE TABLE IF NOT EXISTS compression_dictionaries (
+    id INTEGER PRIMARY KEY,
+    codec VARCHAR(32) NOT NULL,
+    column_name VARCHAR(64) NOT NULL,
+    data BLOB NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT OR IGNORE INTO schema_version (version) VALUES (1), (2), (3);
@@ -0,0 +1,51 @@
+import argparse
+import time
+from colorama import Fore
+from modules.db import DatabaseHandler
+from modules.exporter import DatasetExporter, FORMATS, TABLES
+from modules.util import print_colored
+
+# Export the scraped dataset to Parquet or Arrow IPC files
+#
+# The packages (with the texts decompressed), their dependencies and their links
+# are written to a subdirectory of the output directory, in files of at most
+# --rows-per-file rows. The tables are read in chunks, so any size can be exported.
+#
+# Usage (from the root of the repository):
+# python export.py output --format parquet
+#
+# Reading the files:
+# pyarrow.dataset.dataset('output/packages', format='parquet').to_table()
+# pyarrow.ipc.open_file(pyarrow.memory_map('output/packages/part-00000.arrow')).read_all()
+#
+# Author: agent <agent@local>
+# Date: 2026-10-17
+# Project: TFG OLIVIA
+
+parser = argparse.ArgumentParser(description="Export the packages, dependencies and links to columnar files")
+parser.add_argument("directory", help="Output directory")
+parser.add_argument("--format", choices=FORMATS, default="parquet",
+                    help="parquet (default) or arrow (Arrow IPC files, can be memory-mapped)")
+parser.add_argument("--tables", nargs="+", choices=list(TABLES), default=list(TABLES),
+                    help="Tables to export (all by default)")
+parser.add_argument("--chunk-size", type=int, default=50000,
+                    help="Number of rows read from the database at once (default 50000)")
+parser.add_argument("--rows-per-file", type=int, default=1000000,
+                    help="Maximum number of rows of each file (default 1000000)")
+parser.add_argument("--compression", default="default",
+                    help="Compression of the files: zstd, lz4, snappy, gzip or none. "
+                         "By default, zstd for parquet and none for arrow, so the Arrow files can be memory-mapped without copies")
+args = parser.parse_args()
+
+db = DatabaseHandler()
+cnx = db.get_connection()
+
+exporter = DatasetExporter(cnx, args.directory, args.format, args.chunk_size, args.rows_per_file,
+                           None if args.compression == "none" else args.compression)
+
+for table in args.tables:
+    start = time.perf_counter()
+    rows = exporter.export([table])[table]
+    print_colored("Exported " + table + ": " + str(rows) + " rows in " + str(round(time.perf_counter() - start, 2)) + " s", Fore.GREEN)
+
+cnx.close()
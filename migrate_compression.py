@@ -0,0 +1,143 @@
+import argparse
+import time
+from colorama import Fore
+from modules.db import DatabaseHandler, SCHEMA_VERSION
+from modules.compression import TextCodecs, COMPRESSED_COLUMNS
+from modules.util import print_colored
+
+# Online migration of the compressed texts to the codecs of config.ini
+#
+# Rewrites the description and author_data of the packages that were compressed
+# with another codec (or stored as hex before migration 003). The rows are read
+# and written in small batches, each one in its own transaction, so it can run
+# while a crawl is saving packages. A row that changes between the read and the
+# write is skipped (the crawl already wrote it with the current codec).
+#
+# The rows are compressed with the zstd level of migrate_level in config.ini
+# (19 by default), higher than the level used by the crawls.
+#
+# With --train, a zstd dictionary is trained on a sample of each column before
+# the rows are rewritten.
+#
+# Usage (from the root of the repository, after migration 003):
+# python migrate_compression.py --train
+#
+# Author: agent <agent@local>
+# Date: 2026-10-17
+# Project: TFG OLIVIA
+
+# Codecs of the columns, with the zstd level of the migration
+text_codecs = TextCodecs.from_config(level_option='migrate_level')
+
+# Functions
+# -----------------------------------------------
+
+# Train a dictionary for each column compressed with zstd
+def train_dictionaries(cnx, num_samples, dictionary_size):
+    cursor = cnx.cursor()
+
+    for column in COMPRESSED_COLUMNS:
+        if text_codecs.columns.get(column) != 'zstd':
+            continue
+
+        # Random sample of the texts of the column
+        cursor.execute(f'SELECT {column} FROM packages WHERE {column} IS NOT NULL ORDER BY RAND() LIMIT %s', (num_samples,))
+        samples = [text_codecs.decode(row[0]) for row in cursor.fetchall()]
+        if not samples:
+            continue
+
+        dictionary_id = text_codecs.train_dictionary(cnx, column, samples, dictionary_size)
+        print_colored("Dictionary " + str(dictionary_id) + " trained for " + column + " with " + str(len(samples)) + " texts", Fore.GREEN)
+
+    cursor.close()
+
+# Rewrite one batch of packages
+# Returns the last id of the batch (None if there are no more packages), and the bytes before and after
+def migrate_batch(cnx, last_id, batch_size):
+    cursor = cnx.cursor()
+    cursor.execute(
+        'SELECT id, description, author_data FROM packages WHERE id > %s ORDER BY id LIMIT %s',
+        (last_id, batch_size)
+    )
+    rows = cursor.fetchall()
+    if not rows:
+        cursor.close()
+        return None, 0, 0
+
+    updates = []
+    bytes_before = 0
+    bytes_after = 0
+    for package_id, description, author_data in rows:
+        if text_codecs.is_current('description', description) and text_codecs.is_current('author_data', author_data):
+            continue
+
+        new_description = text_codecs.encode('description', text_codecs.decode(description))
+        new_author_data = text_codecs.encode('author_data', text_codecs.decode(author_data))
+
+        bytes_before += len(description or b'') + len(author_data or b'')
+        bytes_after += len(new_description or b'') + len(new_author_data or b'')
+
+        # The row is only written if it did not change after it was read
+        updates.append((new_description, new_author_data, package_id, description, author_data))
+
+    if updates:
+        cursor.executemany(
+            'UPDATE packages SET description = %s, author_data = %s '
+            'WHERE id = %s AND description <=> %s AND author_data <=> %s',
+            updates
+        )
+    cnx.commit()
+    cursor.close()
+
+    return rows[-1][0], bytes_before, bytes_after
+
+# Script
+# -----------------------------------------------
+
+parser = argparse.ArgumentParser(description="Rewrite the compressed texts of the packages with the codecs of config.ini")
+parser.add_argument("--train", action="store_true",
+                    help="Train a zstd dictionary for each zstd column before rewriting the rows")
+parser.add_argument("--samples", type=int, default=5000,
+                    help="Number of texts used to train each dictionary (default 5000)")
+parser.add_argument("--dictionary-size", type=int, default=64 * 1024,
+                    help="Maximum size of each dictionary in bytes (default 65536)")
+parser.add_argument("--batch-size", type=int, default=500,
+                    help="Number of packages rewritten in each transaction (default 500)")
+parser.add_argument("--pause", type=float, default=0.0,
+                    help="Seconds to wait between two batches, to leave the database to other clients (default 0)")
+args = parser.parse_args()
+
+db = DatabaseHandler()
+cnx = db.get_connection()
+
+# The compressed columns and the dictionaries are created by migration 003
+if db.schema_version() < SCHEMA_VERSION:
+    print_colored("The database schema is out of date, run config/db/db_config.sh to apply the migrations", Fore.RED)
+    exit(1)
+
+# Load the dictionaries trained before
+text_codecs.load_dictionaries(cnx)
+
+if args.train:
+    train_dictionaries(cnx, args.samples, args.dictionary_size)
+
+print("Codecs: " + ", ".join(column + "=" + text_codecs.encoders[column].name for column in COMPRESSED_COLUMNS))
+
+last_id = 0
+total_before = 0
+total_after = 0
+start = time.perf_counter()
+while True:
+    last_id, bytes_before, bytes_after = migrate_batch(cnx, last_id, args.batch_size)
+    if last_id is None:
+        break
+
+    total_before += bytes_before
+    total_after += bytes_after
+    print("Rewritten up to package id " + str(last_id) + ": " + str(total_before) + " -> " + str(total_after) + " bytes")
+
+    if args.pause:
+        time.sleep(args.pause)
+
+cnx.close()
+print_colored("Migration finished in " + str(round(time.perf_counter() - start, 1)) + " s: " + str(total_before) + " -> " + str(total_after) + " bytes", Fore.GREEN)
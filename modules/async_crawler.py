@@ -0,0 +1,170 @@
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterable
+from modules.cran_scraper import PackageScraper
+from modules.package import Package
+
+# Class to scrape many CRAN packages at the same time
+#
+# The HTTP requests made by PackageScraper are blocking, so each fetch runs in
+# a worker thread and asyncio is used to keep a bounded number of them in flight.
+# Results are returned in the same order as the package names were given.
+#
+# Usage example:
+# crawler = AsyncCrawler(PackageScraper(RequestHandler()), concurrency=32)
+# for name, result in crawler.run(['ggplot2', 'dplyr']):
+#     ...
+#
+# Author: agent <agent@local>
+# Date: 2026-10-17
+# Project: TFG OLIVIA
+
+class AsyncCrawler:
+    '''
+    Class to scrape many CRAN packages at the same time
+
+    methods:
+    --------
+    __init__(self, scraper, concurrency, builder)
+        class constructor
+
+    __fetch(self, item, executor, semaphore)
+        Build one package in a worker thread
+
+    crawl(self, items)
+        Asynchronous generator with the result of each package, in order
+
+    run(self, items)
+        Synchronous generator over crawl()
+
+    '''
+
+    # Class constructor
+    def __init__(self, scraper: PackageScraper, concurrency: int = 32, builder: Callable[[Any], Package] = None) -> None:
+        '''
+        class constructor
+
+        args:
+        -----
+            scraper (PackageScraper): Object used to build each package
+            concurrency (int): Maximum number of packages fetched at the same time
+            builder (Callable): Function that builds a package from each item given to crawl().
+                By default, scraper.pkg_builder, so the items are package names
+
+        '''
+        if concurrency < 1:
+            raise ValueError("concurrency must be greater than 0")
+
+        self.scraper = scraper
+        self.concurrency = concurrency
+        self.builder = builder or scraper.pkg_builder
+
+        # Number of packages scheduled ahead of the one being returned.
+        # A bigger window avoids that a slow package stops the other workers
+        self.window = concurrency * 2
+
+    # Build one package in a worker thread
+    async def __fetch(self, item, executor: ThreadPoolExecutor, semaphore: asyncio.Semaphore) -> Package | Exception:
+        '''
+        Build one package in a worker thread
+
+        args:
+        -----
+            item: Package name, or the item expected by the builder
+            executor (ThreadPoolExecutor): Thread pool where the request is made
+            semaphore (asyncio.Semaphore): Semaphore that bounds the concurrency
+
+        Returns:
+        --------
+            Package | Exception: The package, or the exception raised while building it
+
+        '''
+        async with semaphore:
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(executor, self.builder, item)
+
+            # The error is returned so that one package does not stop the crawl
+            except Exception as e:
+                return e
+
+    # Scrape the packages and yield the results in order
+    async def crawl(self, items: Iterable) -> AsyncIterator[tuple[Any, Package | Exception]]:
+        '''
+        Scrape the packages and yield the results in order
+
+        args:
+        -----
+            items (Iterable): Names of the packages to scrape, or the items expected by the builder
+
+        Returns:
+        --------
+            AsyncIterator[tuple[Any, Package | Exception]]: Pairs (item, result)
+
+        '''
+        # Thread pool where the blocking requests are made
+        executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        pending = deque()
+        items = iter(items)
+
+        def schedule(item):
+            task = asyncio.ensure_future(self.__fetch(item, executor, semaphore))
+            pending.append((item, task))
+
+        try:
+
+            # Schedule the first packages of the window
+            for item in items:
+                schedule(item)
+                if len(pending) == self.window:
+                    break
+
+            # Return the oldest package and schedule a new one
+            while pending:
+                item, task = pending.popleft()
+                result = await task
+
+                for next_item in items:
+                    schedule(next_item)
+                    break
+
+                yield item, result
+
+        # If the crawl is stopped, cancel the packages not returned yet
+        finally:
+            for _, task in pending:
+                task.cancel()
+            await asyncio.gather(*(task for _, task in pending), return_exceptions=True)
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    # Synchronous version of crawl
+    def run(self, items: Iterable):
+        '''
+        Synchronous generator over crawl()
+
+        The caller can process each result (for example, save it in the database)
+        while the next packages are still being fetched.
+
+        args:
+        -----
+            items (Iterable): Names of the packages to scrape, or the items expected by the builder
+
+        Returns:
+        --------
+            Iterator[tuple[Any, Package | Exception]]: Pairs (item, result)
+
+        '''
+        loop = asyncio.new_event_loop()
+        generator = self.crawl(items)
+
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(generator.__anext__())
+                except StopAsyncIteration:
+                    break
+        finally:
+            loop.run_until_complete(generator.aclose())
+            loop.close()
@@ -0,0 +1,255 @@
+from mysql.connector import MySQLConnection
+from modules.package import Package
+from modules.dependency import Dependency
+from modules.compression import text_codecs
+
+# Class to save packages in the database in batches
+#
+# Package.save needs several statements and one commit for each link and each
+# dependency. This class collects the packages and writes each batch with a few
+# multi-row statements (executemany) in a single transaction. If the batch can
+# not be written, it is split in halves that are written on their own, so only
+# the packages with errors are left out.
+#
+# Usage example:
+# writer = BulkWriter(cnx, batch_size=100)
+# for package in packages:
+#     writer.add(package)
+#     if writer.is_full():
+#         writer.flush()
+# writer.flush()
+#
+# Author: agent <agent@local>
+# Date: 2026-10-17
+# Project: TFG OLIVIA
+
+class BulkWriter:
+    '''
+    Class to save packages in the database in batches
+
+    attributes
+    ----------
+    cnx : MySQLConnection
+        Connection to the database
+
+    batch_size : int
+        Number of packages written in each transaction
+
+    packages : list[Package]
+        Packages waiting to be written
+
+    failed : list[tuple[Package, Exception]]
+        Packages of the last flush that could not be written, with their errors
+
+    methods
+    -------
+    add(self, package)
+        Add a package to the current batch
+
+    is_full(self)
+        Check if the current batch has batch_size packages
+
+    flush(self)
+        Write the current batch in one transaction
+
+    '''
+
+    # Class constructor
+    def __init__(self, cnx: MySQLConnection, batch_size: int = 100):
+
+        if batch_size < 1:
+            raise ValueError("batch_size must be greater than 0")
+
+        self.cnx = cnx
+        self.batch_size = batch_size
+        self.packages: list[Package] = []
+        self.failed: list[tuple[Package, Exception]] = []
+
+    # Number of packages waiting to be written
+    def __len__(self):
+        return len(self.packages)
+
+    # Add a package to the current batch
+    def add(self, package: Package):
+        '''
+        Add a package to the current batch. Nothing is written until flush() is called.
+        '''
+        self.packages.append(package)
+
+    # Check if the current batch is full
+    def is_full(self) -> bool:
+        return len(self.packages) >= self.batch_size
+
+    # Write the current batch
+    def flush(self):
+        '''
+        Write the current batch in one transaction
+
+        The ids of the packages and of their dependencies are set after the write.
+        If an error occurs, the transaction is rolled back and the batch is split
+        in halves, written in their own transactions, until the packages with
+        errors are found. The batch is always emptied: the packages that could
+        not be written are left in `failed`, with their errors.
+
+        Returns
+        -------
+        True if the whole batch was saved, or the tuple (False, exception) like
+        Package.save, with the first error
+        '''
+
+        packages = self.packages
+        self.packages = []
+        self.failed = self.__write(packages) if packages else []
+
+        if self.failed:
+            return False, self.failed[0][1]
+        return True
+
+    # Write some packages in one transaction, splitting them in halves if it fails
+    # Returns the packages that could not be written, with their errors
+    def __write(self, packages: list[Package]) -> list[tuple[Package, Exception]]:
+
+        cursor = self.cnx.cursor(buffered=True)
+        error = None
+
+        try:
+            self.__insert_packages(cursor, packages)
+            self.__insert_links(cursor, packages)
+            self.__insert_dependencies(cursor, packages)
+
+            # One commit for the whole batch
+            self.cnx.commit()
+
+        except Exception as e:
+            self.cnx.rollback()
+            error = e
+
+        finally:
+            cursor.close()
+
+        if error is not None:
+            if len(packages) == 1:
+                return [(packages[0], error)]
+
+            # Write each half on its own
+            middle = len(packages) // 2
+            return self.__write(packages[:middle]) + self.__write(packages[middle:])
+
+        # The ids of the dependencies are cached once they are committed
+        for p in packages:
+            for d in p.dependencies:
+                Dependency.cache.put((d.name, d.version, d.type), d.id)
+
+        return []
+
+    # Insert the packages and get their ids
+    def __insert_packages(self, cursor, packages):
+
+        # Packages that already exist are updated
+        sql = '''
+            INSERT INTO packages (name, description, version, publication_date, requires_compilation, in_cran, in_bioconductor, mantainer, author_data, license)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                description = VALUES(description),
+                version = VALUES(version),
+                publication_date = VALUES(publication_date),
+                requires_compilation = VALUES(requires_compilation),
+                in_cran = VALUES(in_cran),
+                in_bioconductor = VALUES(in_bioconductor),
+                mantainer = VALUES(mantainer),
+                author_data = VALUES(author_data),
+                license = VALUES(license)
+        '''
+        values = [
+            (
+                p.name,
+                text_codecs.encode('description', p.description),
+                p.version,
+                p.publication_date,
+                p.requires_compilation,
+                p.in_cran,
+                p.in_bioc,
+                p.mantainer,
+                text_codecs.encode('author_data', p.authors_data),
+                p.licenses
+            )
+            for p in packages
+        ]
+        cursor.executemany(sql, values)
+
+        # The ids generated by a multi-row insert are not always consecutive, so they are read back
+        names = [p.name for p in packages]
+        placeholders = ', '.join(['%s'] * len(names))
+        cursor.execute(f'SELECT name, id FROM packages WHERE name IN ({placeholders})', names)
+        ids = dict(cursor.fetchall())
+
+        for p in packages:
+            p.id = ids[p.name]
+
+    # Insert the links of the packages
+    def __insert_links(self, cursor, packages):
+
+        values = [(link, p.id) for p in packages for link in p.links]
+        if not values:
+            return
+
+        cursor.executemany('INSERT INTO links (url, package_id) VALUES (%s, %s) ON DUPLICATE KEY UPDATE id = id', values)
+
+        # Relate each link with its package in a single statement
+        package_ids = [p.id for p in packages]
+        placeholders = ', '.join(['%s'] * len(package_ids))
+        cursor.execute(
+            f'INSERT INTO package_link (package_id, url_id) SELECT package_id, id FROM links WHERE package_id IN ({placeholders}) '
+            'ON DUPLICATE KEY UPDATE package_link.url_id = package_link.url_id',
+            package_ids
+        )
+
+    # Insert the dependencies of the packages
+    def __insert_dependencies(self, cursor, packages):
+
+        # Distinct dependencies of the batch
+        keys = list(dict.fromkeys(
+            (d.name, d.version, d.type) for p in packages for d in p.dependencies
+        ))
+
+        # Get the dependencies that are cached
+        ids = {}
+        for key in keys:
+            id = Dependency.cache.get(key)
+            if id is not None:
+                ids[key] = id
+
+        # Insert the others (existing rows are left as they are) and get their ids
+        missing = [key for key in keys if key not in ids]
+        if missing:
+            cursor.executemany('INSERT INTO dependencies (name, version, type) VALUES (%s, %s, %s) ON DUPLICATE KEY UPDATE id = id', missing)
+            ids.update(self.__select_dependencies(cursor, missing))
+
+        # Packages that were already saved get their dependencies replaced
+        package_ids = [p.id for p in packages]
+        placeholders = ', '.join(['%s'] * len(package_ids))
+        cursor.execute(f'DELETE FROM package_dependency WHERE package_id IN ({placeholders})', package_ids)
+
+        # Relate each package with its dependencies
+        relations = {}
+        for p in packages:
+            for d in p.dependencies:
+                d.id_pkg = p.id
+                d.id = ids[(d.name, d.version, d.type)]
+                relations[(d.id_pkg, d.id)] = None
+
+        if relations:
+            cursor.executemany('INSERT INTO package_dependency (package_id, dependency_id) VALUES (%s, %s) ON DUPLICATE KEY UPDATE package_id = package_id', list(relations))
+
+    # Get the ids of some dependencies
+    def __select_dependencies(self, cursor, keys) -> dict[tuple, int]:
+
+        ids = {}
+        placeholders = ', '.join(['(%s, %s, %s)'] * len(keys))
+        params = [value for key in keys for value in key]
+        cursor.execute(f'SELECT id, name, version, type FROM dependencies WHERE (name, version, type) IN ({placeholders})', params)
+
+        for id, name, version, type in cursor.fetchall():
+            ids.setdefault((name, version, type), id)
+
+        return ids
@@ -1,4 +1,40 @@
+import configparser
+import struct
+import threading
 import zlib
+from mysql.connector import MySQLConnection
+from modules.log import logger
+
+# zstandard is optional: without it, the columns are compressed with zlib
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# Compression of the text columns of the database
+#
+# The texts are stored as binary BLOBs. The first byte of each value is the id of
+# the codec that compressed it, so the codec of a column can be changed at any
+# time and old values are still read:
+#   0x01 + zlib stream
+#   0x02 + dictionary id (4 bytes, 0 = no dictionary) + zstd frame
+#
+# zstd compresses the short CRAN texts much better with a dictionary trained on
+# them. The dictionaries are stored in the compression_dictionaries table and
+# referenced by id from each value.
+#
+# Values written before (zlib + hex) are also read. They start with an ASCII
+# hex digit, which is never a codec id.
+#
+# Usage example:
+# text_codecs.load_dictionaries(cnx)
+# blob = text_codecs.encode('description', 'Create elegant data visualisations')
+# text = text_codecs.decode(blob)
+#
+# Author: agent <agent@local>
+# Date: 2026-10-17
+# Project: TFG OLIVIA
 
 def compress_text(text):
     # Comprime el texto utilizando zlib
@@ -17,4 +53,267 @@ def decompress_text(compressed_text_hex):
     uncompressed_text = zlib.decompress(compressed_text)
 
     # Convierte los bytes a una cadena de texto
-    return uncompressed_text.decode()
\ No newline at end of file
+    return uncompressed_text.decode()
+
+
+# Ids of the codecs, stored in the first byte of each value
+ZLIB = 0x01
+ZSTD = 0x02
+
+# Columns of the packages table that are compressed
+COMPRESSED_COLUMNS = ('description', 'author_data')
+
+
+class ZlibCodec:
+    '''
+    zlib codec, always available
+    '''
+
+    id = ZLIB
+    name = 'zlib'
+
+    def __init__(self, level=6):
+        self.level = level
+
+    # Compress a text
+    def compress(self, data: bytes) -> bytes:
+        return bytes((ZLIB,)) + zlib.compress(data, self.level)
+
+    # Decompress a value compressed by this codec
+    def decompress(self, value: bytes) -> bytes:
+        return zlib.decompress(memoryview(value)[1:])
+
+
+class ZstdCodec:
+    '''
+    zstd codec, with an optional trained dictionary. Requires the zstandard package
+
+    The compressor and decompressor objects of zstandard cannot be shared between
+    threads, so each thread gets its own.
+    '''
+
+    id = ZSTD
+    name = 'zstd'
+
+    def __init__(self, level=3, dictionary: bytes = None, dictionary_id=0):
+        if zstandard is None:
+            raise ImportError('The zstd codec requires the zstandard package (pip install zstandard)')
+
+        self.level = level
+        self.dictionary_id = dictionary_id
+        self.dictionary = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        self.header = bytes((ZSTD,)) + struct.pack('>I', dictionary_id)
+        self.local = threading.local()
+
+    # Compress a text
+    def compress(self, data: bytes) -> bytes:
+        compressor = getattr(self.local, 'compressor', None)
+        if compressor is None:
+            compressor = zstandard.ZstdCompressor(level=self.level, dict_data=self.dictionary)
+            self.local.compressor = compressor
+        return self.header + compressor.compress(data)
+
+    # Decompress a value compressed by this codec
+    def decompress(self, value: bytes) -> bytes:
+        decompressor = getattr(self.local, 'decompressor', None)
+        if decompressor is None:
+            decompressor = zstandard.ZstdDecompressor(dict_data=self.dictionary)
+            self.local.decompressor = decompressor
+        return decompressor.decompress(memoryview(value)[5:])
+
+
+class TextCodecs:
+    '''
+    Codecs of the compressed columns
+
+    methods
+    -------
+    encode(self, column, text)
+        Compress the text of a column
+
+    decode(self, value)
+        Decompress a value of any codec (or a hex value written before)
+
+    is_current(self, column, value)
+        Check if a value was compressed with the current codec of the column
+
+    load_dictionaries(self, cnx)
+        Load the zstd dictionaries stored in the database
+
+    train_dictionary(self, cnx, column, samples, size)
+        Train a zstd dictionary for a column and store it in the database
+    '''
+
+    # Class constructor
+    def __init__(self, columns: dict[str, str] = None, level=3):
+        '''
+        class constructor
+
+        args:
+        -----
+            columns (dict[str, str]): Codec of each column ('zstd' or 'zlib'). Columns not
+                in the dictionary use zlib. zstd falls back to zlib if zstandard is not installed
+            level (int): Compression level of zstd. Low levels are fast enough for the
+                save path of a crawl; high levels (19) are for offline rewrites
+        '''
+        self.columns = columns or {}
+        self.level = level
+        self.zlib = ZlibCodec()
+        self.loaded = False
+        self.lock = threading.Lock()
+
+        # zstd codecs by dictionary id, used to decompress
+        self.zstd: dict[int, ZstdCodec] = {}
+
+        # Codec used to compress each column
+        self.encoders = {}
+        for column in COMPRESSED_COLUMNS:
+            self.encoders[column] = self.__default_encoder(column)
+
+    # Read the codecs of the columns from the configuration file
+    # level_option is the option of the zstd level: 'level' for the crawls, 'migrate_level' for migrate_compression.py
+    @staticmethod
+    def from_config(path='./config/db/config.ini', level_option='level') -> 'TextCodecs':
+        config = configparser.ConfigParser()
+        config.read(path)
+        fallback = 19 if level_option == 'migrate_level' else 3
+        if not config.has_section('compression'):
+            return TextCodecs(level=fallback)
+
+        section = config['compression']
+        columns = {column: section.get(column) for column in COMPRESSED_COLUMNS if section.get(column)}
+        return TextCodecs(columns, section.getint(level_option, fallback=fallback))
+
+    # Codec of a column before its dictionary is loaded
+    def __default_encoder(self, column):
+        if self.columns.get(column) == 'zstd':
+            if zstandard is not None:
+                return self.__zstd_codec(0)
+            logger.warning("zstd is configured but the zstandard package is not installed, using zlib", extra={'column': column})
+        return self.zlib
+
+    # zstd codec of a dictionary
+    def __zstd_codec(self, dictionary_id, dictionary=None) -> ZstdCodec:
+        codec = self.zstd.get(dictionary_id)
+        if codec is None:
+            codec = ZstdCodec(self.level, dictionary, dictionary_id)
+            self.zstd[dictionary_id] = codec
+        return codec
+
+    # Compress the text of a column
+    def encode(self, column, text: str) -> bytes | None:
+        if text is None:
+            return None
+        return self.encoders[column].compress(text.encode())
+
+    # Check if a value of a column was compressed with the current codec of the column
+    def is_current(self, column, value) -> bool:
+        if value is None:
+            return True
+        if isinstance(value, str) or not value:
+            return False
+
+        encoder = self.encoders[column]
+        if encoder.id == ZSTD:
+            return bytes(value[:5]) == encoder.header
+        return value[0] == encoder.id
+
+    # Decompress a value
+    def decode(self, value) -> str | None:
+        '''
+        Decompress a value of any codec
+
+        args:
+        -----
+            value (bytes | str): Value read from the database. Values written before
+                (zlib + hex) are also accepted, as str or as bytes
+
+        Returns:
+        --------
+            str: The text, or None if the value is None
+        '''
+        if value is None:
+            return None
+
+        if isinstance(value, str):
+            return decompress_text(value)
+
+        codec_id = value[0] if value else None
+        if codec_id == ZLIB:
+            return self.zlib.decompress(value).decode()
+
+        if codec_id == ZSTD:
+            dictionary_id = struct.unpack_from('>I', value, 1)[0]
+            codec = self.zstd.get(dictionary_id)
+            if codec is None:
+                if dictionary_id != 0:
+                    raise KeyError('The zstd dictionary ' + str(dictionary_id) + ' is not loaded (see load_dictionaries)')
+                codec = self.__zstd_codec(0)
+            return codec.decompress(value).decode()
+
+        # Hex value written before, stored as bytes
+        return decompress_text(bytes(value).decode('ascii'))
+
+    # Load the zstd dictionaries stored in the database
+    def load_dictionaries(self, cnx: MySQLConnection):
+        '''
+        Load the zstd dictionaries stored in the database. The last dictionary of
+        each column is used to compress it.
+        '''
+        cursor = cnx.cursor()
+        cursor.execute('SELECT id, column_name, data FROM compression_dictionaries ORDER BY id')
+        rows = cursor.fetchall()
+        cursor.close()
+
+        with self.lock:
+            self.loaded = True
+            if zstandard is None:
+                return
+
+            for dictionary_id, column, data in rows:
+                codec = self.__zstd_codec(dictionary_id, bytes(data))
+                if self.columns.get(column) == 'zstd':
+                    self.encoders[column] = codec
+
+    # Train a zstd dictionary for a column and store it in the database
+    def train_dictionary(self, cnx: MySQLConnection, column, samples: list[str], size=64 * 1024) -> int:
+        '''
+        Train a zstd dictionary with some texts of a column, store it in the
+        database and use it to compress the column from now on
+
+        args:
+        -----
+            cnx (MySQLConnection): Connection to the database
+            column (str): Name of the column
+            samples (list[str]): Texts of the column. Some thousands are enough
+            size (int): Maximum size of the dictionary in bytes
+
+        Returns:
+        --------
+            int: Id of the dictionary
+        '''
+        if zstandard is None:
+            raise ImportError('Training a dictionary requires the zstandard package (pip install zstandard)')
+
+        dictionary = zstandard.train_dictionary(size, [text.encode() for text in samples if text])
+        data = dictionary.as_bytes()
+
+        cursor = cnx.cursor()
+        cursor.execute(
+            'INSERT INTO compression_dictionaries (codec, column_name, data) VALUES (%s, %s, %s)',
+            ('zstd', column, data)
+        )
+        dictionary_id = cursor.lastrowid
+        cnx.commit()
+        cursor.close()
+
+        with self.lock:
+            codec = self.__zstd_codec(dictionary_id, data)
+            if self.columns.get(column) == 'zstd':
+                self.encoders[column] = codec
+
+        return dictionary_id
+
+
+# Codecs of the columns, configured in the [compression] section of config.ini
+text_codecs = TextCodecs.from_config()
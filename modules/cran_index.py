@@ -0,0 +1,244 @@
+import gzip
+import zlib
+import codecs
+from typing import Iterable, Iterator
+from modules.package import Package
+from modules.cran_scraper import PackageScraper
+
+# Class to read CRAN package metadata from the PACKAGES index file
+#
+# CRAN publishes the metadata of every package in a single DCF file
+# (src/contrib/PACKAGES.gz). The file is read and decompressed in chunks and
+# each record is converted to a Package object as soon as it is complete.
+# The HTML page of a package is only requested for the fields that the index
+# does not contain.
+#
+# Usage example:
+# index = PackagesIndex(PackageScraper(RequestHandler()))
+# for package in index.packages():
+#     package = index.complete_package(package)
+#     package.save(cnx)
+#
+# Author: agent <agent@local>
+# Date: 2026-10-17
+# Project: TFG OLIVIA
+
+# URL of the CRAN index
+CRAN_PACKAGES_URL = 'https://cran.r-project.org/src/contrib/PACKAGES.gz'
+
+# Fields of the index used to fill the package data, by key of PackageScraper.get_pkg_data
+INDEX_FIELDS = {
+    'description': ('Description',),
+    'version': ('Version',),
+    'publication_date': ('Published', 'Date/Publication'),
+    'author': ('Author',),
+    'mantainer': ('Maintainer',),
+    'license': ('License',),
+    'requires_compilation': ('NeedsCompilation',),
+    'depends': ('Depends',),
+    'imports': ('Imports',),
+}
+
+# Package attributes that can only be obtained from the HTML page when the index does not have them
+HTML_FIELDS = ('description', 'publication_date', 'authors_data', 'mantainer')
+
+
+# Parse the records of a DCF file
+def parse_dcf(lines: Iterable[str]) -> Iterator[dict[str, str]]:
+    '''
+    Parse the records of a DCF (Debian control file) one by one
+
+    Records are separated by blank lines. Lines that start with a space or a tab
+    continue the value of the previous field.
+
+    args:
+    -----
+        lines (Iterable[str]): Lines of the file
+
+    Returns:
+    --------
+        Iterator[dict[str, str]]: One dictionary for each record
+    '''
+
+    record = {}
+    field = None
+
+    for line in lines:
+        line = line.rstrip('\r\n')
+
+        # A blank line ends the record
+        if not line.strip():
+            if record:
+                yield record
+            record = {}
+            field = None
+
+        # Continuation of the previous field
+        elif line[0] in ' \t':
+            if field is not None:
+                record[field] += '\n' + line.strip()
+
+        # New field
+        else:
+            field, _, value = line.partition(':')
+            field = field.strip()
+            record[field] = value.strip()
+
+    # The last record may not end with a blank line
+    if record:
+        yield record
+
+
+# Split a stream of text chunks in lines
+def _iter_lines(chunks: Iterable[str]) -> Iterator[str]:
+    buffer = ''
+    for chunk in chunks:
+        buffer += chunk
+        lines = buffer.split('\n')
+        buffer = lines.pop()
+        yield from lines
+
+    if buffer:
+        yield buffer
+
+
+# Decompress a stream of gzip or zlib chunks
+def _iter_decompressed(chunks: Iterable[bytes], compressed: bool) -> Iterator[str]:
+
+    # wbits = 32 + MAX_WBITS detects the gzip or zlib header automatically
+    decompressor = zlib.decompressobj(32 + zlib.MAX_WBITS) if compressed else None
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    for chunk in chunks:
+        if decompressor:
+            chunk = decompressor.decompress(chunk)
+        yield decoder.decode(chunk)
+
+    if decompressor:
+        yield decoder.decode(decompressor.flush())
+    yield decoder.decode(b'', final=True)
+
+
+class PackagesIndex:
+    '''
+    Class to read CRAN package metadata from the PACKAGES index file
+
+    methods:
+    --------
+    __init__(self, scraper, source)
+        class constructor
+
+    records(self)
+        Get the records of the index, one by one
+
+    packages(self)
+        Get a Package object for each record of the index
+
+    complete_package(self, package)
+        Fill the fields that are not in the index with the HTML page of the package
+
+    '''
+
+    # Class constructor
+    def __init__(self, scraper: PackageScraper, source: str = CRAN_PACKAGES_URL, chunk_size: int = 64 * 1024) -> None:
+        '''
+        class constructor
+
+        args:
+        -----
+            scraper (PackageScraper): Object used to build the packages and to get the missing fields
+            source (str): URL or local path of the index. Files ending in .gz are decompressed
+            chunk_size (int): Size of the chunks read from the source
+
+        '''
+        self.scraper = scraper
+        self.source = source
+        self.chunk_size = chunk_size
+
+    # Read the source in text chunks
+    def __iter_text(self) -> Iterator[str]:
+
+        compressed = self.source.endswith('.gz')
+
+        # Remote index: the response is downloaded and decompressed in chunks
+        if self.source.startswith(('http://', 'https://')):
+            response = self.scraper.request_handler.do_request(self.source, retry=True, stream=True)
+            try:
+                yield from _iter_decompressed(response.iter_content(self.chunk_size), compressed)
+            finally:
+                response.close()
+
+        # Local index
+        else:
+            opener = gzip.open if compressed else open
+            with opener(self.source, 'rt', encoding='utf-8', errors='replace') as file:
+                while chunk := file.read(self.chunk_size):
+                    yield chunk
+
+    # Get the records of the index
+    def records(self) -> Iterator[dict[str, str]]:
+        '''
+        Get the records of the index, one by one
+
+        Returns:
+        --------
+            Iterator[dict[str, str]]: One dictionary for each package of the index
+        '''
+        return parse_dcf(_iter_lines(self.__iter_text()))
+
+    # Get a Package object for each record of the index
+    def packages(self) -> Iterator[Package]:
+        '''
+        Get a Package object for each record of the index
+
+        Fields that are not in the index (for example, the description in
+        src/contrib/PACKAGES) are left as None. Use complete_package to get them.
+
+        Returns:
+        --------
+            Iterator[Package]: Packages of the index, with their dependencies
+        '''
+        for record in self.records():
+
+            # Records without name can not be saved
+            name = record.get('Package')
+            if not name:
+                continue
+
+            # Map the fields of the index to the keys used by the scraper
+            pkg_data = {}
+            for key, fields in INDEX_FIELDS.items():
+                pkg_data[key] = next((record[f] for f in fields if f in record), None)
+
+            # The publication date may include the time
+            if pkg_data['publication_date']:
+                pkg_data['publication_date'] = pkg_data['publication_date'][:10]
+
+            yield self.scraper.build_package(name, pkg_data)
+
+    # Fill the fields that are not in the index
+    def complete_package(self, package: Package) -> Package:
+        '''
+        Fill the fields that are not in the index with the HTML page of the package
+
+        The page is only requested if some of the fields is missing.
+
+        args:
+        -----
+            package (Package): Package built from the index
+
+        Returns:
+        --------
+            Package: The same package, with the missing fields filled
+        '''
+        missing = [attr for attr in HTML_FIELDS if getattr(package, attr) is None]
+        if not missing:
+            return package
+
+        # Build the package from the HTML page, and copy only the missing fields
+        pkg_data = self.scraper.get_pkg_data(package.name)
+        html_package = self.scraper.build_package(package.name, pkg_data)
+        for attr in missing:
+            setattr(package, attr, getattr(html_package, attr))
+
+        return package
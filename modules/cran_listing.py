@@ -0,0 +1,161 @@
+import codecs
+import time
+from html.parser import HTMLParser
+from typing import Iterable, Iterator
+import requests
+from modules.cran_scraper import CRAN_URL
+from modules.proxy_request import RequestHandler
+from modules.log import logger
+
+# Streaming reader of the list of CRAN packages
+#
+# The page available_packages_by_name.html has a row for every package of CRAN.
+# Instead of building the tree of the whole page, the response is read in
+# chunks and given to a tokenizer, and each name is returned as soon as its row
+# is read. The memory used does not depend on the size of the list.
+#
+# If the connection breaks while the page is read, the page is downloaded
+# again (following the retry policy of the RequestHandler) and the names
+# already returned are skipped.
+#
+# Usage example:
+# for name in package_names(RequestHandler()):
+#     ...
+#
+# Author: agent <agent@local>
+# Date: 2026-10-17
+# Project: TFG OLIVIA
+
+# Path of the list of packages, from the address of CRAN
+LISTING_PATH = '/web/packages/available_packages_by_name.html'
+
+
+# Tokenizer that reads the names of the list
+# The name is the text of the link of the first cell of each row of the first table
+class _ListingTokenizer(HTMLParser):
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+
+        # Names read and not returned yet
+        self.names = []
+
+        # State of the first table
+        self.__in_table = False
+        self.__table_done = False
+        self.__cell = 0
+        self.__buffer = None
+
+    def handle_starttag(self, tag, attrs):
+
+        if tag == 'table' and not self.__table_done:
+            self.__in_table = True
+
+        elif not self.__in_table:
+            return
+
+        elif tag == 'tr':
+            self.__cell = 0
+
+        elif tag == 'td':
+            self.__cell += 1
+
+        elif tag == 'a' and self.__cell == 1 and self.__buffer is None:
+            self.__buffer = []
+
+    def handle_endtag(self, tag):
+
+        if not self.__in_table:
+            return
+
+        if tag == 'a' and self.__buffer is not None:
+            name = ''.join(self.__buffer).strip()
+            if name:
+                self.names.append(name)
+            self.__buffer = None
+
+            # Only the first link of the cell
+            self.__cell = -1
+
+        elif tag == 'table':
+            self.__in_table = False
+            self.__table_done = True
+
+    def handle_data(self, data):
+        if self.__buffer is not None:
+            self.__buffer.append(data)
+
+
+# Read the names of a list of packages given in chunks
+def parse_listing(chunks: Iterable[bytes | str]) -> Iterator[str]:
+    '''
+    Read the names of the packages of available_packages_by_name.html
+
+    args:
+    -----
+        chunks (Iterable[bytes | str]): Parts of the page, in order
+
+    Returns:
+    --------
+        Iterator[str]: Names of the packages, in the order of the page
+    '''
+    tokenizer = _ListingTokenizer()
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    for chunk in chunks:
+        tokenizer.feed(decoder.decode(chunk) if isinstance(chunk, bytes) else chunk)
+        yield from tokenizer.names
+        tokenizer.names.clear()
+
+    tokenizer.feed(decoder.decode(b'', final=True))
+    tokenizer.close()
+    yield from tokenizer.names
+
+
+# Download the list of packages and read the names
+def package_names(request_handler: RequestHandler, base_url: str = CRAN_URL, chunk_size: int = 64 * 1024) -> Iterator[str]:
+    '''
+    Download the list of CRAN packages and get the names, while the page is downloaded
+
+    args:
+    -----
+        request_handler (RequestHandler): Object used to make the request
+        base_url (str): Address of CRAN or of a mirror
+        chunk_size (int): Size of the chunks read from the response
+
+    Returns:
+    --------
+        Iterator[str]: Names of the packages. If the page can not be downloaded,
+        requests.HTTPError is raised. If the reading of the page fails in all the
+        attempts, the last error is raised
+    '''
+    url = base_url.rstrip('/') + LISTING_PATH
+    attempts = request_handler.retry_policy.max_attempts
+
+    # Number of names returned, skipped when the page is read again
+    returned = 0
+
+    for attempt in range(attempts):
+        response = request_handler.do_request(url, retry=True, stream=True)
+        try:
+            response.raise_for_status()
+
+            position = 0
+            for name in parse_listing(response.iter_content(chunk_size)):
+                position += 1
+                if position > returned:
+                    returned = position
+                    yield name
+            return
+
+        # The connection broke while the body was read (do_request only retries the request)
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+            if attempt + 1 >= attempts:
+                raise
+
+            delay = request_handler.retry_policy.delay(attempt)
+            logger.warning("Reading of the package list failed, retrying", extra={'url': url, 'reason': e.__class__.__name__, 'names': returned, 'delay': round(delay, 1), 'attempt': attempt + 1, 'attempts': attempts - 1})
+            time.sleep(delay)
+
+        finally:
+            response.close()
@@ -1,8 +1,10 @@
 import re
-from bs4 import BeautifulSoup
 from modules.package import Package
+from modules.page_parser import parse_pkg_page, PARSERS
 from modules.proxy_request import RequestHandler
 from modules.dependency import Dependency
+from modules.dependency_parser import parse_dependencies
+from modules.metrics import metrics
 
 # Class to obtain CRAN packet data
 #
@@ -15,24 +17,39 @@ from modules.dependency import Dependency
 # Date: 2022-12-23
 # Project: TFG OLIVIA
 
+# Address of CRAN. A mirror (or a local server, see benchmarks/fake_cran.py) can be given instead
+CRAN_URL = 'https://cran.r-project.org'
+
 class PackageScraper:
     '''
     Class to obtain CRAN packet data
 
     methods:
     --------
-    __init__(self, request_handler)
+    __init__(self, request_handler, parser, base_url)
         class constructor   
 
+    fetch_pkg_page(self, pkg_name)
+        Download the page of a CRAN packet, without parsing it
+
     __parse_pkg_data(self, pkg_name)
         Get data from a CRAN packet
 
+    pkg_data_from_page(self, page)
+        Get the package data from the elements of a parsed page
+
     __parse_dependencies(self, dependencies_str)
         Parse dependencies string
 
     get_pkg_data(self, pkg_name)
         Get data from a CRAN packet
 
+    pkg_builder(self, pkg_name)
+        Construct object of class Package from the CRAN page
+
+    build_package(self, pkg_name, pkg_data)
+        Construct object of class Package from a dictionary of package data
+
     get_pkg_dependencies(self, pkg_name)
         Get dependencies from a CRAN packet
 
@@ -42,16 +59,53 @@ class PackageScraper:
     '''
 
     # Class constructor
-    def __init__(self, request_handler: RequestHandler) -> None:
+    def __init__(self, request_handler: RequestHandler, parser: str = 'html.parser', base_url: str = CRAN_URL) -> None:
         '''
         class constructor
 
         args:
         -----
             request_handler (RequestHandler): Object of class RequestHandler
+            parser (str): Backend used to read the package pages ('html.parser', 'lxml' or 'stream')
+            base_url (str): Address of CRAN or of a mirror
 
         '''
+        if parser not in PARSERS:
+            raise ValueError(f"Unknown parser: {parser}. Available parsers: {', '.join(PARSERS)}")
+
         self.request_handler = request_handler
+        self.parser = parser
+        self.base_url = base_url.rstrip('/')
+
+    # Download the page of a CRAN packet
+    def fetch_pkg_page(self, pkg_name) -> tuple[str, str, dict | None]:
+        '''
+        Download the page of a CRAN packet, without parsing it
+
+        args:
+        -----
+            pkg_name (str): Package name
+
+        Returns:
+        --------
+            tuple: URL of the page, its HTML, and the data parsed before if the
+            page has not changed since it was cached (None otherwise)
+
+        '''
+
+        # Make HTTP request to package page
+        url = f'{self.base_url}/package={pkg_name}'
+
+        # Get response content of the page
+        response = self.request_handler.do_request(url, retry=True)
+
+        # If the page has not changed since it was cached, the data parsed before is used
+        page = None
+        cache = self.request_handler.cache
+        if cache is not None and getattr(response, 'from_cache', False):
+            page = cache.get_parsed(url)
+
+        return url, response.text, page
 
     # Get data from a CRAN packet
     def __parse_pkg_data(self, pkg_name) -> dict[str, str]:
@@ -68,6 +122,33 @@ class PackageScraper:
 
         '''
 
+        url, html, page = self.fetch_pkg_page(pkg_name)
+
+        # Parse HTML, reading the summary table once
+        if page is None:
+            with metrics.timer('stage_seconds', stage='parse'):
+                page = parse_pkg_page(html, self.parser)
+            cache = self.request_handler.cache
+            if cache is not None:
+                cache.set_parsed(url, page)
+
+        return self.pkg_data_from_page(page)
+
+    # Get the package data from the elements of a parsed page
+    def pkg_data_from_page(self, page: dict) -> dict[str, str]:
+        '''
+        Get the package data from the elements of a parsed page
+
+        args:
+        -----
+            page (dict): Elements of the page, as returned by page_parser.parse_pkg_page
+
+        Returns:
+        --------
+            dict: Dictionary with the package data
+
+        '''
+
         # Initialize variables to None
         name = None
         description = None
@@ -80,58 +161,42 @@ class PackageScraper:
         depends = None
         imports = None
 
-        # Make HTTP request to package page
-        url = f'https://cran.r-project.org/package={pkg_name}'
-
-        # Get response content of the page
-        response = self.request_handler.do_request(url)
+        fields = page['fields']
 
-        # Parsear HTML
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        
         # Get elements of interest from HTML
-        name = soup.title.text.split(':')[0]
-        description = soup.find('p').text.strip()
+        name = page['title'].split(':')[0]
+        description = page['description'].strip()
         description = description.replace('\n', '')
         description = description.replace('\t', '')
         description = description.replace('   ', '')
 
         # Get optional table data
-        td_version = soup.find('td', text='Version:')
-        if td_version:
-            version = td_version.find_next_sibling('td').text.strip()
+        if 'Version:' in fields:
+            version = fields['Version:'].strip()
             version = version.replace('\n', '')
 
-        td_date = soup.find('td', text='Published:')
-        if td_date:
-            publication_date = td_date.find_next_sibling('td').text.strip()
+        if 'Published:' in fields:
+            publication_date = fields['Published:'].strip()
 
-        td_author = soup.find('td', text='Author:')
-        if td_author:
-            author = td_author.find_next_sibling('td').text.strip()
+        if 'Author:' in fields:
+            author = fields['Author:'].strip()
 
-        td_mantainer = soup.find('td', text='Maintainer:')
-        if td_mantainer:
-            mantainer = td_mantainer.find_next_sibling('td').text.strip()
+        if 'Maintainer:' in fields:
+            mantainer = fields['Maintainer:'].strip()
             mantainer = mantainer.replace(' at ', '@')
 
-        td_license = soup.find('td', text='License:')
-        if td_license:
-            license = td_license.find_next_sibling('td').text.strip()
+        if 'License:' in fields:
+            license = fields['License:'].strip()
 
-        td_compilation = soup.find('td', text='NeedsCompilation:')
-        if td_compilation:
-            requires_compilation = td_compilation.find_next_sibling('td').text.strip()
+        if 'NeedsCompilation:' in fields:
+            requires_compilation = fields['NeedsCompilation:'].strip()
 
-        td_depends = soup.find('td', text='Depends:')
-        if td_depends:
-            depends = td_depends.find_next_sibling('td').text.strip()
+        if 'Depends:' in fields:
+            depends = fields['Depends:'].strip()
             depends = depends.replace('\n', '')
 
-        td_imports = soup.find('td', text='Imports:')
-        if td_imports:
-            imports = td_imports.find_next_sibling('td').text.strip()
+        if 'Imports:' in fields:
+            imports = fields['Imports:'].strip()
             imports = imports.replace('\n', '')
 
         # Build dictionary with package data
@@ -160,22 +225,22 @@ class PackageScraper:
         Returns:
         --------
             
-            list: List of tuples with dependencies and versions
+            list: List of tuples with dependencies and versions (for example ('R', '>= 3.5.0'))
             
         '''
 
-        # Remove unnecessary line breaks, tabs, and spaces
-        patron = r'\S+\s*(?:\(([^\)]*)\))?'
-
-        # Get names and versions of dependencies
-        versiones = re.findall(patron, dependencies_str)
-        nombres = re.split(r'\s*,\s*', dependencies_str)
-        nombres = [re.sub(r'\s*\(.*\)', '', nombre) for nombre in nombres]
-        return list(zip(nombres, versiones))
+        # Get names and version constraints of dependencies in a single pass
+        # (see modules/dependency_parser.py)
+        with metrics.timer('stage_seconds', stage='dependency_parse'):
+            return [(c.name, c.spec) for c in parse_dependencies(dependencies_str)]
 
     # parse authors data from a CRAN packet
     def __sanitize_str(self, s) :
 
+        # Missing fields are kept as None
+        if s is None:
+            return None
+
         # Remove unnecessary line breaks, tabs, and spaces
         s = s.replace('\n', ' ')
         s = s.replace('\t', ' ')
@@ -183,12 +248,47 @@ class PackageScraper:
 
         return s
 
+    # Get data from a CRAN packet
+    def get_pkg_data(self, pkg_name) -> dict[str, str]:
+        '''
+        Get data from a CRAN packet, parsed from its HTML page
+
+        args:
+        -----
+            pkg_name (str): Package name
+
+        Returns:
+        --------
+            dict: Dictionary with the package data
+
+        '''
+        return self.__parse_pkg_data(pkg_name)
+
     # Construct object of class Package
     def pkg_builder(self, pkg_name) -> Package:
 
         # Get package data
         pkg_data = self.__parse_pkg_data(pkg_name)
 
+        return self.build_package(pkg_name, pkg_data)
+
+    # Construct object of class Package from a dictionary of package data
+    def build_package(self, pkg_name, pkg_data: dict[str, str]) -> Package:
+        '''
+        Construct object of class Package from a dictionary of package data
+
+        args:
+        -----
+            pkg_name (str): Package name
+            pkg_data (dict): Package data, with the keys returned by get_pkg_data.
+                Missing fields can be None
+
+        Returns:
+        --------
+            Package: Object of class Package
+
+        '''
+
         # sanitize data
         description_data = self.__sanitize_str(pkg_data['description'])
         version_data = self.__sanitize_str(pkg_data['version'])
@@ -252,7 +352,7 @@ class PackageScraper:
         package.licenses = license_data
         package.requires_compilation = requires_compilation_data
         package.dependencies = depends_list + imports_list
-        package.links.append(f'https://cran.r-project.org/package={pkg_name}')
+        package.links.append(f'{self.base_url}/package={pkg_name}')
         
         # Return package
         return package
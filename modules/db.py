@@ -1,12 +1,25 @@
 import configparser
+import threading
+from contextlib import contextmanager
 from colorama import Fore, Style
-import mysql.connector
+from modules.storage import BACKENDS
+
+# Version of the schema used by the code (last migration of config/db/migrations)
+SCHEMA_VERSION = 3
 
 class DatabaseHandler:
     '''
     Class for connecting to the database
     
     This class implements the Singleton pattern so that only one instance of the class exists.
+
+    The connections are made by the storage backend selected in the [storage] section
+    of the configuration file: a MySQL server (default) or a SQLite file (see
+    modules/storage.py).
+
+    If pool_size is greater than 0 in the [mysql] section, the class keeps a pool
+    of connections instead of a single one. Each thread takes its own connection from
+    the pool, so several threads can use the database at the same time.
     
     Parameters:
     -----------
@@ -17,12 +30,18 @@ class DatabaseHandler:
         
     Attributes:
     ----------
-        cnx (mysql.connector.connection.MySQLConnection): Database connection object
+        backend (MySQLBackend | SQLiteBackend): Storage backend that makes the connections
+        cnx (mysql.connector.connection.MySQLConnection): Database connection object (single connection mode)
+        pool (mysql.connector.pooling.MySQLConnectionPool): Pool of connections (pooled mode)
         
     Methods:
     --------
         __new__ (cls, *args, **kwargs): Method to create a new instance of the class
         __init__ (self, user, password, host, database): Method to initialize the class
+        get_connection (self): Method to get a connection to the database
+        connection (self): Context manager that gets a connection and returns it to the pool
+        execute_query (self, query, params): Method to execute a query in the database
+        schema_version (self): Method to get the last migration applied to the database
         
     Author:
     ------
@@ -73,6 +92,10 @@ class DatabaseHandler:
             database (str): Name of the database
         '''
 
+        # The singleton is only initialized once
+        if getattr(self, '_initialized', False):
+            return
+
         # Configure the database connection
         # ---------------------------------
 
@@ -82,7 +105,9 @@ class DatabaseHandler:
         # Get the values ​​from the configuration file
         try:
             config.read('./config/db/config.ini')
-            mysql_config = config['mysql']
+            backend_name = config.get('storage', 'backend', fallback='mysql')
+            backend_config = dict(config[backend_name]) if config.has_section(backend_name) else {}
+            backend_class = BACKENDS[backend_name]
 
         except Exception as e:
 
@@ -93,14 +118,18 @@ class DatabaseHandler:
             print(Style.RESET_ALL)
             exit(1)
 
+        # Lock to share the single connection between threads
+        self.lock = threading.RLock()
+        self.cnx = None
+        self.pool = None
+
         # Configure the connection to the database
+        # With a pool, the connections are taken from it when they are needed
         try:
-            self.cnx = mysql.connector.connect(
-                user=mysql_config['user'],
-                password=mysql_config['password'],
-                host=mysql_config['host'],
-                database=mysql_config['database']
-            )
+            self.backend = backend_class(backend_config)
+            self.pool = self.backend.pool
+            if self.pool is None:
+                self.cnx = self.backend.connect()
         
         except Exception as e:
                 
@@ -110,15 +139,49 @@ class DatabaseHandler:
                 print("Error: ", e)
                 print(Style.RESET_ALL)
                 exit(1)
-        
+
+        self._initialized = True
 
     def get_connection(self):
         '''
         Method to get the connection to the database
+
+        In pooled mode, a connection of the pool is returned. It must be closed
+        to return it to the pool. If all the connections are in use, it waits
+        for a free one up to pool_timeout seconds.
+        '''
+
+        # Single connection mode
+        if self.pool is None:
+            with self.lock:
+                return self.backend.check(self.cnx)
+
+        # Pooled mode: wait for a free connection
+        return self.backend.check(self.backend.connect())
+
+    @contextmanager
+    def connection(self):
+        '''
+        Context manager that gets a connection to the database
+
+        In pooled mode, the connection is returned to the pool at the end.
+        In single connection mode, the connection is locked for the thread.
+
+        Usage example:
+        with db.connection() as cnx:
+            package.save(cnx)
         '''
 
-        # Return the connection to the database
-        return self.cnx
+        if self.pool is None:
+            with self.lock:
+                yield self.get_connection()
+            return
+
+        cnx = self.get_connection()
+        try:
+            yield cnx
+        finally:
+            cnx.close()
 
     def close_connection(self):
         '''
@@ -126,12 +189,16 @@ class DatabaseHandler:
         '''
 
         # Close the connection to the database
-        self.cnx.close()    
+        if self.cnx is not None:
+            self.cnx.close()
 
     def execute_query(self, query: str, params: tuple = None) -> list[tuple]:
         '''
         Method to execute a query in the database
 
+        Each call uses its own cursor (and, in pooled mode, its own connection),
+        so it can be called from several threads.
+
         Parameters:
         -----------
             query (str): Query to be executed
@@ -142,17 +209,48 @@ class DatabaseHandler:
             list[tuple]: List of tuples with the result of the query
         '''
 
-        # Create a cursor to execute the query
-        cursor = self.cnx.cursor()
+        with self.connection() as cnx:
+
+            # Create a cursor to execute the query
+            cursor = cnx.cursor()
 
-        # Execute the query
-        cursor.execute(query, params)
+            # Execute the query
+            cursor.execute(query, params)
 
-        # Get the result of the query
-        result = cursor.fetchall()
+            # Get the result of the query
+            result = cursor.fetchall()
 
-        # Close the cursor
-        cursor.close()
+            # Close the cursor
+            cursor.close()
 
         # Return the result of the query
-        return result
\ No newline at end of file
+        return result
+
+    def schema_version(self) -> int:
+        '''
+        Method to get the last migration applied to the database
+
+        The migrations of config/db/migrations are recorded in the schema_version
+        table (created by migration 002). A database without the table has only
+        the original schema, version 1.
+
+        Returns:
+        --------
+            int: Version of the schema
+        '''
+
+        with self.connection() as cnx:
+            cursor = cnx.cursor()
+            try:
+                cursor.execute('SELECT MAX(version) FROM schema_version')
+                version = cursor.fetchone()[0]
+
+            # The table does not exist yet
+            except Exception:
+                cnx.rollback()
+                version = None
+
+            finally:
+                cursor.close()
+
+        return version or 1
@@ -1,3 +1,5 @@
+import threading
+from collections import OrderedDict
 from mysql.connector import MySQLConnection
 
 # Class that represents a dependency of a package.
@@ -6,6 +8,88 @@ from mysql.connector import MySQLConnection
 # date: 2022-12-23
 # project: TFG OLIVIA
 
+class DependencyCache:
+    '''
+    Process-wide map from (name, version, type) to the id of the dependency in the database.
+
+    The least recently used entries are evicted when the cache has max_size entries,
+    so the memory used is bounded. An evicted dependency is looked up in the database again.
+
+    methods
+    -------
+    get(self, key)
+        Get the id of a dependency, or None if it is not in the cache.
+
+    put(self, key, id)
+        Store the id of a dependency.
+
+    load(self, cnx: MySQLConnection)
+        Load the dependencies of the database in the cache.
+
+    clear(self)
+        Remove all the entries of the cache.
+
+    '''
+
+    # Class constructor
+    def __init__(self, max_size=500000):
+
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    # Number of entries in the cache
+    def __len__(self):
+        return len(self.entries)
+
+    # Get the id of a dependency
+    def get(self, key):
+
+        with self.lock:
+            id = self.entries.get(key)
+            if id is not None:
+                self.entries.move_to_end(key)
+            return id
+
+    # Store the id of a dependency
+    def put(self, key, id):
+
+        with self.lock:
+            self.entries[key] = id
+            self.entries.move_to_end(key)
+
+            # Evict the least recently used entry
+            if len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    # Load the dependencies of the database in the cache
+    def load(self, cnx: MySQLConnection):
+        '''
+        Load the dependencies of the database in the cache, up to max_size entries.
+
+        parameters
+        ----------
+        cnx : MySQLConnection
+            Connection with the database.
+        '''
+
+        # The newest dependencies are selected, and inserted from the oldest to the newest,
+        # so that the newest ones are the most recently used and the last to be evicted
+        cursor = cnx.cursor()
+        cursor.execute('SELECT id, name, version, type FROM dependencies ORDER BY id DESC LIMIT %s', (self.max_size,))
+
+        for id, name, version, type in reversed(cursor.fetchall()):
+            self.put((name, version, type), id)
+
+        cursor.close()
+
+    # Remove all the entries of the cache
+    def clear(self):
+
+        with self.lock:
+            self.entries.clear()
+
+
 class Dependency:
     '''
     Class that represents a dependency of a package.
@@ -44,8 +128,17 @@ class Dependency:
     dump(self)
         String representation of the Dependency class.
 
+    cache : DependencyCache
+        Ids of the dependencies already in the database, shared by the whole process.
+
     '''
 
+    # Ids of the dependencies already in the database
+    cache = DependencyCache()
+
+    # Fixed attributes, without a dictionary for each object
+    __slots__ = ('id', 'id_pkg', 'name', 'type', 'version')
+
     # Class constructor
     def __init__(self, name, type, id_pkg=None, id=None, version=None):
 
@@ -66,47 +159,58 @@ class Dependency:
             return self.name + ", type: " + self.type
 
     # function to save the dependency in the database
-    def save(self, cnx: MySQLConnection):
+    def save(self, cnx: MySQLConnection, commit=True):
+        '''
+        Save the dependency and its relationship with the package in the database.
 
+        parameters
+        ----------
+        cnx : MySQLConnection
+            Connection with the database.
+
+        commit : bool
+            Commit the changes. If False, the caller commits them (for example, Package.save
+            commits the package and all its dependencies at once) and caches the id.
+        '''
 
         # Create SQL query to insert the dependency into the dependency table
+        # If it already exists (unique key on name, version and type), LAST_INSERT_ID
+        # returns the id of the existing row
         insert_query = '''
             INSERT INTO dependencies (name, version, type)
             VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)
         '''
 
         # Establish connection to the database
         cursor = cnx.cursor(buffered=True)
 
-        # Check if the dependency already exists in the database
-        sql = 'SELECT * FROM dependencies WHERE name = %s AND version = %s AND type = %s'
-        cursor.execute(sql, (self.name, self.version, self.type))
-        dependency = cursor.fetchone()
-
-        # If the dependency already exists, get its identifier
-        if dependency:
-            self.id = dependency[0]
-        # If the dependency does not exist, insert it into the database
-        else:
+        # Look for the dependency in the cache first
+        # Dependencies already seen by this process do not go to the database
+        key = (self.name, self.version, self.type)
+        self.id = Dependency.cache.get(key)
 
-            # Execute query to insert dependency
-            cursor.execute(insert_query, (self.name, self.version, self.type))
-            
-            # Get the identifier of the newly inserted dependency
-            self.id = cursor.lastrowid  
+        # Insert the dependency, or get the id of the existing one
+        if self.id is None:
+            cursor.execute(insert_query, key)
+            self.id = cursor.lastrowid
 
 
         # Create SQL query to insert the relationship into the package_dependency table
         insert_query = '''
             INSERT INTO package_dependency (package_id, dependency_id)
             VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE package_id = package_id
         '''
 
         # Execute query to insert the relationship
         cursor.execute(insert_query, (self.id_pkg, self.id))
 
         # Commit changes to the database
-        cnx.commit()
+        # The id is cached once it is committed
+        if commit:
+            cnx.commit()
+            Dependency.cache.put(key, self.id)
 
         # Close connection to the database
         cursor.close()
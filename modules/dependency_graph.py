@@ -0,0 +1,375 @@
+from collections import OrderedDict
+from mysql.connector import MySQLConnection
+
+# NumPy is optional: it is only needed to build the dependency graph
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# In-memory graph of the dependencies between R packages
+#
+# The whole package_dependency table is read with one query and stored as a
+# compressed sparse row (CSR) adjacency: the packages are numbered with int32
+# indices, the dependencies of node i are indices[indptr[i]:indptr[i + 1]], and
+# the type of each edge (DEP, IMP...) is stored in a parallel uint8 array. The
+# reverse graph is stored in the same way, so both directions are answered
+# without SQL. Dependencies that are not packages of the database (R, base
+# packages...) are also nodes of the graph.
+#
+# The searches are breadth-first, one level at a time with array operations,
+# and their results are memoized.
+#
+# Usage example:
+# graph = DependencyGraph.load(cnx)
+# graph.reverse_dependencies('Rcpp')
+# graph.transitive_dependencies('ggplot2', types=['IMP'])
+# graph.shortest_path('ggplot2', 'rlang')
+#
+# Author: agent <agent@local>
+# Date: 2026-10-17
+# Project: TFG OLIVIA
+
+class DependencyGraph:
+    '''
+    CSR graph of the dependencies between packages
+
+    attributes
+    ----------
+    names : list[str]
+        Name of each node
+    package_ids : np.ndarray
+        Id in the packages table of each node (int32, -1 if the node is not a package)
+    types : list[str]
+        Edge types (the code of an edge is its position in this list)
+
+    methods
+    -------
+    load(cnx)
+        Build the graph from the database
+
+    from_edges(names, sources, targets, edge_types, package_ids)
+        Build the graph from arrays of edges
+
+    dependencies(self, name, types) / reverse_dependencies(self, name, types)
+        Direct dependencies of a package, or packages that depend on it
+
+    transitive_dependencies(self, name, types, reverse)
+        All the packages reachable from a package
+
+    shortest_path(self, source, target, types, reverse)
+        Shortest chain of dependencies between two packages
+
+    memory_usage(self)
+        Bytes used by the arrays of the graph
+    '''
+
+    # Class constructor
+    def __init__(self, names, indptr, indices, edge_types, types, package_ids=None, memo_size=4096):
+        '''
+        class constructor. Use load or from_edges to build the graph
+
+        args:
+        -----
+            names (list[str]): Name of each node
+            indptr (np.ndarray): Start of the edges of each node, and end of the last one
+            indices (np.ndarray): Target node of each edge
+            edge_types (np.ndarray): Type code of each edge
+            types (list[str]): Edge types
+            package_ids (np.ndarray): Id in the packages table of each node
+            memo_size (int): Maximum number of memoized search results
+        '''
+        if np is None:
+            raise ImportError('DependencyGraph requires the numpy package (pip install numpy)')
+
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.types = list(types)
+        self.package_ids = package_ids if package_ids is not None else np.full(len(self.names), -1, dtype=np.int32)
+
+        # Forward graph: dependencies of each node
+        self.indptr = indptr
+        self.indices = indices
+        self.edge_types = edge_types
+
+        # Reverse graph: nodes that depend on each node
+        sources = np.repeat(np.arange(len(self.names), dtype=np.int32), np.diff(indptr))
+        self.rev_indptr, order = DependencyGraph.__csr(indices, len(self.names))
+        self.rev_indices = sources[order]
+        self.rev_edge_types = edge_types[order]
+
+        self.memo_size = memo_size
+        self.memo = OrderedDict()
+
+    # Offsets of a CSR adjacency, and the order that sorts the edges by node
+    @staticmethod
+    def __csr(nodes, num_nodes):
+        order = np.argsort(nodes, kind='stable')
+        indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(nodes, minlength=num_nodes), out=indptr[1:])
+        return indptr, order
+
+    # Build the graph from arrays of edges
+    @staticmethod
+    def from_edges(names, sources, targets, edge_types, types, package_ids=None) -> 'DependencyGraph':
+        '''
+        Build the graph from arrays of edges
+
+        args:
+        -----
+            names (list[str]): Name of each node
+            sources (array): Node that has each dependency
+            targets (array): Node that is the dependency
+            edge_types (array): Type code of each edge (position in types)
+            types (list[str]): Edge types
+            package_ids (array): Id in the packages table of each node
+        '''
+        if np is None:
+            raise ImportError('DependencyGraph requires the numpy package (pip install numpy)')
+
+        sources = np.asarray(sources, dtype=np.int32)
+        targets = np.asarray(targets, dtype=np.int32)
+        edge_types = np.asarray(edge_types, dtype=np.uint8)
+
+        indptr, order = DependencyGraph.__csr(sources, len(names))
+        return DependencyGraph(names, indptr, targets[order], edge_types[order], types, package_ids)
+
+    # Build the graph from the database
+    @staticmethod
+    def load(cnx: MySQLConnection) -> 'DependencyGraph':
+        '''
+        Build the graph from the database, reading all the edges with one query
+
+        args:
+        -----
+            cnx (MySQLConnection): Connection to the database
+        '''
+        if np is None:
+            raise ImportError('DependencyGraph requires the numpy package (pip install numpy)')
+
+        cursor = cnx.cursor()
+
+        # Nodes of the packages
+        cursor.execute('SELECT id, name FROM packages ORDER BY id')
+        names = []
+        index = {}
+        package_ids = []
+        id_index = {}
+        for package_id, name in cursor.fetchall():
+            id_index[package_id] = index[name] = len(names)
+            names.append(name)
+            package_ids.append(package_id)
+
+        # Edges, with the name of the dependency
+        cursor.execute('''
+            SELECT pd.package_id, d.name, d.type
+            FROM package_dependency pd
+            JOIN dependencies d ON d.id = pd.dependency_id
+        ''')
+        rows = cursor.fetchall()
+        cursor.close()
+
+        sources = np.empty(len(rows), dtype=np.int32)
+        targets = np.empty(len(rows), dtype=np.int32)
+        edge_types = np.empty(len(rows), dtype=np.uint8)
+        types = {}
+        for i, (package_id, name, type) in enumerate(rows):
+
+            # The dependencies that are not packages of the database are added as nodes
+            target = index.get(name)
+            if target is None:
+                target = index[name] = len(names)
+                names.append(name)
+                package_ids.append(-1)
+
+            sources[i] = id_index[package_id]
+            targets[i] = target
+            edge_types[i] = types.setdefault(type, len(types))
+
+        return DependencyGraph.from_edges(names, sources, targets, edge_types, list(types), np.array(package_ids, dtype=np.int32))
+
+    # Number of nodes of the graph
+    def __len__(self):
+        return len(self.names)
+
+    # Number of edges of the graph
+    def num_edges(self) -> int:
+        return len(self.indices)
+
+    # Bytes used by the arrays of the graph
+    def memory_usage(self) -> int:
+        arrays = (self.indptr, self.indices, self.edge_types, self.rev_indptr, self.rev_indices, self.rev_edge_types, self.package_ids)
+        return sum(array.nbytes for array in arrays)
+
+    # Node of a package name
+    def __node(self, name) -> int:
+        node = self.index.get(name)
+        if node is None:
+            raise KeyError('Unknown package: ' + str(name))
+        return node
+
+    # Mask of the allowed edge types (None = all)
+    def __type_codes(self, types):
+        if types is None:
+            return None
+        return np.array([self.types.index(t) for t in types if t in self.types], dtype=np.uint8)
+
+    # Key of the edge types in the memo
+    # None (all the types) and [] (no type) give different results, and the order of the types does not matter
+    @staticmethod
+    def __types_key(types):
+        return None if types is None else tuple(sorted(types))
+
+    # Adjacency of a direction
+    def __adjacency(self, reverse):
+        if reverse:
+            return self.rev_indptr, self.rev_indices, self.rev_edge_types
+        return self.indptr, self.indices, self.edge_types
+
+    # Memoized result of a search
+    def __memoized(self, key, search):
+        if key in self.memo:
+            self.memo.move_to_end(key)
+            return self.memo[key]
+
+        result = search()
+        self.memo[key] = result
+        if len(self.memo) > self.memo_size:
+            self.memo.popitem(last=False)
+        return result
+
+    # Edges of a set of nodes: (source, target) of each edge of the allowed types
+    def __expand(self, frontier, reverse, type_codes):
+        indptr, indices, edge_types = self.__adjacency(reverse)
+
+        starts = indptr[frontier]
+        counts = indptr[frontier + 1] - starts
+        total = int(counts.sum())
+        if total == 0:
+            return frontier[:0], frontier[:0]
+
+        # Positions of all the edges of the frontier, without a Python loop
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+        positions = offsets + np.arange(total)
+        sources = np.repeat(frontier, counts)
+        targets = indices[positions]
+
+        if type_codes is not None:
+            mask = np.isin(edge_types[positions], type_codes)
+            sources = sources[mask]
+            targets = targets[mask]
+
+        return sources, targets
+
+    # Direct neighbours of a node
+    def __neighbours(self, name, types, reverse) -> tuple[str, ...]:
+        node = self.__node(name)
+
+        def search():
+            _, targets = self.__expand(np.array([node]), reverse, self.__type_codes(types))
+            return tuple(self.names[i] for i in np.unique(targets))
+
+        return self.__memoized(('neighbours', node, reverse, self.__types_key(types)), search)
+
+    # Direct dependencies of a package
+    def dependencies(self, name, types=None) -> tuple[str, ...]:
+        '''
+        Direct dependencies of a package
+
+        args:
+        -----
+            name (str): Name of the package
+            types (list[str]): Edge types to follow (all by default)
+        '''
+        return self.__neighbours(name, types, False)
+
+    # Packages that depend directly on a package
+    def reverse_dependencies(self, name, types=None) -> tuple[str, ...]:
+        '''
+        Packages that depend directly on a package
+
+        args:
+        -----
+            name (str): Name of the package
+            types (list[str]): Edge types to follow (all by default)
+        '''
+        return self.__neighbours(name, types, True)
+
+    # All the packages reachable from a package
+    def transitive_dependencies(self, name, types=None, reverse=False) -> tuple[str, ...]:
+        '''
+        All the packages reachable from a package (transitive closure)
+
+        args:
+        -----
+            name (str): Name of the package
+            types (list[str]): Edge types to follow (all by default)
+            reverse (bool): Follow the reverse dependencies, to get all the packages
+                affected by a change in the package
+
+        Returns:
+        --------
+            tuple[str, ...]: Names of the packages, without the package itself
+        '''
+        node = self.__node(name)
+
+        def search():
+            type_codes = self.__type_codes(types)
+            visited = np.zeros(len(self.names), dtype=bool)
+            visited[node] = True
+            frontier = np.array([node])
+
+            while len(frontier):
+                _, targets = self.__expand(frontier, reverse, type_codes)
+                frontier = np.unique(targets[~visited[targets]])
+                visited[frontier] = True
+
+            visited[node] = False
+            return tuple(self.names[i] for i in np.flatnonzero(visited))
+
+        return self.__memoized(('closure', node, reverse, self.__types_key(types)), search)
+
+    # Shortest chain of dependencies between two packages
+    def shortest_path(self, source, target, types=None, reverse=False) -> tuple[str, ...] | None:
+        '''
+        Shortest chain of dependencies from a package to another
+
+        args:
+        -----
+            source (str): Name of the first package
+            target (str): Name of the last package
+            types (list[str]): Edge types to follow (all by default)
+            reverse (bool): Follow the reverse dependencies
+
+        Returns:
+        --------
+            tuple[str, ...]: Names of the packages of the path, including source and
+            target, or None if target cannot be reached
+        '''
+        start = self.__node(source)
+        end = self.__node(target)
+
+        def search():
+            type_codes = self.__type_codes(types)
+            parents = np.full(len(self.names), -1, dtype=np.int32)
+            parents[start] = start
+            frontier = np.array([start])
+
+            while len(frontier) and parents[end] < 0:
+                sources, targets = self.__expand(frontier, reverse, type_codes)
+
+                # Keep the first edge that reaches each new node
+                new = parents[targets] < 0
+                targets, first = np.unique(targets[new], return_index=True)
+                parents[targets] = sources[new][first]
+                frontier = targets
+
+            if parents[end] < 0:
+                return None
+
+            path = [end]
+            while path[-1] != start:
+                path.append(int(parents[path[-1]]))
+            return tuple(self.names[i] for i in reversed(path))
+
+        return self.__memoized(('path', start, end, reverse, self.__types_key(types)), search)
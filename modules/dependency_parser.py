@@ -0,0 +1,116 @@
+import re
+from functools import lru_cache
+from typing import Iterable, NamedTuple
+
+# Tokenizer of the dependency fields of R packages (Depends, Imports, LinkingTo...)
+#
+# A field is a comma separated list of package names, each one with an optional
+# version constraint in parentheses:
+#   R (>= 3.5.0), methods, Rcpp(>= 1.0.1),ggplot2 ( > 3.0 )
+#
+# The field is read in a single pass with a precompiled pattern, and each entry
+# is returned as a (name, operator, version) constraint. The operators of the
+# CRAN HTML pages (≥, ≤) are normalized to the ones of the DESCRIPTION files.
+#
+# Usage example:
+# parse_dependencies('R (>= 3.5.0), methods')
+# [DependencyConstraint(name='R', operator='>=', version='3.5.0'),
+#  DependencyConstraint(name='methods', operator='', version='')]
+#
+# Author: agent <agent@local>
+# Date: 2026-10-17
+# Project: TFG OLIVIA
+
+# One entry of the field: name, and optional constraint in parentheses
+_ENTRY_PATTERN = re.compile(
+    r'''
+    (?P<name>[^\s,()]+)                 # package name
+    \s*
+    (?:\(                               # optional constraint
+        \s*(?P<operator>>=|<=|==|!=|>|<|=|≥|≤)?
+        \s*(?P<version>[^()]*?)
+        \s*\)
+    )?
+    [^,]*                               # anything else, up to the next entry
+    ''',
+    re.VERBOSE
+)
+
+# Operators of the HTML pages
+_OPERATORS = {'≥': '>=', '≤': '<=', '=': '=='}
+
+
+class DependencyConstraint(NamedTuple):
+    '''
+    Version constraint of a dependency
+
+    attributes
+    ----------
+    name : str
+        Name of the package
+    operator : str
+        Comparison operator ('>=', '<=', '==', '!=', '>', '<'), or '' if there is no constraint
+    version : str
+        Version of the constraint, or '' if there is no constraint
+    '''
+    name: str
+    operator: str
+    version: str
+
+    # Constraint in the format stored in the database (for example '>= 3.5.0')
+    @property
+    def spec(self) -> str:
+        if self.operator and self.version:
+            return self.operator + ' ' + self.version
+        return self.operator or self.version
+
+
+# Parse a dependency field
+@lru_cache(maxsize=65536)
+def _parse(field: str) -> tuple[DependencyConstraint, ...]:
+
+    constraints = []
+    for match in _ENTRY_PATTERN.finditer(field):
+        operator = match.group('operator') or ''
+        constraints.append(DependencyConstraint(
+            match.group('name'),
+            _OPERATORS.get(operator, operator),
+            match.group('version') or ''
+        ))
+
+    return tuple(constraints)
+
+
+def parse_dependencies(field: str) -> list[DependencyConstraint]:
+    '''
+    Parse a dependency field in a single pass
+
+    Repeated fields (very common in CRAN, like 'R (>= 3.5.0)') are cached.
+
+    args:
+    -----
+        field (str): Value of the field, for example 'R (>= 3.5.0), methods'
+
+    Returns:
+    --------
+        list[DependencyConstraint]: Constraints of the field, in order
+    '''
+    if not field:
+        return []
+    return list(_parse(field))
+
+
+def parse_dependencies_batch(fields: Iterable[str]) -> list[list[DependencyConstraint]]:
+    '''
+    Parse many dependency fields in one call
+
+    args:
+    -----
+        fields (Iterable[str]): Values of the fields. None or empty values give an empty list
+
+    Returns:
+    --------
+        list[list[DependencyConstraint]]: Constraints of each field, in the same order
+    '''
+    parse = _parse
+    return [list(parse(field)) if field else [] for field in fields]
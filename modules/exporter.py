@@ -0,0 +1,238 @@
+import os
+from mysql.connector import MySQLConnection
+from modules.compression import text_codecs
+
+# pyarrow is optional: it is only needed to export the dataset
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pa = None
+
+# Export of the scraped dataset to columnar files
+#
+# Each table is read with an unbuffered cursor in chunks of rows, so the memory
+# used does not depend on the size of the table. Each chunk is converted to an
+# Arrow record batch with typed columns (the compressed texts are decompressed)
+# and appended to the current file of the table. When a file reaches
+# rows_per_file rows, a new one is started:
+#
+#   <directory>/packages/part-00000.parquet
+#   <directory>/dependencies/part-00000.parquet
+#   <directory>/links/part-00000.parquet
+#
+# The Arrow IPC files ('arrow' format) can be memory-mapped by the readers.
+# They are not compressed by default: a compressed IPC file has to be
+# decompressed into memory, so it can not be read zero-copy. The Parquet files
+# are compressed with zstd by default.
+#
+# Usage example:
+# exporter = DatasetExporter(cnx, 'export', file_format='parquet')
+# exporter.export()
+#
+# Author: agent <agent@local>
+# Date: 2026-10-17
+# Project: TFG OLIVIA
+
+FORMATS = ('parquet', 'arrow')
+
+# Compression of each format when compression='default'
+DEFAULT_COMPRESSION = {'parquet': 'zstd', 'arrow': None}
+
+# Query and columns of each exported table
+# The columns of the compressed texts are decompressed
+TABLES = {
+    'packages': {
+        'sql': '''
+            SELECT id, name, description, version, publication_date, requires_compilation,
+                   in_cran, in_bioconductor, mantainer, author_data, license
+            FROM packages ORDER BY id
+        ''',
+        'columns': (
+            ('id', 'int32'), ('name', 'string'), ('description', 'text'), ('version', 'string'),
+            ('publication_date', 'date'), ('requires_compilation', 'bool'), ('in_cran', 'bool'),
+            ('in_bioconductor', 'bool'), ('mantainer', 'string'), ('author_data', 'text'), ('license', 'string'),
+        ),
+    },
+    'dependencies': {
+        'sql': '''
+            SELECT pd.package_id, d.id, d.name, d.version, d.type
+            FROM package_dependency pd
+            JOIN dependencies d ON d.id = pd.dependency_id
+            ORDER BY pd.package_id, pd.dependency_id
+        ''',
+        'columns': (
+            ('package_id', 'int32'), ('dependency_id', 'int32'), ('name', 'string'),
+            ('version', 'string'), ('type', 'string'),
+        ),
+    },
+    'links': {
+        'sql': '''
+            SELECT pl.package_id, l.id, l.url
+            FROM package_link pl
+            JOIN links l ON l.id = pl.url_id
+            ORDER BY pl.package_id, pl.url_id
+        ''',
+        'columns': (
+            ('package_id', 'int32'), ('link_id', 'int32'), ('url', 'string'),
+        ),
+    },
+}
+
+
+class DatasetExporter:
+    '''
+    Export of the tables of the database to Parquet or Arrow IPC files
+
+    methods
+    -------
+    export(self, tables)
+        Export some tables (all by default)
+
+    export_table(self, table)
+        Export a table
+    '''
+
+    # Class constructor
+    def __init__(self, cnx: MySQLConnection, directory, file_format='parquet', chunk_size=50000,
+                 rows_per_file=1000000, compression='default'):
+        '''
+        class constructor
+
+        args:
+        -----
+            cnx (MySQLConnection): Connection to the database
+            directory (str): Output directory. Each table is written in a subdirectory
+            file_format (str): 'parquet' or 'arrow' (Arrow IPC, can be memory-mapped)
+            chunk_size (int): Number of rows read and converted at once
+            rows_per_file (int): Maximum number of rows of each file
+            compression (str): Compression of the files ('zstd', 'lz4', 'snappy'... or None).
+                'default' is zstd for Parquet and None for Arrow IPC, which keeps the files memory-mappable
+        '''
+        if pa is None:
+            raise ImportError('The export requires the pyarrow package (pip install pyarrow)')
+        if file_format not in FORMATS:
+            raise ValueError('Unknown format: ' + str(file_format) + '. Use one of ' + ', '.join(FORMATS))
+
+        self.cnx = cnx
+        self.directory = directory
+        self.file_format = file_format
+        self.chunk_size = chunk_size
+        self.rows_per_file = rows_per_file
+        self.compression = DEFAULT_COMPRESSION[file_format] if compression == 'default' else compression
+
+    # Arrow schema of a table
+    @staticmethod
+    def schema(table) -> 'pa.Schema':
+        types = {
+            'int32': pa.int32(),
+            'string': pa.string(),
+            'text': pa.large_string(),
+            'date': pa.date32(),
+            'bool': pa.bool_(),
+        }
+        return pa.schema([(name, types[kind]) for name, kind in TABLES[table]['columns']])
+
+    # Export some tables
+    def export(self, tables=None) -> dict[str, int]:
+        '''
+        Export some tables
+
+        args:
+        -----
+            tables (Iterable[str]): Names of the tables (all by default)
+
+        Returns:
+        --------
+            dict[str, int]: Number of rows exported of each table
+        '''
+        if not text_codecs.loaded:
+            text_codecs.load_dictionaries(self.cnx)
+
+        return {table: self.export_table(table) for table in (tables or TABLES)}
+
+    # Export a table
+    def export_table(self, table) -> int:
+        '''
+        Export a table to its subdirectory. The files exported before are replaced.
+
+        args:
+        -----
+            table (str): Name of the table (see TABLES)
+
+        Returns:
+        --------
+            int: Number of rows exported
+        '''
+        schema = DatasetExporter.schema(table)
+        columns = TABLES[table]['columns']
+        directory = os.path.join(self.directory, table)
+        os.makedirs(directory, exist_ok=True)
+
+        # Remove the files of a previous export
+        for name in os.listdir(directory):
+            if name.startswith('part-'):
+                os.remove(os.path.join(directory, name))
+
+        # The rows are streamed from the server instead of loaded at once
+        cursor = self.cnx.cursor(buffered=False)
+        cursor.execute(TABLES[table]['sql'])
+
+        writer = None
+        part = 0
+        rows_in_file = 0
+        total = 0
+        try:
+            while True:
+                rows = cursor.fetchmany(self.chunk_size)
+                if not rows:
+                    break
+
+                total += len(rows)
+                while rows:
+                    if writer is None:
+                        writer = self.__open_writer(os.path.join(directory, 'part-' + str(part).zfill(5)), schema)
+                        rows_in_file = 0
+
+                    # The rows that do not fit in the current file go to the next one
+                    batch_rows = rows[:self.rows_per_file - rows_in_file]
+                    rows = rows[len(batch_rows):]
+                    writer.write_batch(self.__record_batch(batch_rows, columns, schema))
+                    rows_in_file += len(batch_rows)
+
+                    # Start a new file when the current one is full
+                    if rows_in_file >= self.rows_per_file:
+                        writer.close()
+                        writer = None
+                        part += 1
+
+        finally:
+            if writer is not None:
+                writer.close()
+            cursor.close()
+
+        return total
+
+    # Open the writer of a file
+    def __open_writer(self, path, schema):
+        if self.file_format == 'parquet':
+            return pa.parquet.ParquetWriter(path + '.parquet', schema, compression=self.compression)
+
+        options = pa.ipc.IpcWriteOptions(compression=self.compression) if self.compression in ('zstd', 'lz4') else None
+        return pa.ipc.new_file(path + '.arrow', schema, options=options)
+
+    # Convert some rows to a record batch
+    def __record_batch(self, rows, columns, schema) -> 'pa.RecordBatch':
+        arrays = []
+        for i, (name, kind) in enumerate(columns):
+            values = [row[i] for row in rows]
+
+            if kind == 'text':
+                values = [text_codecs.decode(value) for value in values]
+            elif kind == 'bool':
+                values = [None if value is None else bool(value) for value in values]
+
+            arrays.append(pa.array(values, schema.field(name).type))
+
+        return pa.RecordBatch.from_arrays(arrays, schema=schema)
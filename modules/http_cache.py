@@ -0,0 +1,287 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Persistent cache of HTTP responses for RequestHandler
+#
+# The bodies are stored compressed in a SQLite file together with their ETag and
+# Last-Modified headers. Fresh entries (younger than the TTL) are returned without
+# any request. Stale entries are revalidated with If-None-Match / If-Modified-Since,
+# and a 304 response reuses the stored body. The least recently used entries are
+# evicted when the stored bodies exceed the maximum size. The size of the stored
+# bodies is read once when the cache is opened and kept up to date in memory, so
+# a write does not scan the file. The access times of the reads are kept in
+# memory and written in batches, so a read does not write the file.
+#
+# The cache can also keep the data parsed from a page, so that a page that has not
+# changed does not need to be parsed again.
+#
+# Usage example:
+# cache = ResponseCache('.cache/http', ttl=24 * 3600)
+# request_handler = RequestHandler(cache=cache)
+#
+# Author: agent <agent@local>
+# Date: 2026-10-17
+# Project: TFG OLIVIA
+
+# Number of reads whose access times are written together
+ACCESS_BATCH_SIZE = 1000
+
+class CacheEntry:
+    '''
+    Response stored in the cache
+
+    attributes
+    ----------
+    url : str
+        URL of the request
+    body : bytes
+        Body of the response, decompressed
+    etag : str
+        ETag header of the response
+    last_modified : str
+        Last-Modified header of the response
+    content_type : str
+        Content-Type header of the response
+    encoding : str
+        Encoding used by requests to decode the body
+    stored_at : float
+        Time when the response was downloaded or revalidated
+    '''
+
+    def __init__(self, url, body, etag, last_modified, content_type, encoding, stored_at):
+        self.url = url
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content_type = content_type
+        self.encoding = encoding
+        self.stored_at = stored_at
+
+    # Conditional headers to revalidate the entry
+    def conditional_headers(self) -> dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    # Build a response object with the stored data
+    def to_response(self) -> requests.Response:
+        response = requests.Response()
+        response.status_code = 200
+        response.url = self.url
+        response._content = self.body
+        response.encoding = self.encoding
+        response.headers = CaseInsensitiveDict()
+        if self.content_type:
+            response.headers['Content-Type'] = self.content_type
+        if self.etag:
+            response.headers['ETag'] = self.etag
+        if self.last_modified:
+            response.headers['Last-Modified'] = self.last_modified
+
+        # Mark the response as not downloaded
+        response.from_cache = True
+        return response
+
+
+class ResponseCache:
+    '''
+    Persistent cache of HTTP responses, keyed by URL
+
+    methods
+    -------
+    get(self, url)
+        Get the stored response of a URL
+
+    is_fresh(self, entry)
+        Check if an entry can be used without revalidating it
+
+    put(self, url, response)
+        Store a response
+
+    refresh(self, url)
+        Mark an entry as revalidated (after a 304 response)
+
+    get_parsed(self, url) / set_parsed(self, url, data)
+        Data parsed from the stored body
+
+    clear(self)
+        Remove all the entries
+
+    close(self)
+        Write the pending access times and close the file
+    '''
+
+    # Class constructor
+    def __init__(self, directory='.cache/http', ttl=24 * 3600, max_size=512 * 1024 * 1024):
+        '''
+        class constructor
+
+        args:
+        -----
+            directory (str): Directory of the cache file
+            ttl (float): Seconds that a response is used without revalidating it
+            max_size (int): Maximum size in bytes of the stored (compressed) bodies
+        '''
+        self.ttl = ttl
+        self.max_size = max_size
+        self.lock = threading.Lock()
+
+        # Access times of the reads not written yet, by URL
+        self.accessed = {}
+
+        os.makedirs(directory, exist_ok=True)
+        self.cnx = sqlite3.connect(os.path.join(directory, 'responses.sqlite3'), check_same_thread=False)
+        self.cnx.execute('PRAGMA journal_mode=WAL')
+        self.cnx.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                content_type TEXT,
+                encoding TEXT,
+                parsed TEXT,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        ''')
+        self.cnx.execute('CREATE INDEX IF NOT EXISTS idx_responses_accessed_at ON responses (accessed_at)')
+        self.cnx.commit()
+
+        # Size in bytes of the stored bodies, updated by each write and eviction
+        self.size = self.cnx.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    # Get the stored response of a URL
+    def get(self, url) -> CacheEntry | None:
+
+        with self.lock:
+            row = self.cnx.execute(
+                'SELECT body, etag, last_modified, content_type, encoding, stored_at FROM responses WHERE url = ?',
+                (url,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            # Record the last access, used to evict the least recently used entries
+            # The access times are written in batches, not in each read
+            self.accessed[url] = time.time()
+            if len(self.accessed) >= ACCESS_BATCH_SIZE:
+                self.__write_accesses()
+                self.cnx.commit()
+
+        body, etag, last_modified, content_type, encoding, stored_at = row
+        return CacheEntry(url, zlib.decompress(body), etag, last_modified, content_type, encoding, stored_at)
+
+    # Check if an entry can be used without revalidating it
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return time.time() - entry.stored_at < self.ttl
+
+    # Store a response
+    def put(self, url, response: requests.Response):
+
+        body = zlib.compress(response.content)
+        now = time.time()
+
+        with self.lock:
+            # The body replaced, if any, no longer counts in the size
+            row = self.cnx.execute('SELECT size FROM responses WHERE url = ?', (url,)).fetchone()
+            if row is not None:
+                self.size -= row[0]
+
+            # The parsed data of the previous body is no longer valid
+            self.cnx.execute(
+                'INSERT OR REPLACE INTO responses (url, body, size, etag, last_modified, content_type, encoding, parsed, stored_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, NULL, ?, ?)',
+                (
+                    url, body, len(body),
+                    response.headers.get('ETag'),
+                    response.headers.get('Last-Modified'),
+                    response.headers.get('Content-Type'),
+                    response.encoding,
+                    now, now
+                )
+            )
+            self.size += len(body)
+            self.accessed.pop(url, None)
+            if self.size > self.max_size:
+                self.__evict()
+            self.cnx.commit()
+
+    # Mark an entry as revalidated
+    def refresh(self, url):
+
+        with self.lock:
+            now = time.time()
+            self.accessed.pop(url, None)
+            self.cnx.execute('UPDATE responses SET stored_at = ?, accessed_at = ? WHERE url = ?', (now, now, url))
+            self.cnx.commit()
+
+    # Get the data parsed from the stored body
+    def get_parsed(self, url) -> dict | None:
+
+        with self.lock:
+            row = self.cnx.execute('SELECT parsed FROM responses WHERE url = ?', (url,)).fetchone()
+
+        if row is None or row[0] is None:
+            return None
+        return json.loads(row[0])
+
+    # Store the data parsed from the stored body
+    def set_parsed(self, url, data: dict):
+
+        with self.lock:
+            self.cnx.execute('UPDATE responses SET parsed = ? WHERE url = ?', (json.dumps(data), url))
+            self.cnx.commit()
+
+    # Remove all the entries
+    def clear(self):
+
+        with self.lock:
+            self.accessed.clear()
+            self.cnx.execute('DELETE FROM responses')
+            self.cnx.commit()
+            self.size = 0
+
+    # Write the pending access times and close the file
+    def close(self):
+
+        with self.lock:
+            self.__write_accesses()
+            self.cnx.commit()
+            self.cnx.close()
+
+    # Write the access times of the reads, in the current transaction
+    def __write_accesses(self):
+
+        if self.accessed:
+            self.cnx.executemany(
+                'UPDATE responses SET accessed_at = ? WHERE url = ?',
+                [(accessed_at, url) for url, accessed_at in self.accessed.items()]
+            )
+            self.accessed.clear()
+
+    # Evict the least recently used entries until the bodies fit in max_size
+    def __evict(self):
+
+        # The order of the entries needs the last accesses
+        self.__write_accesses()
+
+        # The entries are read in order of access until enough bytes are freed
+        evicted = []
+        for url, size in self.cnx.execute('SELECT url, size FROM responses ORDER BY accessed_at'):
+            if self.size <= self.max_size:
+                break
+            evicted.append((url,))
+            self.size -= size
+
+        self.cnx.executemany('DELETE FROM responses WHERE url = ?', evicted)
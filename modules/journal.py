@@ -0,0 +1,228 @@
+import os
+import sqlite3
+import threading
+import time
+
+# Checkpoint journal of a crawl
+#
+# The state of each package (pending, fetched, saved or failed, with the reason)
+# is written to a local SQLite file as soon as it changes. The file uses WAL mode,
+# so a crawl that is killed keeps every state written before, and a new run can
+# resume at once: the list of packages is read from the journal instead of CRAN,
+# and the packages already saved are skipped. A package that failed max_attempts
+# times (for example, one removed from CRAN) is given up: it no longer keeps the
+# journal unfinished, so the next run downloads the list of packages again.
+#
+# Usage example:
+# journal = CrawlJournal('.cache/journal.sqlite3')
+# journal.add_pending(packages)
+# journal.mark('ggplot2', CrawlJournal.SAVED, version='3.4.2')
+# journal.mark('dplyr', CrawlJournal.FAILED, reason='Timeout')
+#
+# Author: agent <agent@local>
+# Date: 2026-10-17
+# Project: TFG OLIVIA
+
+class CrawlJournal:
+    '''
+    Checkpoint journal with the state of each package of a crawl
+
+    methods
+    -------
+    add_pending(self, packages)
+        Add the packages that are not in the journal yet, as pending
+
+    packages(self)
+        Names and versions of the packages of the journal, in the order they were added
+
+    state(self, name)
+        State of a package
+
+    mark(self, name, state, reason, version)
+        Change the state of a package
+
+    mark_many(self, packages, state)
+        Change the state of many packages in one transaction
+
+    unfinished(self)
+        Check if some package of the journal is not saved or given up yet
+
+    given_up(self)
+        Names of the packages that failed max_attempts times
+
+    failed(self)
+        Names and reasons of the packages that failed
+
+    counts(self)
+        Number of packages in each state
+
+    close(self)
+        Close the journal
+    '''
+
+    PENDING = 'pending'
+    FETCHED = 'fetched'
+    SAVED = 'saved'
+    FAILED = 'failed'
+
+    # Class constructor
+    def __init__(self, path='.cache/journal.sqlite3', max_attempts=6):
+        '''
+        class constructor
+
+        args:
+        -----
+            path (str): Path of the journal file. It is created if it does not exist
+            max_attempts (int): Number of failures after which a package is given up
+        '''
+        self.path = path
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.cnx = sqlite3.connect(path, check_same_thread=False)
+        self.cnx.execute('PRAGMA journal_mode=WAL')
+        self.cnx.execute('PRAGMA synchronous=NORMAL')
+        self.cnx.execute('''
+            CREATE TABLE IF NOT EXISTS packages (
+                position INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL UNIQUE,
+                version TEXT,
+                state TEXT NOT NULL,
+                reason TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL
+            )
+        ''')
+        self.cnx.commit()
+
+        # States and failed attempts in memory, to check them without queries
+        self.states = {}
+        self.attempts = {}
+        for name, state, attempts in self.cnx.execute('SELECT name, state, attempts FROM packages'):
+            self.states[name] = state
+            if attempts:
+                self.attempts[name] = attempts
+
+    # Number of packages in the journal
+    def __len__(self):
+        return len(self.states)
+
+    # Add the packages that are not in the journal yet, as pending
+    def add_pending(self, packages):
+        '''
+        Add the packages that are not in the journal yet, as pending.
+        The packages already in the journal keep their state.
+
+        args:
+        -----
+            packages (Iterable[Package]): Packages of the crawl
+        '''
+        now = time.time()
+        with self.lock:
+            rows = [(p.name, p.version, CrawlJournal.PENDING, now) for p in packages if p.name not in self.states]
+            self.cnx.executemany(
+                'INSERT OR IGNORE INTO packages (name, version, state, updated_at) VALUES (?, ?, ?, ?)', rows
+            )
+            self.cnx.commit()
+
+            for name, _, state, _ in rows:
+                self.states[name] = state
+
+    # Names and versions of the packages of the journal, in order
+    def packages(self) -> list[tuple[str, str]]:
+        with self.lock:
+            return self.cnx.execute('SELECT name, version FROM packages ORDER BY position').fetchall()
+
+    # State of a package (None if it is not in the journal)
+    def state(self, name) -> str | None:
+        return self.states.get(name)
+
+    # Change the state of a package
+    def mark(self, name, state, reason=None, version=None):
+        '''
+        Change the state of a package. The change is written at once.
+
+        args:
+        -----
+            name (str): Name of the package
+            state (str): New state (PENDING, FETCHED, SAVED or FAILED)
+            reason (str): Reason of the failure, if the state is FAILED
+            version (str): Version of the package, if it is known
+        '''
+        failed = 1 if state == CrawlJournal.FAILED else 0
+        now = time.time()
+
+        with self.lock:
+            self.cnx.execute(
+                'INSERT INTO packages (name, version, state, reason, attempts, updated_at) VALUES (?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (name) DO UPDATE SET state = excluded.state, reason = excluded.reason, '
+                'version = COALESCE(excluded.version, version), attempts = attempts + excluded.attempts, '
+                'updated_at = excluded.updated_at',
+                (name, version, state, reason, failed, now)
+            )
+            self.cnx.commit()
+            self.states[name] = state
+            if failed:
+                self.attempts[name] = self.attempts.get(name, 0) + 1
+
+    # Change the state of many packages in one transaction
+    def mark_many(self, packages, state):
+        '''
+        Change the state of many packages in one transaction
+
+        args:
+        -----
+            packages (Iterable[tuple[str, str]]): Names and versions of the packages
+            state (str): New state (PENDING, FETCHED or SAVED)
+        '''
+        now = time.time()
+        rows = [(name, version, state, now) for name, version in packages]
+
+        with self.lock:
+            self.cnx.executemany(
+                'INSERT INTO packages (name, version, state, updated_at) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (name) DO UPDATE SET state = excluded.state, reason = NULL, '
+                'version = COALESCE(excluded.version, version), updated_at = excluded.updated_at',
+                rows
+            )
+            self.cnx.commit()
+            for name, _, _, _ in rows:
+                self.states[name] = state
+
+    # Check if a failed package has used all its attempts
+    def __is_given_up(self, name, state) -> bool:
+        return state == CrawlJournal.FAILED and self.attempts.get(name, 0) >= self.max_attempts
+
+    # Check if some package of the journal is not saved or given up yet
+    def unfinished(self) -> bool:
+        return any(
+            state != CrawlJournal.SAVED and not self.__is_given_up(name, state)
+            for name, state in self.states.items()
+        )
+
+    # Names of the packages that failed max_attempts times
+    def given_up(self) -> list[str]:
+        return [name for name, state in self.states.items() if self.__is_given_up(name, state)]
+
+    # Names and reasons of the packages that failed
+    def failed(self) -> list[tuple[str, str]]:
+        with self.lock:
+            return self.cnx.execute(
+                'SELECT name, reason FROM packages WHERE state = ? ORDER BY position', (CrawlJournal.FAILED,)
+            ).fetchall()
+
+    # Number of packages in each state
+    def counts(self) -> dict[str, int]:
+        counts = {}
+        for state in self.states.values():
+            counts[state] = counts.get(state, 0) + 1
+        return counts
+
+    # Close the journal
+    def close(self):
+        with self.lock:
+            self.cnx.close()
@@ -0,0 +1,254 @@
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from colorama import Fore, Style
+
+# Structured, non-blocking logging of the crawl
+#
+# The messages are sent with the standard logging module to a bounded queue and
+# written by a background thread, so a slow terminal or log driver never slows
+# down the crawl. If the queue is full, the message is dropped instead of waiting.
+# The messages can be written to the console (colored, with their level) and to
+# a file as JSON lines, with the fields passed in `extra`:
+#   logger.info('Package saved', extra={'package': 'ggplot2'})
+#   {"time": "...", "level": "INFO", "logger": "r_scraper", "message": "Package saved", "package": "ggplot2"}
+#
+# ProgressDisplay keeps a single line at the bottom of the console with the
+# progress of the crawl, redrawn a few times per second by its own thread.
+#
+# Usage example:
+# listener = setup_logging('INFO', json_file='crawl.log')
+# progress = ProgressDisplay(total=20000)
+# progress.start()
+# ...
+# progress.stop()
+# listener.stop()
+#
+# Author: agent <agent@local>
+# Date: 2026-10-17
+# Project: TFG OLIVIA
+
+# Logger of the project
+logger = logging.getLogger('r_scraper')
+
+# Lock of the console, shared by the log messages and the progress line
+_console_lock = threading.Lock()
+
+# Attributes of every log record, not written as extra fields
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    '''
+    Formats each record as a JSON line, with the fields passed in `extra`
+    '''
+
+    def format(self, record):
+        entry = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(record.created)) + '.%03d' % record.msecs,
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class ConsoleFormatter(logging.Formatter):
+    '''
+    Formats each record as a colored line, with the fields passed in `extra`
+    '''
+
+    COLORS = {
+        logging.DEBUG: Fore.BLUE,
+        logging.INFO: Fore.GREEN,
+        logging.WARNING: Fore.YELLOW,
+        logging.ERROR: Fore.RED,
+        logging.CRITICAL: Fore.RED,
+    }
+
+    def format(self, record):
+        fields = ' '.join(key + '=' + str(value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES)
+        message = record.getMessage() + (' (' + fields + ')' if fields else '')
+        if record.exc_info:
+            message += '\n' + self.formatException(record.exc_info)
+        return self.COLORS.get(record.levelno, '') + record.levelname + ' ' + message + Style.RESET_ALL
+
+
+class ConsoleHandler(logging.StreamHandler):
+    '''
+    Writes the records to the console, above the progress line
+    '''
+
+    def emit(self, record):
+        with _console_lock:
+            # Clear the progress line, it is drawn again by its thread
+            if ProgressDisplay.active:
+                self.stream.write('\r\033[K')
+            super().emit(record)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    '''
+    Sends the records to a bounded queue. If the queue is full, the record is
+    dropped instead of blocking the thread that logs it.
+    '''
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(level='INFO', json_file=None, console=True, queue_size=10000) -> logging.handlers.QueueListener:
+    '''
+    Configure the logger of the project
+
+    args:
+    -----
+        level (str): Minimum level of the messages (DEBUG, INFO, WARNING, ERROR)
+        json_file (str): File where the messages are written as JSON lines, with all the levels
+        console (bool): Write the messages to the console
+        queue_size (int): Maximum number of messages waiting to be written
+
+    Returns:
+    --------
+        QueueListener: Thread that writes the messages. Call stop() at the end to write the last ones
+    '''
+    handlers = []
+
+    if console:
+        console_handler = ConsoleHandler(sys.stdout)
+        console_handler.setLevel(level)
+        console_handler.setFormatter(ConsoleFormatter())
+        handlers.append(console_handler)
+
+    if json_file:
+        file_handler = logging.FileHandler(json_file, encoding='utf-8')
+        file_handler.setLevel(logging.DEBUG)
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+
+    # The records are only created for the levels that are written
+    levels = [handler.level for handler in handlers]
+    logger.setLevel(min(levels) if levels else logging.CRITICAL)
+    logger.propagate = False
+
+    log_queue = queue.Queue(queue_size)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.addHandler(DroppingQueueHandler(log_queue))
+
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+class ProgressDisplay:
+    '''
+    Single line with the progress of the crawl, redrawn by a background thread
+
+    methods
+    -------
+    update(self, saved, new, failed, skipped)
+        Add packages to the counters (it only updates numbers, it does not write)
+
+    start(self) / stop(self)
+        Start or stop the thread that draws the line
+    '''
+
+    # True while a progress line is on the console
+    active = False
+
+    def __init__(self, total, done=0, interval=0.5, stream=None):
+        '''
+        class constructor
+
+        args:
+        -----
+            total (int): Number of packages of the crawl
+            done (int): Packages already in the database before the crawl
+            interval (float): Seconds between two redraws of the line
+            stream: Console where the line is written (stdout by default)
+        '''
+        self.total = total
+        self.done = done
+        self.saved = 0
+        self.new = 0
+        self.failed = 0
+        self.skipped = 0
+        self.interval = interval
+        self.stream = stream or sys.stdout
+        self.started_at = time.monotonic()
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    # Add packages to the counters
+    # saved counts all the packages written, new only the ones that were not in the database
+    # failed counts the packages that are failing now: a package saved in a retry is subtracted with failed=-1
+    def update(self, saved=0, new=0, failed=0, skipped=0):
+        with self.lock:
+            self.saved += saved
+            self.new += new
+            self.failed += failed
+            self.skipped += skipped
+
+    # Text of the line
+    def line(self) -> str:
+        with self.lock:
+            saved, new, failed, skipped = self.saved, self.new, self.failed, self.skipped
+
+        elapsed = max(time.monotonic() - self.started_at, 1e-9)
+        rate = saved / elapsed
+        in_db = self.done + new
+        percent = in_db / self.total * 100 if self.total else 100.0
+        remaining = self.total - in_db
+        eta = time.strftime('%H:%M:%S', time.gmtime(remaining / rate)) if rate > 0 and remaining > 0 else '--:--:--'
+
+        return (f"Saved {in_db}/{self.total} ({percent:.2f}%) | {rate:.1f} pkg/s | "
+                f"failed {failed} | skipped {skipped} | ETA {eta}")
+
+    # Draw the line
+    def draw(self):
+        with _console_lock:
+            self.stream.write('\r\033[K' + self.line())
+            self.stream.flush()
+
+    # Start the thread that draws the line
+    def start(self):
+        def run():
+            while not self.stop_event.wait(self.interval):
+                self.draw()
+
+        ProgressDisplay.active = True
+        self.started_at = time.monotonic()
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=run, name='progress', daemon=True)
+        self.thread.start()
+
+    # Stop the thread and leave the last line on the console
+    def stop(self):
+        if self.thread is None:
+            return
+        self.stop_event.set()
+        self.thread.join()
+        self.thread = None
+        self.draw()
+        with _console_lock:
+            self.stream.write('\n')
+            self.stream.flush()
+        ProgressDisplay.active = False
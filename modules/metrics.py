@@ -0,0 +1,364 @@
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Metrics of the crawl
+#
+# Counters and latency histograms of each stage of the crawl (fetch, parse,
+# dependency parse, database save), of the cache, of the retries and of the
+# proxies. They are kept in memory with a small cost per observation, and can be
+# read in two ways:
+#   MetricsServer   HTTP endpoint on localhost, in Prometheus text format (/metrics)
+#                   and in JSON (/stats)
+#   SnapshotWriter  JSON file rewritten every few seconds
+#
+# Usage example:
+# with metrics.timer('stage_seconds', stage='fetch'):
+#     ...
+# metrics.counter('retries_total').inc()
+# MetricsServer(metrics, 9100).start()
+#
+# Author: agent <agent@local>
+# Date: 2026-10-17
+# Project: TFG OLIVIA
+
+class Counter:
+    '''
+    Counter that only goes up
+    '''
+
+    def __init__(self):
+        self.value = 0
+        self.lock = threading.Lock()
+
+    # Add to the counter
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    # Raw state, to merge it in another process
+    def state(self):
+        return self.value
+
+    def merge(self, value):
+        self.inc(value)
+
+    def reset(self):
+        with self.lock:
+            self.value = 0
+
+
+class Histogram:
+    '''
+    Histogram of durations in seconds, with fixed buckets
+    '''
+
+    BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self, buckets=None):
+        self.buckets = tuple(buckets or Histogram.BUCKETS)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    # Add an observation
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    # Estimate a quantile (0 to 1) from the buckets
+    def quantile(self, q) -> float | None:
+        with self.lock:
+            counts = list(self.counts)
+            count = self.count
+        if count == 0:
+            return None
+
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if seen + bucket_count >= rank and bucket_count > 0:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+    # Raw state, to merge it in another process
+    def state(self):
+        with self.lock:
+            return list(self.counts), self.sum, self.count
+
+    def merge(self, state):
+        counts, total, count = state
+        with self.lock:
+            for index, value in enumerate(counts):
+                self.counts[index] += value
+            self.sum += total
+            self.count += count
+
+    def reset(self):
+        with self.lock:
+            self.counts = [0] * (len(self.buckets) + 1)
+            self.sum = 0.0
+            self.count = 0
+
+
+class MetricsRegistry:
+    '''
+    Counters and histograms of the crawl, by name and labels
+
+    methods
+    -------
+    counter(self, name, **labels)
+        Get (or create) a counter
+
+    histogram(self, name, buckets, **labels)
+        Get (or create) a histogram
+
+    timer(self, name, **labels)
+        Context manager that observes its duration in a histogram
+
+    snapshot(self)
+        Values of all the metrics, as a dictionary
+
+    prometheus(self)
+        Values of all the metrics, in Prometheus text format
+
+    drain(self) / merge(self, state)
+        Move the metrics of a worker process to the main process
+    '''
+
+    # Help of the metrics of the crawl
+    HELP = {
+        'stage_seconds': 'Duration of each stage of the crawl',
+        'cache_total': 'Requests answered by the HTTP cache',
+        'retries_total': 'Requests retried',
+        'proxy_switches_total': 'Requests made with a different proxy than the previous one',
+        'packages_total': 'Packages processed, by result',
+    }
+
+    def __init__(self, prefix='r_scraper'):
+        self.prefix = prefix
+        self.metrics = {}
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+
+    # Get (or create) a metric
+    def __get(self, kind, name, labels, factory):
+        key = (name, tuple(sorted(labels.items())))
+        metric = self.metrics.get(key)
+        if metric is None:
+            with self.lock:
+                metric = self.metrics.get(key)
+                if metric is None:
+                    metric = self.metrics[key] = (kind, factory())
+        return metric[1]
+
+    # Get (or create) a counter
+    def counter(self, name, **labels) -> Counter:
+        return self.__get('counter', name, labels, Counter)
+
+    # Get (or create) a histogram
+    def histogram(self, name, buckets=None, **labels) -> Histogram:
+        return self.__get('histogram', name, labels, lambda: Histogram(buckets))
+
+    # Observe the duration of a block in a histogram
+    @contextmanager
+    def timer(self, name, **labels):
+        histogram = self.histogram(name, **labels)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            histogram.observe(time.perf_counter() - start)
+
+    # Items of the registry, sorted by name and labels
+    def __items(self):
+        with self.lock:
+            return sorted(self.metrics.items())
+
+    # Values of all the metrics
+    def snapshot(self) -> dict:
+        '''
+        Values of all the metrics, as a dictionary that can be written as JSON.
+        The histograms include their count, mean and estimated p50, p90 and p99.
+        '''
+        snapshot = {'time': time.time(), 'uptime': time.time() - self.started_at, 'metrics': []}
+
+        for (name, labels), (kind, metric) in self.__items():
+            entry = {'name': name, 'labels': dict(labels), 'type': kind}
+            if kind == 'counter':
+                entry['value'] = metric.value
+            else:
+                counts, total, count = metric.state()
+                entry['count'] = count
+                entry['sum'] = total
+                entry['mean'] = total / count if count else None
+                for q in (0.5, 0.9, 0.99):
+                    entry['p' + str(int(q * 100))] = metric.quantile(q)
+            snapshot['metrics'].append(entry)
+
+        return snapshot
+
+    # Values of all the metrics, in Prometheus text format
+    def prometheus(self) -> str:
+        lines = []
+        described = set()
+
+        for (name, labels), (kind, metric) in self.__items():
+            full_name = self.prefix + '_' + name
+            if full_name not in described:
+                described.add(full_name)
+                lines.append('# HELP ' + full_name + ' ' + MetricsRegistry.HELP.get(name, name))
+                lines.append('# TYPE ' + full_name + ' ' + kind)
+
+            if kind == 'counter':
+                lines.append(full_name + MetricsRegistry.__labels(labels) + ' ' + str(metric.value))
+                continue
+
+            counts, total, count = metric.state()
+            cumulative = 0
+            for bucket, bucket_count in zip(metric.buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                lines.append(full_name + '_bucket' + MetricsRegistry.__labels(labels + (('le', str(bucket)),)) + ' ' + str(cumulative))
+            lines.append(full_name + '_sum' + MetricsRegistry.__labels(labels) + ' ' + repr(total))
+            lines.append(full_name + '_count' + MetricsRegistry.__labels(labels) + ' ' + str(count))
+
+        return '\n'.join(lines) + '\n'
+
+    # Labels in Prometheus format
+    @staticmethod
+    def __labels(labels) -> str:
+        if not labels:
+            return ''
+        return '{' + ','.join(key + '="' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"' for key, value in labels) + '}'
+
+    # Take the values of all the metrics and reset them
+    def drain(self) -> list:
+        '''
+        Take the values of all the metrics and reset them. Used in the worker
+        processes, that send them to the main process with merge.
+        '''
+        state = []
+        for (name, labels), (kind, metric) in self.__items():
+            state.append((kind, name, labels, metric.state()))
+            metric.reset()
+        return state
+
+    # Add the values taken from another registry with drain
+    def merge(self, state: list):
+        for kind, name, labels, values in state:
+            labels = dict(labels)
+            metric = self.counter(name, **labels) if kind == 'counter' else self.histogram(name, **labels)
+            metric.merge(values)
+
+
+class MetricsServer:
+    '''
+    HTTP endpoint with the metrics: /metrics (Prometheus text format) and /stats (JSON).
+    It only listens on localhost by default.
+    '''
+
+    def __init__(self, registry: MetricsRegistry, port=9100, host='127.0.0.1'):
+        self.registry = registry
+        self.port = port
+        self.host = host
+        self.server = None
+        self.thread = None
+
+    # Start the server in a background thread
+    def start(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith('/metrics'):
+                    body = registry.prometheus().encode()
+                    content_type = 'text/plain; version=0.0.4'
+                elif self.path.startswith('/stats'):
+                    body = json.dumps(registry.snapshot()).encode()
+                    content_type = 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            # The requests are not written to the console
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name='metrics-server', daemon=True)
+        self.thread.start()
+
+    # Stop the server
+    def stop(self):
+        if self.server is None:
+            return
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.server = None
+
+
+class SnapshotWriter:
+    '''
+    Writes the metrics to a JSON file every few seconds. The file is replaced
+    atomically, so a reader never sees it half written.
+    '''
+
+    def __init__(self, registry: MetricsRegistry, path, interval=10):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    # Write the metrics now
+    def write(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        temporary = self.path + '.tmp'
+        with open(temporary, 'w') as file:
+            json.dump(self.registry.snapshot(), file, indent=2)
+        os.replace(temporary, self.path)
+
+    # Start writing the metrics in a background thread
+    def start(self):
+        def run():
+            while not self.stop_event.wait(self.interval):
+                self.write()
+
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=run, name='metrics-snapshot', daemon=True)
+        self.thread.start()
+
+    # Stop the thread and write the last values
+    def stop(self):
+        if self.thread is None:
+            return
+        self.stop_event.set()
+        self.thread.join()
+        self.thread = None
+        self.write()
+
+
+# Metrics of the process
+metrics = MetricsRegistry()
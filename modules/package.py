@@ -1,6 +1,6 @@
 from mysql.connector import MySQLConnection
 from modules.dependency import Dependency
-from modules.compression import compress_text, decompress_text
+from modules.compression import text_codecs
 
 
 # Class to store CRAN packet data
@@ -10,6 +10,14 @@ from modules.compression import compress_text, decompress_text
 # Project: TFG OLIVIA
 
 class Package:
+
+    # Fixed attributes, without a dictionary for each object, so that the list of
+    # all the packages of CRAN takes little memory
+    # save_result is the result of the save made by a worker thread (see tool.py)
+    __slots__ = (
+        'id', 'name', 'description', 'version', 'publication_date', 'mantainer', 'authors_data', 'licenses',
+        'requires_compilation', 'in_cran', 'in_bioc', '_dependencies', '_links', '_batch', 'save_result',
+    )
     
     # Constructor
     def __init__(self, name):
@@ -21,12 +29,46 @@ class Package:
         self.publication_date = None
         self.mantainer = None
         self.authors_data = None
-        self.dependencies : list[Dependency] = []
         self.licenses = None
         self.requires_compilation = None
         self.in_cran = True
         self.in_bioc = None
-        self.links = []
+
+        # Dependencies and links. They are None until they are used: then the
+        # lists are created, or loaded for the whole batch in the packages
+        # loaded with get_packages
+        self._dependencies : list[Dependency] = None
+        self._links : list[str] = None
+        self._batch = None
+        self.save_result = None
+
+    # Dependencies of the package
+    @property
+    def dependencies(self) -> list[Dependency]:
+        if self._dependencies is None:
+            if self._batch is None:
+                self._dependencies = []
+            else:
+                self._batch.load_dependencies()
+        return self._dependencies
+
+    @dependencies.setter
+    def dependencies(self, dependencies: list[Dependency]):
+        self._dependencies = dependencies
+
+    # Links of the package
+    @property
+    def links(self) -> list[str]:
+        if self._links is None:
+            if self._batch is None:
+                self._links = []
+            else:
+                self._batch.load_links()
+        return self._links
+
+    @links.setter
+    def links(self, links: list[str]):
+        self._links = links
 
     # Makes a representation of the object in a readable form
     def __str__(self):
@@ -85,6 +127,10 @@ class Package:
     # Build the object from the information in the database
     def get_package(self, cnx: MySQLConnection):
 
+        # The texts may be compressed with dictionaries stored in the database
+        if not text_codecs.loaded:
+            text_codecs.load_dictionaries(cnx)
+
         # Create cursor
         cursor = cnx.cursor(buffered=True)
 
@@ -96,33 +142,7 @@ class Package:
         try:
 
             # Get package information
-            self.id = pkg[0]
-            # self.name = pkg[1]
-            self.description = decompress_text(pkg[2])
-            self.version = pkg[3]
-            self.publication_date = pkg[4]
-
-            # requires_compilation is a boolean
-            if pkg[5] == 1:
-                self.requires_compilation = True
-            else:
-                self.requires_compilation = False
-            
-            # in cran is a boolean
-            if pkg[6] == 1:
-                self.in_cran = True
-            else:
-                self.in_cran = False
-
-            # in bioconductor is a boolean
-            if pkg[7] == 1:
-                self.in_bioc = True
-            else:
-                self.in_bioc = False
-
-            self.mantainer = pkg[8]
-            self.authors_data = decompress_text(pkg[9])
-            self.licenses = pkg[10]
+            self.__set_fields(pkg)
 
             # Get the package dependencies
             self.__pkg_dependencies_db(cnx)
@@ -142,6 +162,142 @@ class Package:
         else:
             return False
 
+
+    # Set the fields of the package from a row of the packages table
+    def __set_fields(self, pkg):
+
+        self.id = pkg[0]
+        # self.name = pkg[1]
+        self.description = text_codecs.decode(pkg[2])
+        self.version = pkg[3]
+        self.publication_date = pkg[4]
+
+        # requires_compilation is a boolean
+        if pkg[5] == 1:
+            self.requires_compilation = True
+        else:
+            self.requires_compilation = False
+
+        # in cran is a boolean
+        if pkg[6] == 1:
+            self.in_cran = True
+        else:
+            self.in_cran = False
+
+        # in bioconductor is a boolean
+        if pkg[7] == 1:
+            self.in_bioc = True
+        else:
+            self.in_bioc = False
+
+        self.mantainer = pkg[8]
+        self.authors_data = text_codecs.decode(pkg[9])
+        self.licenses = pkg[10]
+
+    # Load many packages from the database
+    @staticmethod
+    def get_packages(cnx: MySQLConnection, names=None, chunk_size=1000) -> list['Package']:
+        '''
+        Load many packages from the database with a few queries
+
+        The dependencies and links are not loaded at once: the first time that
+        they are used in one of the packages, they are loaded for all the
+        packages of the call with one JOIN query, so the connection must stay
+        open until then.
+
+        Parameters
+        ----------
+        cnx : MySQLConnection
+            Connection to the database
+        names : Iterable[str]
+            Names of the packages. If None, all the packages are loaded
+        chunk_size : int
+            Maximum number of names in each query
+
+        Returns
+        -------
+        list[Package]
+            Packages found, in the order of names (or of their id, if names is None)
+        '''
+
+        # The texts may be compressed with dictionaries stored in the database
+        if not text_codecs.loaded:
+            text_codecs.load_dictionaries(cnx)
+
+        sql = 'SELECT ' + _PACKAGE_COLUMNS + ' FROM packages'
+        cursor = cnx.cursor()
+        rows = []
+
+        if names is None:
+            cursor.execute(sql + ' ORDER BY id')
+            rows = cursor.fetchall()
+        else:
+            names = list(dict.fromkeys(names))
+            for start in range(0, len(names), chunk_size):
+                chunk = names[start:start + chunk_size]
+                cursor.execute(sql + ' WHERE name IN (' + ', '.join(['%s'] * len(chunk)) + ')', chunk)
+                rows.extend(cursor.fetchall())
+
+        cursor.close()
+
+        packages = {}
+        batch = _PackageBatch(cnx, chunk_size)
+        for row in rows:
+            p = Package(row[1])
+            p.__set_fields(row)
+            batch.add(p)
+            packages[p.name] = p
+
+        if names is None:
+            return list(packages.values())
+        return [packages[name] for name in names if name in packages]
+
+    # Check if the package is in the database, without loading it
+    def exists(self, cnx: MySQLConnection) -> bool:
+        '''
+        Check if the package is in the database, without loading it
+
+        Parameters
+        ----------
+        cnx : MySQLConnection
+            Connection to the database
+
+        Returns
+        -------
+        bool
+            True if there is a package with the same name in the database
+        '''
+
+        cursor = cnx.cursor(buffered=True)
+        cursor.execute('SELECT 1 FROM packages WHERE name = %s LIMIT 1', (self.name,))
+        pkg = cursor.fetchone()
+        cursor.close()
+
+        return pkg is not None
+
+    # Get the names and versions of all the packages in the database
+    @staticmethod
+    def get_saved_packages(cnx: MySQLConnection) -> dict[str, str]:
+        '''
+        Get the names and versions of all the packages in the database with one query
+
+        Parameters
+        ----------
+        cnx : MySQLConnection
+            Connection to the database
+
+        Returns
+        -------
+        dict[str, str]
+            Dictionary with the version of each saved package, by name
+        '''
+
+        cursor = cnx.cursor()
+        cursor.execute('SELECT name, version FROM packages')
+        saved = {name: version for name, version in cursor.fetchall()}
+        cursor.close()
+
+        return saved
     
     # Save to database
     def save(self, cnx: MySQLConnection):
@@ -168,17 +324,32 @@ class Package:
             # -------------------------
 
             # Create SQL statement to insert the package into the table
-            sql = 'INSERT INTO packages (name, description, version, publication_date, requires_compilation, in_cran, in_bioconductor, mantainer, author_data, license) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)'
+            # If a package with the same name exists, its data is updated and LAST_INSERT_ID returns its id
+            sql = '''
+                INSERT INTO packages (name, description, version, publication_date, requires_compilation, in_cran, in_bioconductor, mantainer, author_data, license)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    id = LAST_INSERT_ID(id),
+                    description = VALUES(description),
+                    version = VALUES(version),
+                    publication_date = VALUES(publication_date),
+                    requires_compilation = VALUES(requires_compilation),
+                    in_cran = VALUES(in_cran),
+                    in_bioconductor = VALUES(in_bioconductor),
+                    mantainer = VALUES(mantainer),
+                    author_data = VALUES(author_data),
+                    license = VALUES(license)
+            '''
             values = (
                 self.name, 
-                compress_text(self.description), 
+                text_codecs.encode('description', self.description),
                 self.version, 
                 self.publication_date, 
                 self.requires_compilation, 
                 self.in_cran, 
                 self.in_bioc, 
                 self.mantainer, 
-                compress_text(self.authors_data), 
+                text_codecs.encode('author_data', self.authors_data),
                 self.licenses
             )
 
@@ -191,34 +362,44 @@ class Package:
             # Insert package links
             # --------------------
 
-            sql = 'INSERT INTO links (url, package_id) VALUES (%s, %s)'     
-            
+            # Links that already exist for the package return their id
+            sql_link = 'INSERT INTO links (url, package_id) VALUES (%s, %s) ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)'
+
+            # Create SQL statement to insert in package_links table
+            sql_package_link = 'INSERT INTO package_link (package_id, url_id) VALUES (%s, %s) ON DUPLICATE KEY UPDATE url_id = url_id'
+
             for link in self.links:
                 values = (link, self.id)
-                cursor.execute(sql, values)
+                cursor.execute(sql_link, values)
 
                 # get the id of the link
                 link_id = cursor.lastrowid
 
-                # Create SQL statement to insert in package_links table
-                sql = 'INSERT INTO package_link (package_id, url_id) VALUES (%s, %s)'
-                values = (self.id, link_id)
-
                 # Execute SQL statement
-                cursor.execute(sql, values)
+                values = (self.id, link_id)
+                cursor.execute(sql_package_link, values)
                         
             # insert Dependencies
             # ------------------
 
+            # If the package was already saved, its dependencies are replaced
+            sql = 'DELETE FROM package_dependency WHERE package_id = %s'
+            cursor.execute(sql, (self.id,))
+
             for dependency in self.dependencies:
                 dependency.id_pkg = self.id
-                dependency.save(cnx)
+                dependency.save(cnx, commit=False)
 
             # --        
 
             # Commit changes to the database and close connection
+            # The package and its dependencies are saved in the same transaction
             cnx.commit()
 
+            # Cache the ids of the committed dependencies
+            for dependency in self.dependencies:
+                Dependency.cache.put((dependency.name, dependency.version, dependency.type), dependency.id)
+
             # Close connection to the database
             cursor.close()
 
@@ -227,6 +408,7 @@ class Package:
 
         # Catch any exception
         except Exception as e:
+            cnx.rollback()
             return False, e
 
 
@@ -238,61 +420,87 @@ class Package:
         # Establish connection to the database
         cursor = cnx.cursor()
 
-        # Create SQL statement to get package dependencies
-        sql = 'SELECT * FROM package_dependency WHERE package_id = %s'
-        cursor.execute(sql, (self.id,))
-        pkg_dependency_list = cursor.fetchall()
-
-        # Obtener dependencias del paquete
-        for dependency in pkg_dependency_list:
-
-            # Get dependency id
-            dependency_id = dependency[1]
-            
-            # Create SQL statement to get package dependencies from dependencies table
-            sql = 'SELECT * FROM dependencies WHERE id = %s'
-            cursor.execute(sql, (dependency_id,))
-            dependency = cursor.fetchone()
-
-            # Get dependency information
-            id = dependency[0]
-            name = dependency[1]
-            version = dependency[2]
-            type = dependency[3]
-
-            # Create dependency object
-            d = Dependency(name, type, self.id, id, version)
+        # Get the dependencies of the package with one query
+        cursor.execute(_DEPENDENCIES_SQL + ' = %s ORDER BY pd.dependency_id', (self.id,))
 
-            # Add dependency to package
-            self.dependencies.append(d)
+        # Add the dependencies to the package
+        self.dependencies = [Dependency(name, type, self.id, id, version) for _, id, name, version, type in cursor.fetchall()]
+        cursor.close()
 
     # Get package links
     def __pkg_links_db(self, cnx: MySQLConnection):
-            
-            # Establish connection to the database
-            cursor = cnx.cursor()
-    
-            # Create SQL statement to get package links
-            sql = 'SELECT * FROM package_link WHERE package_id = %s'
-            cursor.execute(sql, (self.id,))
-            pkg_link_list = cursor.fetchall()
-    
-            # Obtener links del paquete
-            for link in pkg_link_list:
-
-                # Get link id
-                link_id = link[1]
-    
-                # Create SQL statement to get package links from links table
-                sql = 'SELECT * FROM links WHERE id = %s'
-                cursor.execute(sql, (link_id,))
-                link = cursor.fetchone()
-    
-                # Get link information
-                url = link[1]
-  
-                # Add link to package
-                self.links.append(url)
 
+        # Establish connection to the database
+        cursor = cnx.cursor()
 
-    
\ No newline at end of file
+        # Get the links of the package with one query
+        cursor.execute(_LINKS_SQL + ' = %s ORDER BY pl.url_id', (self.id,))
+
+        # Add the links to the package
+        self.links = [url for _, url in cursor.fetchall()]
+        cursor.close()
+
+
+# Columns of the packages table, in the order of the table
+_PACKAGE_COLUMNS = 'id, name, description, version, publication_date, requires_compilation, in_cran, in_bioconductor, mantainer, author_data, license'
+
+# Dependencies of packages, completed with the condition on pd.package_id
+_DEPENDENCIES_SQL = '''
+    SELECT pd.package_id, d.id, d.name, d.version, d.type
+    FROM package_dependency pd
+    JOIN dependencies d ON d.id = pd.dependency_id
+    WHERE pd.package_id'''
+
+# Links of packages, completed with the condition on pl.package_id
+_LINKS_SQL = '''
+    SELECT pl.package_id, l.url
+    FROM package_link pl
+    JOIN links l ON l.id = pl.url_id
+    WHERE pl.package_id'''
+
+
+class _PackageBatch:
+    '''
+    Packages loaded together by Package.get_packages
+
+    The dependencies and links are loaded for all the packages of the batch
+    the first time that one of them needs them.
+    '''
+
+    def __init__(self, cnx: MySQLConnection, chunk_size=1000):
+        self.cnx = cnx
+        self.chunk_size = chunk_size
+        self.packages: dict[int, Package] = {}
+
+    # Add a package to the batch, with its dependencies and links not loaded
+    def add(self, package: Package):
+        package._dependencies = None
+        package._links = None
+        package._batch = self
+        self.packages[package.id] = package
+
+    # Run a query for the ids of the batch, in chunks
+    def __query(self, sql, order_by):
+        ids = list(self.packages)
+        cursor = self.cnx.cursor()
+        for start in range(0, len(ids), self.chunk_size):
+            chunk = ids[start:start + self.chunk_size]
+            cursor.execute(sql + ' IN (' + ', '.join(['%s'] * len(chunk)) + ') ORDER BY ' + order_by, chunk)
+            yield from cursor.fetchall()
+        cursor.close()
+
+    # Load the dependencies of all the packages of the batch
+    def load_dependencies(self):
+        for package in self.packages.values():
+            package._dependencies = []
+
+        for package_id, id, name, version, type in self.__query(_DEPENDENCIES_SQL, 'pd.package_id, pd.dependency_id'):
+            self.packages[package_id]._dependencies.append(Dependency(name, type, package_id, id, version))
+
+    # Load the links of all the packages of the batch
+    def load_links(self):
+        for package in self.packages.values():
+            package._links = []
+
+        for package_id, url in self.__query(_LINKS_SQL, 'pl.package_id, pl.url_id'):
+            self.packages[package_id]._links.append(url)
@@ -0,0 +1,166 @@
+from html.parser import HTMLParser
+from bs4 import BeautifulSoup
+
+# Functions to read the data of a CRAN package page in a single pass
+#
+# The summary table of the page (Version:, Depends:, Maintainer:...) is read
+# once into a dictionary {label: value}, instead of searching the whole tree
+# for each label.
+#
+# Backends:
+#   html.parser  BeautifulSoup with the parser of the standard library (default)
+#   lxml         BeautifulSoup with lxml (requires the lxml package)
+#   stream       Tokenizer of the standard library that does not build a tree
+#
+# Usage example:
+# page = parse_pkg_page(response.text, 'stream')
+# version = page['fields'].get('Version:')
+#
+# Author: agent <agent@local>
+# Date: 2026-10-17
+# Project: TFG OLIVIA
+
+# Available backends
+PARSERS = ('html.parser', 'lxml', 'stream')
+
+
+# Tokenizer that reads the data of a package page without building a tree
+class _PageTokenizer(HTMLParser):
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+
+        self.title = None
+        self.description = None
+        self.fields = {}
+
+        # Text being collected, and where it goes
+        self.__buffer = None
+        self.__target = None
+
+        # Cells of the current table row
+        self.__row = None
+
+    def handle_starttag(self, tag, attrs):
+
+        if tag == 'title' and self.title is None:
+            self.__collect('title')
+
+        elif tag == 'p' and self.description is None and self.__target is None:
+            self.__collect('p')
+
+        elif tag == 'tr':
+            self.__end_row()
+            self.__row = []
+
+        elif tag == 'td' and self.__row is not None:
+            self.__end_cell()
+            self.__collect('td')
+
+    def handle_endtag(self, tag):
+
+        if tag == 'title' and self.__target == 'title':
+            self.title = ''.join(self.__buffer)
+            self.__target = None
+
+        elif tag == 'p' and self.__target == 'p':
+            self.description = ''.join(self.__buffer)
+            self.__target = None
+
+        elif tag == 'td':
+            self.__end_cell()
+
+        elif tag in ('tr', 'table'):
+            self.__end_row()
+
+    def handle_data(self, data):
+        if self.__target is not None:
+            self.__buffer.append(data)
+
+    def close(self):
+        super().close()
+        self.__end_row()
+
+    # Start collecting the text of an element
+    def __collect(self, target):
+        self.__buffer = []
+        self.__target = target
+
+    # The cell ends with </td>, or when the next cell or row starts
+    def __end_cell(self):
+        if self.__target == 'td':
+            self.__row.append(''.join(self.__buffer))
+            self.__target = None
+
+    # Each row with two cells is a (label, value) pair of the table
+    def __end_row(self):
+        self.__end_cell()
+        if self.__row and len(self.__row) >= 2:
+            self.fields.setdefault(self.__row[0].strip(), self.__row[1])
+        self.__row = None
+
+
+# Read a package page with BeautifulSoup
+def _parse_soup(html, parser) -> dict:
+
+    soup = BeautifulSoup(html, parser)
+
+    # Read every row of the tables once
+    fields = {}
+    for tr in soup.find_all('tr'):
+        tds = tr.find_all('td', recursive=False)
+        if len(tds) >= 2:
+            fields.setdefault(tds[0].get_text().strip(), tds[1].get_text())
+
+    p = soup.find('p')
+
+    return {
+        'title': soup.title.text if soup.title else None,
+        'description': p.text if p else None,
+        'fields': fields,
+    }
+
+
+# Read a package page with the tokenizer
+def _parse_stream(html) -> dict:
+
+    if isinstance(html, bytes):
+        html = html.decode('utf-8', errors='replace')
+
+    tokenizer = _PageTokenizer()
+    tokenizer.feed(html)
+    tokenizer.close()
+
+    return {
+        'title': tokenizer.title,
+        'description': tokenizer.description,
+        'fields': tokenizer.fields,
+    }
+
+
+# Read the data of a package page
+def parse_pkg_page(html, parser='html.parser') -> dict:
+    '''
+    Read the data of a CRAN package page in a single pass
+
+    args:
+    -----
+        html (str | bytes): HTML of the page
+        parser (str): Backend used to read the page, one of PARSERS
+
+    Returns:
+    --------
+        dict: Dictionary with the keys
+            title (str): Text of the <title> element
+            description (str): Text of the first <p> element
+            fields (dict[str, str]): Text of the summary table, by label (for example 'Version:')
+
+    '''
+
+    if parser == 'stream':
+        return _parse_stream(html)
+
+    if parser in PARSERS:
+        return _parse_soup(html, parser)
+
+    raise ValueError(f"Unknown parser: {parser}. Available parsers: {', '.join(PARSERS)}")
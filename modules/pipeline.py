@@ -0,0 +1,169 @@
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Iterable, Iterator
+from modules.cran_scraper import PackageScraper
+from modules.page_parser import parse_pkg_page
+from modules.package import Package
+from modules.metrics import metrics
+
+# Two-stage pipeline to scrape CRAN packages: fetch and parse
+#
+# Downloading a page waits on the network, while parsing it uses the CPU and
+# holds the GIL. The pages are downloaded by a pool of threads and the raw HTML
+# is parsed by a pool of processes, so the parsing scales with the number of cores.
+# A bounded number of downloaded pages can wait for the parse stage: when it is
+# full, the fetch threads wait (backpressure) instead of filling the memory.
+#
+# Usage example:
+# pipeline = FetchParsePipeline(PackageScraper(RequestHandler()), fetch_workers=32)
+# for name, result in pipeline.run(['ggplot2', 'dplyr']):
+#     ...
+#
+# Author: agent <agent@local>
+# Date: 2026-10-17
+# Project: TFG OLIVIA
+
+
+# Start a parse process
+# A forked process inherits the metrics of the main process, which are discarded
+def _init_worker():
+    metrics.drain()
+
+
+# Parse the page of a package and build it (runs in the parse processes)
+# The metrics of the process are returned too, to add them to the main process
+def _parse_worker(pkg_name: str, html: str, parser: str) -> tuple[Package, dict, list]:
+
+    scraper = PackageScraper(None, parser)
+    with metrics.timer('stage_seconds', stage='parse'):
+        page = parse_pkg_page(html, parser)
+    package = scraper.build_package(pkg_name, scraper.pkg_data_from_page(page))
+
+    return package, page, metrics.drain()
+
+
+class FetchParsePipeline:
+    '''
+    Two-stage pipeline to scrape CRAN packages: fetch (threads) and parse (processes)
+
+    methods:
+    --------
+    __init__(self, scraper, fetch_workers, parse_workers, queue_size)
+        class constructor
+
+    run(self, pkg_names)
+        Scrape the packages and yield the results in order
+
+    '''
+
+    # Class constructor
+    def __init__(self, scraper: PackageScraper, fetch_workers: int = 32, parse_workers: int = None, queue_size: int = None) -> None:
+        '''
+        class constructor
+
+        args:
+        -----
+            scraper (PackageScraper): Object used to download the pages
+            fetch_workers (int): Number of threads that download pages
+            parse_workers (int): Number of processes that parse pages (by default, the number of cores)
+            queue_size (int): Maximum number of downloaded pages waiting for the parse stage
+                (by default, twice the number of parse processes)
+
+        '''
+        self.scraper = scraper
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self.queue_size = queue_size or self.parse_workers * 2
+
+        # Number of packages scheduled ahead of the one being returned
+        self.window = self.fetch_workers + self.queue_size
+
+    # Download a page and send it to the parse stage (runs in the fetch threads)
+    def __fetch(self, pkg_name: str, parse_pool: ProcessPoolExecutor, slots: threading.Semaphore) -> Future:
+
+        url, html, page = self.scraper.fetch_pkg_page(pkg_name)
+
+        # Unchanged cached page: the data parsed before is used
+        if page is not None:
+            future = Future()
+            future.set_result((self.scraper.build_package(pkg_name, self.scraper.pkg_data_from_page(page)), None, None))
+            future.url = url
+            return future
+
+        # Wait for a free place in the parse stage
+        slots.acquire()
+        try:
+            future = parse_pool.submit(_parse_worker, pkg_name, html, self.scraper.parser)
+        except BaseException:
+            slots.release()
+            raise
+
+        future.add_done_callback(lambda _: slots.release())
+        future.url = url
+        return future
+
+    # Scrape the packages and yield the results in order
+    def run(self, pkg_names: Iterable[str]) -> Iterator[tuple[str, Package | Exception]]:
+        '''
+        Scrape the packages and yield the results in order
+
+        args:
+        -----
+            pkg_names (Iterable[str]): Names of the packages to scrape
+
+        Returns:
+        --------
+            Iterator[tuple[str, Package | Exception]]: Pairs (name, result). If a
+            package could not be fetched or parsed, the result is the exception
+
+        '''
+        slots = threading.Semaphore(self.queue_size)
+        pending = deque()
+        names = iter(pkg_names)
+        cache = self.scraper.request_handler.cache
+
+        with ThreadPoolExecutor(max_workers=self.fetch_workers) as fetch_pool, \
+             ProcessPoolExecutor(max_workers=self.parse_workers, initializer=_init_worker) as parse_pool:
+
+            def schedule(name):
+                pending.append((name, fetch_pool.submit(self.__fetch, name, parse_pool, slots)))
+
+            try:
+
+                # Schedule the first packages of the window
+                for name in names:
+                    schedule(name)
+                    if len(pending) == self.window:
+                        break
+
+                # Return the oldest package and schedule a new one
+                while pending:
+                    name, fetch_future = pending.popleft()
+
+                    try:
+                        parse_future = fetch_future.result()
+                        package, page, worker_metrics = parse_future.result()
+                        if worker_metrics:
+                            metrics.merge(worker_metrics)
+
+                        # Keep the parsed data, to skip the parsing if the page does not change
+                        if cache is not None and page is not None:
+                            cache.set_parsed(parse_future.url, page)
+
+                        result = package
+                    except Exception as e:
+                        result = e
+
+                    for next_name in names:
+                        schedule(next_name)
+                        break
+
+                    yield name, result
+
+            # If the pipeline is stopped, cancel the packages not returned yet
+            finally:
+                for _, fetch_future in pending:
+                    fetch_future.cancel()
+                fetch_pool.shutdown(wait=True, cancel_futures=True)
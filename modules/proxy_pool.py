@@ -0,0 +1,256 @@
+import random
+import threading
+import time
+import requests
+
+# Pool of upstream proxies scored by latency and failures
+#
+# Each proxy keeps an exponentially weighted moving average (EWMA) of its latency
+# and of its failure rate. Proxies are selected at random, weighted by their score,
+# so fast and reliable proxies are used more. A proxy that fails too much is
+# quarantined: it is not selected until a background thread probes it again and
+# the probe succeeds.
+#
+# Usage example:
+# pool = ProxyPool(['http://10.0.0.1:3128', 'http://10.0.0.2:3128'], probe_url='https://cran.r-project.org/')
+# pool.start_probing()
+# proxy = pool.select()
+# ... make the request through proxy ...
+# pool.report(proxy, elapsed_seconds, ok=True)
+#
+# Author: agent <agent@local>
+# Date: 2026-10-17
+# Project: TFG OLIVIA
+
+class ProxyStats:
+    '''
+    Statistics of a proxy
+
+    attributes
+    ----------
+    url : str
+        URL of the proxy
+    latency : float
+        EWMA of the latency of the requests, in seconds
+    failure_rate : float
+        EWMA of the failures (0 = never fails, 1 = always fails)
+    uses : int
+        Number of requests made with the proxy
+    consecutive_failures : int
+        Number of failures since the last success
+    quarantined_until : float
+        Time until which the proxy is not selected (0 if it is healthy)
+    '''
+
+    def __init__(self, url, latency=1.0):
+        self.url = url
+        self.latency = latency
+        self.failure_rate = 0.0
+        self.uses = 0
+        self.consecutive_failures = 0
+        self.quarantined_until = 0.0
+
+    # Weight of the proxy in the selection
+    def score(self) -> float:
+        return max(1.0 - self.failure_rate, 0.01) / max(self.latency, 0.001)
+
+    # Check if the proxy is quarantined
+    def is_quarantined(self) -> bool:
+        return self.quarantined_until > 0
+
+
+class ProxyPool:
+    '''
+    Pool of upstream proxies scored by latency and failures
+
+    methods
+    -------
+    add(self, urls)
+        Add proxies to the pool
+
+    remove(self, url)
+        Remove a proxy from the pool
+
+    select(self, max_uses)
+        Select a healthy proxy, weighted by its score
+
+    report(self, url, latency, ok)
+        Update the statistics of a proxy after a request
+
+    probe(self, url)
+        Check if a proxy works with a request to probe_url
+
+    start_probing(self) / stop_probing(self)
+        Start or stop the thread that probes the quarantined proxies
+    '''
+
+    # Class constructor
+    def __init__(self, urls=(), alpha=0.3, max_failure_rate=0.5, max_consecutive_failures=3,
+                 quarantine_time=60, probe_url='https://cran.r-project.org/', probe_timeout=10):
+        '''
+        class constructor
+
+        args:
+        -----
+            urls (Iterable[str]): URLs of the proxies
+            alpha (float): Weight of the last request in the moving averages
+            max_failure_rate (float): Failure rate from which a proxy is quarantined
+            max_consecutive_failures (int): Consecutive failures from which a proxy is quarantined
+            quarantine_time (float): Seconds before a quarantined proxy is probed again
+            probe_url (str): URL requested to check a quarantined proxy
+            probe_timeout (float): Timeout of the probe requests
+        '''
+        self.alpha = alpha
+        self.max_failure_rate = max_failure_rate
+        self.max_consecutive_failures = max_consecutive_failures
+        self.quarantine_time = quarantine_time
+        self.probe_url = probe_url
+        self.probe_timeout = probe_timeout
+
+        self.stats: dict[str, ProxyStats] = {}
+        self.lock = threading.Lock()
+
+        self.__stop = threading.Event()
+        self.__thread = None
+
+        self.add(urls)
+
+    # Number of proxies in the pool
+    def __len__(self):
+        return len(self.stats)
+
+    # Add proxies to the pool
+    def add(self, urls):
+        with self.lock:
+            for url in urls:
+                self.stats.setdefault(url, ProxyStats(url))
+
+    # Remove a proxy from the pool
+    def remove(self, url):
+        with self.lock:
+            self.stats.pop(url, None)
+
+    # Healthy proxies
+    def healthy(self) -> list[ProxyStats]:
+        with self.lock:
+            return [s for s in self.stats.values() if not s.is_quarantined()]
+
+    # Select a healthy proxy, weighted by its score
+    def select(self, max_uses=None) -> str | None:
+        '''
+        Select a healthy proxy at random, weighted by its score
+
+        If all the proxies are quarantined, the one that leaves the quarantine
+        first is returned. If the pool is empty, None is returned.
+
+        args:
+        -----
+            max_uses (int): If given, the proxy is removed from the pool when it
+                has been selected this number of times
+        '''
+        with self.lock:
+            if not self.stats:
+                return None
+
+            candidates = [s for s in self.stats.values() if not s.is_quarantined()]
+            if not candidates:
+                selected = min(self.stats.values(), key=lambda s: s.quarantined_until)
+            else:
+                selected = random.choices(candidates, weights=[s.score() for s in candidates])[0]
+
+            selected.uses += 1
+
+            # Retire the proxy after its last use, with the same lock as the selection
+            if max_uses is not None and selected.uses >= max_uses:
+                del self.stats[selected.url]
+
+            return selected.url
+
+    # Update the statistics of a proxy after a request
+    def report(self, url, latency, ok):
+        '''
+        Update the statistics of a proxy after a request
+
+        args:
+        -----
+            url (str): URL of the proxy
+            latency (float): Seconds that the request took
+            ok (bool): False if the request failed because of the proxy
+        '''
+        with self.lock:
+            stats = self.stats.get(url)
+            if stats is None:
+                return
+
+            stats.latency = self.alpha * latency + (1 - self.alpha) * stats.latency
+            stats.failure_rate = self.alpha * (0.0 if ok else 1.0) + (1 - self.alpha) * stats.failure_rate
+
+            if ok:
+                stats.consecutive_failures = 0
+            else:
+                stats.consecutive_failures += 1
+
+            # Quarantine the proxy if it fails too much
+            if stats.consecutive_failures >= self.max_consecutive_failures or stats.failure_rate > self.max_failure_rate:
+                stats.quarantined_until = time.time() + self.quarantine_time
+
+    # Check if a proxy works
+    def probe(self, url) -> bool:
+        '''
+        Check if a proxy works with a request to probe_url. A proxy that works
+        leaves the quarantine; otherwise, its quarantine is extended.
+        '''
+        start = time.perf_counter()
+        try:
+            response = requests.get(self.probe_url, proxies={'http': url, 'https': url}, timeout=self.probe_timeout)
+            ok = response.status_code < 500
+        except requests.RequestException:
+            ok = False
+        latency = time.perf_counter() - start
+
+        with self.lock:
+            stats = self.stats.get(url)
+            if stats is None:
+                return ok
+
+            if ok:
+                # The proxy gets a new chance with its latency, keeping half of its failure rate
+                stats.latency = latency
+                stats.failure_rate /= 2
+                stats.consecutive_failures = 0
+                stats.quarantined_until = 0.0
+            else:
+                stats.quarantined_until = time.time() + self.quarantine_time
+
+        return ok
+
+    # Probe the quarantined proxies whose quarantine has ended
+    def probe_quarantined(self):
+        now = time.time()
+        with self.lock:
+            urls = [s.url for s in self.stats.values() if s.is_quarantined() and s.quarantined_until <= now]
+
+        for url in urls:
+            self.probe(url)
+
+    # Start the thread that probes the quarantined proxies
+    def start_probing(self, interval=5):
+        if self.__thread is not None:
+            return
+
+        def run():
+            while not self.__stop.wait(interval):
+                self.probe_quarantined()
+
+        self.__stop.clear()
+        self.__thread = threading.Thread(target=run, name='proxy-probe', daemon=True)
+        self.__thread.start()
+
+    # Stop the thread that probes the quarantined proxies
+    def stop_probing(self):
+        if self.__thread is None:
+            return
+
+        self.__stop.set()
+        self.__thread.join()
+        self.__thread = None
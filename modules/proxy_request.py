@@ -1,7 +1,15 @@
 import requests
 import random
+import threading
+import time
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
-from colorama import Fore, Style
+from modules.http_cache import ResponseCache
+from modules.proxy_pool import ProxyPool
+from modules.retry_policy import RetryPolicy, CircuitBreaker, TokenBucket, CircuitOpenError
+from modules.metrics import metrics
+from modules.log import logger
 
 
 # Class to handle HTTP requests in a more transparent way in scraping and denial of service environments
@@ -12,70 +20,167 @@ from colorama import Fore, Style
 # request_handler = RequestHandler()
 # response = request_handler.do_request('https://www.google.com')
 #
+# With a ResponseCache, the responses are stored on disk and revalidated with
+# conditional requests (see modules/http_cache.py):
+# request_handler = RequestHandler(cache=ResponseCache('.cache/http'))
+#
+# The requests are made with a requests.Session that keeps the connections open
+# (keep-alive), so the requests to the same host reuse them instead of opening a
+# new TCP connection and TLS handshake each time. The session can be shared by
+# several threads; pool_size should be at least the number of threads.
+#
+# The proxies are kept in a ProxyPool (see modules/proxy_pool.py) that prefers
+# the fastest and most reliable ones and quarantines the proxies that fail.
+# Configured proxies can be given instead of the free ones:
+# request_handler = RequestHandler(proxies=['http://10.0.0.1:3128'])
+#
 # Author: Daniel Alonso Báscones (@dnllns)
 # Date: 2022-12-23
 # Project: TFG OLIVIA
 
-class RequestHandler(requests.Request):
+# Metrics of the requests (see modules/metrics.py)
+_FETCH_SECONDS = metrics.histogram('stage_seconds', stage='fetch')
+_CACHE_HITS = metrics.counter('cache_total', result='hit')
+_CACHE_REVALIDATED = metrics.counter('cache_total', result='revalidated')
+_CACHE_MISSES = metrics.counter('cache_total', result='miss')
+_RETRIES = metrics.counter('retries_total')
+_PROXY_SWITCHES = metrics.counter('proxy_switches_total')
+
+class RequestHandler:
 
 
     # Class constructor
-    def __init__(self, max_request=5, *args, **kwargs):
+    def __init__(self, max_request=5, cache: ResponseCache = None, pool_size=32, proxies: list[str] = None,
+                 retry_policy: RetryPolicy = None, breaker_options: dict = None, rate_options: dict = None,
+                 direct=False, user_agents: list[str] = None):
+        '''
+        Class constructor
+
+        args:
+            max_request (int): Maximum number of requests made with each free proxy
+            cache (ResponseCache): Optional cache of responses
+            pool_size (int): Number of open connections kept for each host
+            proxies (list[str]): URLs of configured upstream proxies. They are scored by
+                latency and failures, and never retired. If None, free proxies that
+                support HTTPS are obtained from proxyscrape.com
+            retry_policy (RetryPolicy): Attempts and backoff of the requests made with retry=True
+            breaker_options (dict): Arguments of the CircuitBreaker of each host
+            rate_options (dict): Arguments of the TokenBucket that limits the rate of each host
+            direct (bool): Make the requests without proxies (for example, to a local server)
+            user_agents (list[str]): User agents of the requests. If None, they are obtained
+                from useragentstring.com
+        '''
+
+        # Initialize the proxy pool
+        # The proxies are used for HTTP and HTTPS (CRAN is only served with HTTPS)
+        self.proxy_pool = ProxyPool(proxies or ())
+        if proxies:
+            self.proxy_pool.start_probing()
 
+        # Free proxies are replaced by new ones, configured proxies are kept
+        self.free_proxies = not proxies and not direct
 
-        # Call the constructor of the parent class
-        super().__init__(*args, **kwargs)
+        # Requests made without proxies
+        self.direct = direct
 
-        # Initialize the proxy list
-        self.proxies = {}
+        # Proxy of the last request, to count the proxy switches
+        self.last_proxy = None
 
         # Initialize the user agent list
+        # The configured user agents are used again when all of them have been used
+        self.configured_user_agents = list(user_agents) if user_agents else None
         self.user_agents = []
 
         # Maximum number of requests to be made with the same proxy
         self.max_request = max_request
 
-    # Get proxies from proxyscrape.com API using the free plan and save them in the proxy list
+        # Lock to share the proxy and user agent lists between threads
+        self.lock = threading.Lock()
+
+        # Optional cache of responses
+        self.cache = cache
+
+        # Retries, and circuit breaker and rate limiter of each host
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breaker_options = breaker_options or {}
+        self.rate_options = rate_options or {}
+        self.breakers: dict[str, CircuitBreaker] = {}
+        self.buckets: dict[str, TokenBucket] = {}
+
+        # Session with a pool of open connections for each host
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    # Close the open connections
+    def close(self) -> None:
+        self.proxy_pool.stop_probing()
+        self.session.close()
+
+    # Get proxies from proxyscrape.com API using the free plan and save them in the proxy pool
     def __obtain_proxies(self) -> None:
 
         # get proxy
-        proxies = requests.get('https://api.proxyscrape.com/?request=getproxies&proxytype=http&timeout=10000&country=all&ssl=all&anonymity=all').text
+        # Only the proxies that support HTTPS (CONNECT), because the requests to CRAN use it
+        proxies = self.session.get('https://api.proxyscrape.com/?request=getproxies&proxytype=http&timeout=10000&country=all&ssl=yes&anonymity=all').text
         proxies = proxies.splitlines()
 
-        # Save (proxy, number_uses) in proxy list
-        self.proxies = [(f'http://{proxy}', 0) for proxy in proxies]
+        # Save proxies in the pool
+        self.proxy_pool.add(f'http://{proxy}' for proxy in proxies)
 
     # Get next proxy
     def __get_next_proxy(self) -> dict[str, str]:
         '''
-        Get a random proxy from the proxy list
+        Get a proxy from the proxy pool, weighted by its latency and failure rate
         
         Returns:
             dict: Dictionary with the selected proxy
         '''
 
-        # If the proxy list is empty, get new proxies
-        if not self.proxies:
+        # Direct requests
+        if self.direct:
+            return {}
+
+        # If there are no healthy free proxies, get new proxies
+        if self.free_proxies and not self.proxy_pool.healthy():
             self.__obtain_proxies()
 
         # Select the next proxy
-        selected_proxy, num_usages = self.proxies[0]
+        # A free proxy is removed from the pool when it has been used the specified number of times
+        selected_proxy = self.proxy_pool.select(self.max_request if self.free_proxies else None)
+        if selected_proxy is None:
+            return {}
 
-        # If the proxy has already been used the specified number of times, remove it from the proxy list
-        num_usages+=1
-        if num_usages == self.max_request:
+        if self.last_proxy is not None and selected_proxy != self.last_proxy:
+            _PROXY_SWITCHES.inc()
+        self.last_proxy = selected_proxy
 
-            # Remove the tuple proxy from the proxy list
-            self.proxies.remove(
-                (selected_proxy, num_usages-1)
-            )
+        # return proxy
+        return {'http': selected_proxy, 'https': selected_proxy}
 
-        # If not, update the number of proxy uses
-        else:
-            self.proxies[0] = (selected_proxy, num_usages)
+    # Make a request and update the statistics of the proxy used
+    def __get(self, url, proxy, headers, stream) -> requests.Response:
 
-        # return proxy
-        return { 'http': selected_proxy }
+        # Proxy used for the URL, if any
+        proxy_url = proxy.get(url.split(':', 1)[0])
+
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url, proxies=proxy, headers=headers, timeout=10, stream=stream)
+
+        # Timeouts and connection errors count as failures of the proxy
+        except requests.RequestException:
+            if proxy_url:
+                self.proxy_pool.report(proxy_url, time.perf_counter() - start, ok=False)
+            raise
+
+        # Server errors and rejections of the proxy count as failures
+        if proxy_url:
+            ok = response.status_code < 500 and response.status_code not in (407, 429)
+            self.proxy_pool.report(proxy_url, time.perf_counter() - start, ok)
+
+        return response
 
     # Get user agents from the useragentstring.com API
     def __obtain_user_agents(self, max_count=30) -> None:
@@ -83,7 +188,7 @@ class RequestHandler(requests.Request):
         Get user agents from the useragentstring.com API
         '''
         # Obtener user agents
-        user_agents_request = requests.get('https://www.useragentstring.com/pages/useragentstring.php?name=All').text
+        user_agents_request = self.session.get('https://www.useragentstring.com/pages/useragentstring.php?name=All').text
         soup = BeautifulSoup(user_agents_request, 'html.parser')
 
         # Find the div element with id = liste
@@ -115,7 +220,9 @@ class RequestHandler(requests.Request):
             str: User agent
         '''
         # Si la lista de user agents está vacía, obtener nuevos user agents
-        if self.user_agents == []:
+        if self.user_agents == [] and self.configured_user_agents:
+            self.user_agents = list(self.configured_user_agents)
+        elif self.user_agents == []:
             self.__obtain_user_agents()
 
         # Seleccionar un user agent aleatorio
@@ -127,52 +234,127 @@ class RequestHandler(requests.Request):
         return {'User-Agent': selected_user_agent}
 
     # Make an HTTP request
-    def do_request(self, url, retry = False) -> bytes:
+    def do_request(self, url, retry = False, stream = False) -> bytes:
         '''
         Make an HTTP request
 
         args:
             url (str): URL of the request
+            retry (bool): Repeat the failed request following the retry policy.
+                If all the attempts fail, the last response is returned, or the last error raised
+            stream (bool): Do not download the body until it is read
 
         Returns:
-            bytes: HTML of the response
+            bytes: HTML of the response. If the response comes from the cache,
+            its attribute from_cache is True
         '''
-    
-        # Get proxy and user agent
-        proxy = self.__get_next_proxy()
-        user_agent = self.__get_random_user_agent()
-
-        # Make HTTP request
-        response = requests.get(url, proxies=proxy, headers=user_agent, timeout=10)
-
-        if retry:
-            retry_count = 0
-
-            # If the request fails, retry it
-            while response.status_code != 200:
-
-                # Color red
-                print(Fore.RED)
-                print("Request failed:")
-                print("Proxy: ", proxy)
-                print("User agent: ", user_agent)
-                print("URL: ", url)
-                print("Status code: ", response.status_code)
-                print("Retrying request. Times: ", retry_count)
-                response = requests.get(url, proxies=proxy, headers=user_agent, timeout=10)
-
-                # If the request fails 5 times in a row, change the proxy and user agent
-                if retry_count % 5 == 0:
-                    print("Request failed 5 times. Changing proxy and user agent")
+
+        # Look for the response in the cache
+        # A fresh entry is returned without any request
+        entry = None
+        if self.cache is not None and not stream:
+            entry = self.cache.get(url)
+            if entry is not None and self.cache.is_fresh(entry):
+                _CACHE_HITS.inc()
+                return entry.to_response()
+
+        # Time of the requests, including the retries
+        start = time.perf_counter()
+        try:
+            return self.__request(url, retry, stream, entry)
+        finally:
+            _FETCH_SECONDS.observe(time.perf_counter() - start)
+
+    # Make an HTTP request, with the retries of the retry policy
+    def __request(self, url, retry, stream, entry) -> requests.Response:
+
+        # A stale entry is revalidated with a conditional request
+        conditional = entry.conditional_headers() if entry is not None else {}
+
+        # Host of the request, with its circuit breaker and rate limiter
+        host = urlsplit(url).netloc
+        with self.lock:
+            breaker = self.breakers.setdefault(host, CircuitBreaker(**self.breaker_options))
+            bucket = self.buckets.setdefault(host, TokenBucket(**self.rate_options))
+
+        attempts = self.retry_policy.max_attempts if retry else 1
+        response = None
+        error = None
+
+        for attempt in range(attempts):
+
+            # If the host keeps failing, wait until the circuit breaker allows a new try
+            if not breaker.allow():
+                if not retry:
+                    raise CircuitOpenError(f"Circuit open for {host}")
+                time.sleep(max(breaker.wait_time(), self.retry_policy.delay(attempt)))
+                continue
+
+            # Make HTTP request
+            # Timeouts and connection errors are retried like server errors
+            retry_after = None
+            try:
+                # Wait for the rate limiter
+                bucket.acquire()
+
+                # Get proxy and user agent (a new one for each attempt)
+                with self.lock:
                     proxy = self.__get_next_proxy()
                     user_agent = self.__get_random_user_agent()
 
-                # Color reset
-                print(Style.RESET_ALL)
-                
-                # Increment retry count
-                retry_count+=1
+                response = self.__get(url, proxy, {**user_agent, **conditional}, stream)
+                error = None
+            except requests.RequestException as e:
+                response = None
+                error = e
+                breaker.record_failure()
+
+            # The request could not be made (for example, the proxies or the user agents
+            # could not be obtained): the trial request of a half-open circuit is given back
+            except BaseException:
+                breaker.cancel()
+                raise
+            else:
+
+                # The server answered, and the request is not retried
+                # 304 (not modified) is a valid answer to a conditional request
+                if not self.retry_policy.is_retryable(response.status_code):
+                    breaker.record_success()
+                    bucket.reward()
+                    break
+
+                breaker.record_failure()
+
+                # The server asks to slow down
+                if response.status_code in (429, 503):
+                    bucket.penalize()
+                    retry_after = response.headers.get('Retry-After')
+                    retry_after = float(retry_after) if retry_after and retry_after.isdigit() else None
+
+            # Wait before the next attempt
+            if attempt + 1 < attempts:
+                delay = self.retry_policy.delay(attempt, retry_after)
+                reason = error.__class__.__name__ if error is not None else response.status_code
+                logger.warning("Request failed, retrying", extra={'url': url, 'reason': reason, 'delay': round(delay, 1), 'attempt': attempt + 1, 'attempts': attempts - 1})
+                _RETRIES.inc()
+                time.sleep(delay)
+
+        # All the attempts failed because of errors
+        if response is None:
+            raise error if error is not None else CircuitOpenError(f"Circuit open for {host}")
+
+        # The page has not changed: use the stored body
+        if entry is not None and response.status_code == 304:
+            _CACHE_REVALIDATED.inc()
+            self.cache.refresh(url)
+            return entry.to_response()
+
+        # Store the new page
+        if self.cache is not None and not stream and response.status_code == 200:
+            _CACHE_MISSES.inc()
+            self.cache.put(url, response)
 
         # return HTML
+        response.from_cache = False
         return response
     
@@ -0,0 +1,191 @@
+import random
+import threading
+import time
+import requests
+
+# Classes to control how RequestHandler retries and paces the requests
+#
+# RetryPolicy       Maximum number of attempts and exponential backoff with jitter
+# CircuitBreaker    Stops sending requests to a host that keeps failing, for a while
+# TokenBucket       Limits the rate of requests to a host. The rate goes down when the
+#                   server asks to slow down (429/503) and slowly up while it answers,
+#                   so it stays close to the highest rate that the server tolerates
+#
+# Author: agent <agent@local>
+# Date: 2026-10-17
+# Project: TFG OLIVIA
+
+# Error raised when the circuit breaker of a host is open
+class CircuitOpenError(requests.RequestException):
+    pass
+
+
+class RetryPolicy:
+    '''
+    Maximum number of attempts and exponential backoff with jitter
+
+    attributes
+    ----------
+    max_attempts : int
+        Maximum number of attempts of a request, including the first one
+    base_delay : float
+        Delay in seconds after the first failure
+    max_delay : float
+        Maximum delay in seconds between two attempts
+    retry_statuses : tuple[int]
+        Status codes that are retried
+    '''
+
+    def __init__(self, max_attempts=5, base_delay=0.5, max_delay=30.0, retry_statuses=(408, 429, 500, 502, 503, 504)):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_statuses = retry_statuses
+
+    # Check if a status code should be retried
+    def is_retryable(self, status_code) -> bool:
+        return status_code in self.retry_statuses
+
+    # Delay before the next attempt
+    def delay(self, attempt, retry_after=None) -> float:
+        '''
+        Delay before the next attempt ("full jitter": a random time between 0 and
+        the exponential backoff). If the server sent a Retry-After header, it is respected.
+
+        args:
+        -----
+            attempt (int): Number of the failed attempt, starting at 0
+            retry_after (float): Seconds asked by the server, if any
+        '''
+        backoff = min(self.max_delay, self.base_delay * 2 ** attempt)
+        delay = random.uniform(0, backoff)
+
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+
+        return delay
+
+
+class CircuitBreaker:
+    '''
+    Circuit breaker of a host
+
+    After failure_threshold consecutive failures the circuit opens and no requests
+    are allowed for reset_timeout seconds. Then one trial request is allowed
+    (half-open): if it succeeds the circuit closes, otherwise it opens again.
+    If the result of the trial is not recorded within reset_timeout seconds, or
+    the trial is cancelled, a new trial request is allowed.
+    '''
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.state = CircuitBreaker.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.lock = threading.Lock()
+
+    # Seconds until a request is allowed (0 if it is allowed now)
+    # While half-open, opened_at is the start of the trial request
+    def wait_time(self) -> float:
+        with self.lock:
+            if self.state == CircuitBreaker.CLOSED:
+                return 0.0
+            return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    # Check if a request can be made now
+    def allow(self) -> bool:
+        with self.lock:
+            if self.state == CircuitBreaker.CLOSED:
+                return True
+
+            # Only one trial request while the circuit is half-open. The trial
+            # (or the end of the open period) is allowed after reset_timeout
+            now = time.monotonic()
+            if now - self.opened_at >= self.reset_timeout:
+                self.state = CircuitBreaker.HALF_OPEN
+                self.opened_at = now
+                return True
+
+            return False
+
+    # The host answered
+    def record_success(self):
+        with self.lock:
+            self.state = CircuitBreaker.CLOSED
+            self.failures = 0
+
+    # The request allowed was not made: a half-open circuit allows a new trial now
+    def cancel(self):
+        with self.lock:
+            if self.state == CircuitBreaker.HALF_OPEN:
+                self.state = CircuitBreaker.OPEN
+                self.opened_at = time.monotonic() - self.reset_timeout
+
+    # The host failed
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == CircuitBreaker.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = CircuitBreaker.OPEN
+                self.opened_at = time.monotonic()
+
+
+class TokenBucket:
+    '''
+    Token bucket that limits the rate of requests to a host
+
+    Each request takes a token; tokens are refilled at `rate` per second up to
+    `capacity`. If adaptive, the rate is halved when the server asks to slow down
+    and increased a little after each success, between min_rate and max_rate.
+    '''
+
+    def __init__(self, rate=10.0, capacity=None, adaptive=True, min_rate=0.5, max_rate=None, increase=0.1):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.adaptive = adaptive
+        self.min_rate = min_rate
+        self.max_rate = max_rate if max_rate is not None else rate * 4
+        self.increase = increase
+
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    # Add the tokens generated since the last update
+    def __refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    # Take a token, waiting until one is available
+    def acquire(self):
+        while True:
+            with self.lock:
+                self.__refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    # The server answered: increase the rate a little
+    def reward(self):
+        if not self.adaptive:
+            return
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    # The server asked to slow down: halve the rate
+    def penalize(self):
+        if not self.adaptive:
+            return
+        with self.lock:
+            self.__refill()
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
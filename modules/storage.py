@@ -0,0 +1,296 @@
+import datetime
+import functools
+import os
+import re
+import sqlite3
+import time
+import mysql.connector
+from mysql.connector import pooling
+from mysql.connector.errors import PoolError
+
+# Storage backends of the database
+#
+# DatabaseHandler (see modules/db.py) gets its connections from a backend,
+# selected with the `backend` option of the [storage] section of config.ini:
+#   mysql   MySQL server configured in the [mysql] section (default)
+#   sqlite  SQLite file configured in the [sqlite] section, in the same process
+#
+# A backend has a `pool` attribute (None if there is a single connection) and
+# two methods:
+#   connect()    New connection (or a connection of the pool)
+#   check(cnx)   Reconnect a connection if it was dropped, and return it
+#
+# The connections have the interface of mysql.connector, so Package, Dependency,
+# BulkWriter... use the same code with every backend. The SQLite connections
+# translate the statements written for MySQL (%s parameters, ON DUPLICATE KEY
+# UPDATE, LAST_INSERT_ID, <=>, RAND()) once, and SQLite keeps the compiled statements
+# in its cache, so each statement is prepared only once.
+#
+# Usage example:
+# backend = SQLiteBackend({'path': 'data/r_scraper.sqlite3'})
+# cnx = backend.connect()
+# package.save(cnx)
+#
+# Author: agent <agent@local>
+# Date: 2026-10-17
+# Project: TFG OLIVIA
+
+SQLITE_SCHEMA = os.path.join('config', 'db', 'sqlite_schema.sql')
+
+# The dates are read as datetime.date, like with MySQL
+sqlite3.register_converter('DATE', lambda value: datetime.date.fromisoformat(value.decode()))
+
+
+class MySQLBackend:
+    '''
+    Connections to a MySQL server, with an optional pool of connections
+    '''
+
+    def __init__(self, config):
+        '''
+        class constructor
+
+        args:
+        -----
+            config (dict): Options of the [mysql] section of config.ini (user, password, host,
+                database, pool_size and pool_timeout)
+        '''
+
+        # Parameters of the connections
+        self.connection_config = {
+            'user': config['user'],
+            'password': config['password'],
+            'host': config['host'],
+            'database': config['database'],
+        }
+
+        # Number of connections of the pool (0 = single connection)
+        self.pool_size = int(config.get('pool_size', 0))
+
+        # Seconds to wait for a free connection of the pool
+        self.pool_timeout = float(config.get('pool_timeout', 30))
+
+        self.pool = None
+        if self.pool_size > 0:
+            self.pool = pooling.MySQLConnectionPool(
+                pool_name='r_scraper',
+                pool_size=self.pool_size,
+                pool_reset_session=True,
+                **self.connection_config
+            )
+
+    # New connection, or a connection of the pool
+    def connect(self):
+
+        # Single connection mode
+        if self.pool is None:
+            return mysql.connector.connect(**self.connection_config)
+
+        # Pooled mode: wait for a free connection
+        deadline = time.monotonic() + self.pool_timeout
+        while True:
+            try:
+                return self.pool.get_connection()
+            except PoolError:
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.05)
+
+    # Check that a connection is alive, and reconnect it if the link was dropped
+    def check(self, cnx):
+        if not cnx.is_connected():
+            cnx.reconnect(attempts=3, delay=1)
+        return cnx
+
+
+class SQLiteBackend:
+    '''
+    Database in a SQLite file, in the same process
+
+    The file is opened in WAL mode, so the readers do not block the writer. There is
+    a single connection, shared by the threads with the lock of DatabaseHandler.
+    '''
+
+    pool = None
+
+    def __init__(self, config):
+        '''
+        class constructor
+
+        args:
+        -----
+            config (dict): Options of the [sqlite] section of config.ini
+                path (str): Database file. The schema is created if the file is new
+                cache_size (int): Size of the SQLite cache, in MB (default 64)
+        '''
+        self.path = config.get('path', 'data/r_scraper.sqlite3')
+        self.cache_size = int(config.get('cache_size', 64))
+
+    # New connection
+    def connect(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        cnx = SQLiteConnection(self.path, self.cache_size)
+
+        # Create the tables if the file is new
+        if not cnx.connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'packages'").fetchone():
+            with open(SQLITE_SCHEMA) as file:
+                cnx.connection.executescript(file.read())
+
+        return cnx
+
+    # The file is always available
+    def check(self, cnx):
+        return cnx
+
+
+# Translate a statement written for MySQL to SQLite
+@functools.lru_cache(maxsize=256)
+def _sqlite_sql(sql) -> tuple[str, str | None]:
+    '''
+    Translate a statement written for MySQL to SQLite
+
+    args:
+    -----
+        sql (str): Statement with %s parameters
+
+    Returns:
+    --------
+        tuple: The statement for SQLite, and the column whose value is the new
+        lastrowid (the column of LAST_INSERT_ID) or None
+    '''
+    sql = sql.replace('%s', '?').replace('<=>', 'IS')
+    sql = re.sub(r'\bRAND\(\)', 'RANDOM()', sql)
+
+    # Multi-row IN: (a, b) IN ((?, ?), (?, ?)) -> (a, b) IN (VALUES (?, ?), (?, ?))
+    sql = re.sub(r'\)\s+IN\s+\(\s*\(', ') IN (VALUES (', sql)
+
+    match = re.search(r'\bON DUPLICATE KEY UPDATE\b(.*)$', sql, re.DOTALL)
+    if match is None:
+        return sql, None
+
+    # The id of the existing row is returned instead of LAST_INSERT_ID(id)
+    returning = None
+    assignments = []
+    for assignment in match.group(1).split(','):
+        column, value = (part.strip() for part in assignment.split('=', 1))
+        column = column.split('.')[-1]
+        last_insert_id = re.fullmatch(r'LAST_INSERT_ID\((\w+)\)', value)
+        if last_insert_id:
+            returning = last_insert_id.group(1)
+        elif value.split('.')[-1] != column:
+            assignments.append(column + ' = ' + re.sub(r'VALUES\((\w+)\)', r'excluded.\1', value))
+
+    # A row is only returned by an update, so the existing row is "updated" with its own id
+    if not assignments and returning:
+        assignments.append(returning + ' = ' + returning)
+
+    upsert = 'ON CONFLICT DO UPDATE SET ' + ', '.join(assignments) if assignments else 'ON CONFLICT DO NOTHING'
+    if returning:
+        upsert += ' RETURNING ' + returning
+
+    return sql[:match.start()] + upsert, returning
+
+
+class SQLiteCursor:
+    '''
+    Cursor of a SQLite connection, with the interface of mysql.connector
+    '''
+
+    def __init__(self, cursor: sqlite3.Cursor):
+        self.cursor = cursor
+        self.lastrowid = None
+
+    def execute(self, sql, params=()):
+        sql, returning = _sqlite_sql(sql)
+        self.cursor.execute(sql, tuple(params or ()))
+
+        # The id of the inserted or existing row
+        if returning:
+            row = self.cursor.fetchone()
+            self.cursor.fetchall()
+            self.lastrowid = row[0] if row else None
+        else:
+            self.lastrowid = self.cursor.lastrowid
+
+    def executemany(self, sql, params):
+        sql, _ = _sqlite_sql(sql)
+        self.cursor.executemany(sql, params)
+        self.lastrowid = self.cursor.lastrowid
+
+    def fetchone(self):
+        return self.cursor.fetchone()
+
+    def fetchmany(self, size=1):
+        return self.cursor.fetchmany(size)
+
+    def fetchall(self):
+        return self.cursor.fetchall()
+
+    @property
+    def rowcount(self):
+        return self.cursor.rowcount
+
+    @property
+    def description(self):
+        return self.cursor.description
+
+    def close(self):
+        self.cursor.close()
+
+
+class SQLiteConnection:
+    '''
+    Connection to a SQLite file, with the interface of mysql.connector
+    '''
+
+    def __init__(self, path, cache_size=64):
+        '''
+        class constructor
+
+        args:
+        -----
+            path (str): Database file
+            cache_size (int): Size of the SQLite cache, in MB
+        '''
+        self.connection = sqlite3.connect(
+            path,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,
+            cached_statements=256,
+        )
+
+        # WAL: the readers do not block the writer, and a commit does not wait for fsync
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute('PRAGMA foreign_keys=ON')
+        self.connection.execute('PRAGMA busy_timeout=30000')
+        self.connection.execute(f'PRAGMA cache_size=-{cache_size * 1024}')
+
+    # The options of mysql.connector (buffered, prepared...) are not needed
+    def cursor(self, **kwargs) -> SQLiteCursor:
+        return SQLiteCursor(self.connection.cursor())
+
+    def commit(self):
+        self.connection.commit()
+
+    def rollback(self):
+        self.connection.rollback()
+
+    def is_connected(self) -> bool:
+        return True
+
+    def reconnect(self, **kwargs):
+        pass
+
+    def close(self):
+        self.connection.close()
+
+
+# Storage backends, by name
+BACKENDS = {
+    'mysql': MySQLBackend,
+    'sqlite': SQLiteBackend,
+}
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The tests import the modules of the repository (modules/...), like the scripts
+# that are run from its root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
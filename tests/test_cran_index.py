@@ -0,0 +1,147 @@
+import gzip
+import os
+from modules.cran_index import PackagesIndex, parse_dcf
+from modules.cran_scraper import PackageScraper
+
+# Tests of the ingestion from the CRAN PACKAGES index (modules/cran_index.py)
+#
+# The index is read from a local fixture (tests/data/PACKAGES), with the
+# layout of src/contrib/PACKAGES: no Description or Published fields, values
+# continued on indented lines, a record without name and a last record that
+# does not end with a blank line.
+#
+# Usage (from the root of the repository):
+# python -m pytest tests
+#
+# Author: agent <agent@local>
+# Date: 2026-10-17
+# Project: TFG OLIVIA
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'data', 'PACKAGES')
+
+
+class PageScraper(PackageScraper):
+    '''
+    Scraper that returns the data of the HTML page without making requests,
+    and counts the pages requested
+    '''
+
+    def __init__(self):
+        super().__init__(None, base_url='http://127.0.0.1')
+        self.requested = []
+
+    def get_pkg_data(self, pkg_name):
+        self.requested.append(pkg_name)
+        return {
+            'name': pkg_name,
+            'description': 'Description of ' + pkg_name,
+            'version': '9.9.9',
+            'publication_date': '2024-01-02',
+            'author': 'First Author [aut, cre]',
+            'mantainer': 'First Author <first@example.org>',
+            'license': 'MIT',
+            'requires_compilation': 'no',
+            'depends': None,
+            'imports': None,
+        }
+
+
+def read_fixture():
+    with open(FIXTURE, encoding='utf-8') as file:
+        return list(parse_dcf(file))
+
+
+def test_parse_dcf_records():
+    records = read_fixture()
+
+    # The record without Package is still a record, and the last one has no blank line after it
+    assert [record.get('Package') for record in records] == ['A3', 'abc', 'abess', None, 'zoo']
+    assert records[-1]['NeedsCompilation'] == 'yes'
+
+
+def test_parse_dcf_continuation_lines():
+    abc = read_fixture()[1]
+
+    # The indented line continues the value of Depends, and the next field is read normally
+    assert abc['Depends'] == 'R (>= 2.10), abc.data, nnet, quantreg, MASS,\nlocfit'
+    assert abc['License'] == 'GPL (>= 3)'
+
+
+def test_parse_dcf_blank_lines_and_crlf():
+    lines = ['\r\n', 'Package: a\r\n', 'Depends: R\r\n', '  (>= 4.0)\r\n', '\r\n', '\r\n', 'Package: b\r\n']
+    assert list(parse_dcf(lines)) == [{'Package': 'a', 'Depends': 'R\n(>= 4.0)'}, {'Package': 'b'}]
+
+
+def test_packages_from_fixture():
+    packages = list(PackagesIndex(PageScraper(), FIXTURE, chunk_size=64).packages())
+
+    # The record without name is skipped
+    assert [package.name for package in packages] == ['A3', 'abc', 'abess', 'zoo']
+
+    abc = packages[1]
+    assert abc.version == '2.2.1'
+    assert abc.licenses == 'GPL (>= 3)'
+    assert abc.requires_compilation is False
+    assert [(d.name, d.version) for d in abc.dependencies] == [
+        ('R', '>= 2.10'), ('abc.data', ''), ('nnet', ''), ('quantreg', ''), ('MASS', ''), ('locfit', '')
+    ]
+
+    # Imports and version constraints of the dependencies
+    zoo = packages[3]
+    assert zoo.requires_compilation is True
+    assert ('lattice', '>= 0.20-27') in [(d.name, d.version) for d in zoo.dependencies]
+
+
+def test_packages_missing_fields():
+    a3, _, abess, zoo = PackagesIndex(PageScraper(), FIXTURE).packages()
+
+    # The fields that the index does not have are left as None
+    assert a3.description is None
+    assert a3.publication_date is None
+    assert a3.authors_data is None
+    assert a3.mantainer is None
+    assert abess.dependencies
+
+    # Published is cut to the date
+    assert zoo.publication_date == '2023-04-13'
+
+
+def test_packages_from_gzip(tmp_path):
+    path = tmp_path / 'PACKAGES.gz'
+    with open(FIXTURE, 'rb') as source, gzip.open(path, 'wb') as target:
+        target.write(source.read())
+
+    names = [package.name for package in PackagesIndex(PageScraper(), str(path), chunk_size=16).packages()]
+    assert names == ['A3', 'abc', 'abess', 'zoo']
+
+
+def test_complete_package():
+    scraper = PageScraper()
+    index = PackagesIndex(scraper, FIXTURE)
+    a3 = next(index.packages())
+
+    package = index.complete_package(a3)
+
+    # Only the missing fields are taken from the page
+    assert package is a3
+    assert scraper.requested == ['A3']
+    assert package.description == 'Description of A3'
+    assert package.publication_date == '2024-01-02'
+    assert package.authors_data == 'First Author [aut, cre]'
+    assert package.mantainer == 'First Author <first@example.org>'
+    assert package.version == '1.0.0'
+    assert package.licenses == 'GPL (>= 2)'
+
+
+def test_complete_package_without_missing_fields():
+    scraper = PageScraper()
+    index = PackagesIndex(scraper, FIXTURE)
+    a3 = next(index.packages())
+    a3.description = 'Description'
+    a3.publication_date = '2020-01-01'
+    a3.authors_data = 'Author'
+    a3.mantainer = 'Maintainer'
+
+    # The page is not requested
+    assert index.complete_package(a3) is a3
+    assert scraper.requested == []
@@ -0,0 +1,82 @@
+import pytest
+import requests
+from modules.cran_listing import package_names, parse_listing
+from modules.retry_policy import RetryPolicy
+
+# Tests of the streaming reader of the list of CRAN packages (modules/cran_listing.py)
+#
+# The pages are given by a stand-in of RequestHandler, whose responses can break
+# after some chunks like a connection closed while the body is read.
+#
+# Usage (from the root of the repository):
+# python -m pytest tests
+#
+# Author: agent <agent@local>
+# Date: 2026-10-17
+# Project: TFG OLIVIA
+
+NAMES = ['A3', 'abc', 'abess', 'zoo']
+
+PAGE = ('<html><body><table>'
+        + ''.join(f'<tr><td><a href="../../web/packages/{name}/index.html">{name}</a></td><td>Title</td></tr>' for name in NAMES)
+        + '</table><table><tr><td><a href="x">not a package</a></td></tr></table></body></html>').encode()
+
+
+class BrokenResponse:
+    '''
+    Response whose body is read in chunks, breaking after break_after chunks (None = never)
+    '''
+
+    def __init__(self, break_after=None, chunk_size=40):
+        self.break_after = break_after
+        self.chunk_size = chunk_size
+        self.closed = False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for i, start in enumerate(range(0, len(PAGE), self.chunk_size)):
+            if self.break_after is not None and i == self.break_after:
+                raise requests.exceptions.ChunkedEncodingError('Connection broken')
+            yield PAGE[start:start + self.chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+class StandInHandler:
+    '''
+    RequestHandler that returns the given responses, one per request
+    '''
+
+    def __init__(self, responses, max_attempts=3):
+        self.responses = list(responses)
+        self.requests = 0
+        self.retry_policy = RetryPolicy(max_attempts=max_attempts, base_delay=0, max_delay=0)
+
+    def do_request(self, url, retry=False, stream=False):
+        self.requests += 1
+        return self.responses.pop(0)
+
+
+def test_parse_listing_reads_first_table():
+    assert list(parse_listing([PAGE])) == NAMES
+
+
+def test_package_names_resumes_after_broken_read():
+    responses = [BrokenResponse(break_after=3), BrokenResponse(break_after=5), BrokenResponse()]
+    handler = StandInHandler(responses)
+
+    # Each name is returned once, in order, although the page was read three times
+    assert list(package_names(handler, 'http://cran.invalid/')) == NAMES
+    assert handler.requests == 3
+    assert all(response.closed for response in responses)
+
+
+def test_package_names_raises_after_last_attempt():
+    handler = StandInHandler([BrokenResponse(break_after=2) for _ in range(2)], max_attempts=2)
+
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        list(package_names(handler, 'http://cran.invalid/'))
+    assert handler.requests == 2
@@ -0,0 +1,32 @@
+from modules.dependency_graph import DependencyGraph
+
+# Tests of the dependency graph (modules/dependency_graph.py)
+#
+# Usage (from the root of the repository):
+# python -m pytest tests
+#
+# Author: agent <agent@local>
+# Date: 2026-10-17
+# Project: TFG OLIVIA
+
+
+def graph():
+    # a imports b, b depends on c
+    return DependencyGraph.from_edges(['a', 'b', 'c'], [0, 1], [1, 2], [0, 1], ['IMP', 'DEP'])
+
+
+def test_memo_tells_all_types_from_no_type():
+    g = graph()
+    assert g.transitive_dependencies('a') == ('b', 'c')
+    assert g.transitive_dependencies('a', types=[]) == ()
+    assert g.transitive_dependencies('a', types=None) == ('b', 'c')
+    assert g.dependencies('a', types=[]) == ()
+    assert g.shortest_path('a', 'c', types=[]) is None
+    assert g.shortest_path('a', 'c') == ('a', 'b', 'c')
+
+
+def test_memo_ignores_order_of_types():
+    g = graph()
+    assert g.transitive_dependencies('a', types=['IMP', 'DEP']) == ('b', 'c')
+    assert g.transitive_dependencies('a', types=['DEP', 'IMP']) == ('b', 'c')
+    assert g.transitive_dependencies('a', types=['IMP']) == ('b',)
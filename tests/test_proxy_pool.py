@@ -0,0 +1,204 @@
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from modules.proxy_pool import ProxyPool
+from modules.proxy_request import RequestHandler
+from modules.retry_policy import RetryPolicy
+
+# Tests of the proxy pool (modules/proxy_pool.py) and of its use by RequestHandler
+#
+# The proxies are local stand-ins: small HTTP proxies on 127.0.0.1 that forward
+# the requests to a local origin server, or that reject every request. No
+# request leaves the machine.
+#
+# Usage (from the root of the repository):
+# python -m pytest tests
+#
+# Author: agent <agent@local>
+# Date: 2026-10-17
+# Project: TFG OLIVIA
+
+
+class LocalServer:
+    '''
+    HTTP server on 127.0.0.1 in a background thread, with the requests it received
+    '''
+
+    def __init__(self, handler):
+        self.requests = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.server.daemon_threads = True
+        self.server.requests = self.requests
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class OriginHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        body = b'page ' + self.path.encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# Proxy that forwards the requests (GET with an absolute URL) to the origin
+class ForwardingProxyHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        self.server.requests.append(self.command + ' ' + self.path)
+        opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+        with opener.open(self.path, timeout=5) as response:
+            body = response.read()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Via', 'stand-in')
+        self.end_headers()
+        self.wfile.write(body)
+
+    # HTTPS tunnels are not opened
+    def do_CONNECT(self):
+        self.server.requests.append(self.command + ' ' + self.path)
+        self.send_error(502)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# Proxy that rejects every request
+class BrokenProxyHandler(ForwardingProxyHandler):
+
+    def do_GET(self):
+        self.server.requests.append(self.command + ' ' + self.path)
+        self.send_error(502)
+
+
+@pytest.fixture
+def servers():
+    started = {
+        'origin': LocalServer(OriginHandler),
+        'good': LocalServer(ForwardingProxyHandler),
+        'broken': LocalServer(BrokenProxyHandler),
+    }
+    yield started
+    for server in started.values():
+        server.stop()
+
+
+def handler(proxies, **kwargs):
+    return RequestHandler(proxies=proxies, user_agents=['r_scraper-test'], pool_size=2,
+                          retry_policy=RetryPolicy(max_attempts=1), rate_options={'rate': 1000}, **kwargs)
+
+
+def test_select_weighted_by_score():
+    pool = ProxyPool(['http://fast', 'http://slow'])
+    pool.stats['http://fast'].latency = 0.01
+    pool.stats['http://slow'].latency = 1.0
+
+    selected = [pool.select() for _ in range(500)]
+    assert selected.count('http://fast') > 400
+    assert pool.stats['http://fast'].uses + pool.stats['http://slow'].uses == 500
+
+
+def test_select_retires_after_max_uses():
+    pool = ProxyPool(['http://a'])
+    assert [pool.select(max_uses=3) for _ in range(3)] == ['http://a'] * 3
+    assert len(pool) == 0
+    assert pool.select(max_uses=3) is None
+
+
+def test_select_max_uses_from_threads():
+    pool = ProxyPool([f'http://p{i}' for i in range(20)])
+    selected = []
+
+    def worker():
+        for _ in range(50):
+            url = pool.select(max_uses=5)
+            if url is not None:
+                selected.append(url)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Each proxy is used exactly max_uses times, even when the threads select it at the same time
+    assert len(pool) == 0
+    assert sorted(set(selected)) == sorted(f'http://p{i}' for i in range(20))
+    assert all(selected.count(url) == 5 for url in set(selected))
+
+
+def test_report_quarantines_failing_proxy():
+    pool = ProxyPool(['http://a', 'http://b'], max_consecutive_failures=2, max_failure_rate=1.0)
+    pool.report('http://a', 0.1, ok=False)
+    assert not pool.stats['http://a'].is_quarantined()
+    pool.report('http://a', 0.1, ok=False)
+    assert pool.stats['http://a'].is_quarantined()
+
+    # Only the healthy proxy is selected
+    assert {pool.select() for _ in range(20)} == {'http://b'}
+
+
+def test_probe_with_stand_in_proxies(servers):
+    pool = ProxyPool([servers['good'].url, servers['broken'].url], probe_url=servers['origin'].url + '/probe', probe_timeout=5)
+    for stats in pool.stats.values():
+        stats.quarantined_until = 1.0
+
+    pool.probe_quarantined()
+
+    # The proxy that works leaves the quarantine, the broken one stays in it
+    assert not pool.stats[servers['good'].url].is_quarantined()
+    assert pool.stats[servers['broken'].url].is_quarantined()
+    assert servers['origin'].requests == ['/probe']
+
+
+def test_requests_prefer_working_proxy(servers):
+    good, broken = servers['good'].url, servers['broken'].url
+    rh = handler([good, broken])
+    rh.proxy_pool.stop_probing()
+
+    # The good proxy starts with a poor latency, so the broken one is selected until it is quarantined
+    rh.proxy_pool.stats[good].latency = 1e6
+    try:
+        for i in range(30):
+            response = rh.do_request(f"{servers['origin'].url}/package=p{i}")
+            assert response.status_code in (200, 502)
+
+        # The broken proxy is quarantined after its failures, and the rest of the requests use the good one
+        assert rh.proxy_pool.stats[broken].is_quarantined()
+        assert rh.proxy_pool.stats[good].failure_rate == 0.0
+        assert rh.proxy_pool.stats[good].uses >= 30 - rh.proxy_pool.max_consecutive_failures
+        assert len(servers['origin'].requests) == rh.proxy_pool.stats[good].uses
+        assert all(request.startswith('GET http://') for request in servers['good'].requests)
+    finally:
+        rh.close()
+
+
+def test_free_proxies_are_used_for_https(servers):
+    rh = handler(None, max_request=2)
+    rh.proxy_pool.add([servers['good'].url])
+    try:
+        # The stand-in does not open tunnels, so the request fails, but it went through the proxy
+        with pytest.raises(Exception):
+            rh.do_request('https://cran.invalid/package=p1')
+        assert servers['good'].requests == ['CONNECT cran.invalid:443']
+        assert rh.proxy_pool.stats[servers['good'].url].failure_rate > 0
+
+        # A free proxy is retired after max_request uses
+        with pytest.raises(Exception):
+            rh.do_request('https://cran.invalid/package=p2')
+        assert servers['good'].url not in rh.proxy_pool.stats
+    finally:
+        rh.close()
@@ -1,174 +1,439 @@
-from bs4 import BeautifulSoup
-from modules.db import DatabaseHandler
+import argparse
+import sys
+from modules.db import DatabaseHandler, SCHEMA_VERSION
 from modules.package import Package
+from modules.dependency import Dependency
 from modules.proxy_request import RequestHandler
-from modules.cran_scraper import PackageScraper
-from colorama import Fore
-from modules.util import print_colored
+from modules.cran_scraper import PackageScraper, CRAN_URL
+from modules.cran_listing import package_names
+from modules.async_crawler import AsyncCrawler
+from modules.pipeline import FetchParsePipeline
+from modules.cran_index import PackagesIndex, CRAN_PACKAGES_URL
+from modules.bulk_writer import BulkWriter
+from modules.page_parser import PARSERS
+from modules.http_cache import ResponseCache
+from modules.retry_policy import RetryPolicy
+from modules.journal import CrawlJournal
+from modules.compression import text_codecs
+from modules.metrics import metrics, MetricsServer, SnapshotWriter
+from modules.log import logger, setup_logging, ProgressDisplay
 
 
 # Functions
 # -----------------------------------------------
 
-# Function to scrape the table
-def scrape_table(table, packages):
-    
-    # We iterate over each row of the table
-    for row in table.find_all("tr"):
-
-        # We extract the cells of the current row
-        cells = row.find_all("td")
-
-        package_name = ""
-        # If there are cells in the row
-        if cells:
-            try: 
-                # We extract the name of the package
-                # The name is in the first cell of the row
-                package_name = cells[0].find("a").text   
-
-                # We create a Package object
-                # We add the Package structure, to later process them all
-                curr_package = Package(package_name)
-                packages.append(curr_package)
-
-            # If an error occurs, we show the error message
-            except Exception as e:
-                
-                # message string
-                message = "Error processing package: " + package_name
-                message += "Exception: " + e.__class__.__name__ 
-                message += "Error: " + str(e)
-
-                # Print error message
-                print_colored(message, Fore.RED)
-                print("Continuing...")
+# Function to record a package that could not be fetched or saved
+# The package is written in the journal and retried at the end (once, even if it failed several times)
+# The progress line counts each failed package once, also when it fails again in a retry round
+def record_failure(package, reason):
+    metrics.counter('packages_total', result='failed').inc()
+    if package.name not in retry_queue:
+        progress.update(failed=1)
+    if journal is not None:
+        journal.mark(package.name, CrawlJournal.FAILED, reason=reason)
+    retry_queue[package.name] = package
+
+# Function to show the result of saving some packages
+# Returns False if the packages could not be saved
+def report_saved(saved, result):
+    global num_packages_in_db
+
+    # If the packages weren't saved in the database
+    if result is not True:
+        reason = str(result[1]) if isinstance(result, tuple) else "Unknown error"
+        for p in saved:
+            logger.error("Error saving package", extra={'package': p.name, 'error': reason})
+            record_failure(p, reason)
+        return False
+
+    for p in saved:
+        # Increment the number of packages in the database
+        # Updated packages were already counted
+        new = p.name not in saved_packages
+        if new:
+            num_packages_in_db += 1
+        metrics.counter('packages_total', result='saved').inc()
+        progress.update(saved=1, new=int(new))
+        saved_packages[p.name] = p.version
+
+        # A package saved in a retry is no longer failed
+        if retry_queue.pop(p.name, None) is not None:
+            progress.update(failed=-1)
+        if journal is not None:
+            journal.mark(p.name, CrawlJournal.SAVED, version=p.version)
+
+        logger.debug("Package saved", extra={'package': p.name, 'version': p.version})
+    return True
+
+# Function to write the packages waiting in the batch writer
+# If the batch fails, the writer saves the packages without errors and returns the others
+def flush_writer():
+    batch = list(writer.packages)
+    with metrics.timer('stage_seconds', stage='db_save_batch'):
+        result = writer.flush()
+    if result is True:
+        return report_saved(batch, result)
+
+    failed = {id(p) for p, _ in writer.failed}
+    report_saved([p for p in batch if id(p) not in failed], True)
+    for p, error in writer.failed:
+        report_saved([p], (False, error))
+    return False
+
+# Function to save a scraped package in the database
+# Returns False if the package could not be saved
+def save_package(p, cnx):
+
+    # In batch mode, the package is written when the batch is full
+    if writer is not None:
+        writer.add(p)
+        if not writer.is_full():
+            return True
+        return flush_writer()
+
+    with metrics.timer('stage_seconds', stage='db_save'):
+        result = p.save(cnx)
+    return report_saved([p], result)
+
+# Function to show the result of fetching a package, and save it
+# result is the built package, or the exception raised while fetching it
+def process_result(package, result):
+
+    # If the package could not be fetched, it is retried at the end
+    if isinstance(result, Exception):
+        logger.error("Error processing package", extra={'package': package.name, 'exception': result.__class__.__name__, 'error': str(result)})
+        record_failure(package, result.__class__.__name__ + ": " + str(result))
+        return
+
+    if journal is not None:
+        journal.mark(result.name, CrawlJournal.FETCHED, version=result.version)
+
+    # Show the result of the package saved by the worker
+    if parallel_save:
+        report_saved([result], result.save_result)
+    else:
+        save_package(result, cnx)
+
+# Function to fetch and save a package in this thread
+def process_package(package):
+    try:
+        result = build_package(package)
+    except Exception as e:
+        result = e
+    process_result(package, result)
 
 # Script
 # -----------------------------------------------
 
+# Command line arguments
+parser = argparse.ArgumentParser(description="Scrape the CRAN packages and save them in the database")
+parser.add_argument("--concurrency", type=int, default=1,
+                    help="Number of packages fetched at the same time. With 1 (default) the packages are processed one by one")
+parser.add_argument("--index", nargs="?", const=CRAN_PACKAGES_URL, default=None, metavar="SOURCE",
+                    help="Read the package metadata from a CRAN PACKAGES index (URL or local file, by default " + CRAN_PACKAGES_URL + ")"
+                         " instead of the HTML page of each package")
+parser.add_argument("--parser", choices=PARSERS, default="html.parser",
+                    help="Backend used to read the package pages (default html.parser). lxml requires the lxml package")
+parser.add_argument("--update", action="store_true",
+                    help="Also process the packages whose version in CRAN is different from the saved one, and update them."
+                         " The versions are read from the CRAN index (see --index)")
+parser.add_argument("--cache", metavar="DIRECTORY", default=None,
+                    help="Store the downloaded pages in this directory and revalidate them with conditional requests")
+parser.add_argument("--cache-ttl", type=float, default=24 * 3600,
+                    help="Seconds that a cached page is used without revalidating it (default 86400)")
+parser.add_argument("--cache-size", type=int, default=512,
+                    help="Maximum size of the cache in MB (default 512)")
+parser.add_argument("--cran-url", default=CRAN_URL,
+                    help="Address of CRAN or of a mirror (default " + CRAN_URL + ")")
+parser.add_argument("--direct", action="store_true",
+                    help="Make the requests without proxies (for example, to a mirror in the local network)")
+parser.add_argument("--user-agent", action="append", metavar="USER_AGENT", default=None,
+                    help="User agent of the requests (can be repeated). By default, they are obtained from useragentstring.com")
+parser.add_argument("--proxy", action="append", metavar="URL", default=None,
+                    help="Upstream proxy for all the requests (can be repeated). By default, free proxies are used")
+parser.add_argument("--max-attempts", type=int, default=5,
+                    help="Maximum number of attempts of each request (default 5)")
+parser.add_argument("--rate", type=float, default=10,
+                    help="Initial number of requests per second to each host. It adapts to the answers of the server (default 10)")
+parser.add_argument("--parse-workers", type=int, default=0,
+                    help="Parse the package pages in this number of processes, separated from the --concurrency download threads."
+                         " Only for the HTML pages (not with --index). With 0 (default) each thread parses its own pages")
+parser.add_argument("--batch-size", type=int, default=1,
+                    help="Number of packages written to the database in each transaction. With 1 (default) each package is saved on its own")
+parser.add_argument("--journal", metavar="FILE", default=".cache/journal.sqlite3",
+                    help="Checkpoint journal with the state of each package (default .cache/journal.sqlite3)."
+                         " A new run resumes from it without downloading the list of packages again")
+parser.add_argument("--no-journal", action="store_true",
+                    help="Do not use the checkpoint journal")
+parser.add_argument("--retry-rounds", type=int, default=2,
+                    help="Number of times the failed packages are retried at the end of the run (default 2)")
+parser.add_argument("--max-failures", type=int, default=6,
+                    help="Failed attempts (in all the runs) after which a package is given up: it does not keep the journal"
+                         " unfinished, so the next run downloads the list of packages again (default 6)")
+parser.add_argument("--log-level", choices=["DEBUG", "INFO", "WARNING", "ERROR"], default="INFO",
+                    help="Minimum level of the messages shown in the console (default INFO). DEBUG shows every package")
+parser.add_argument("--log-file", metavar="FILE", default=None,
+                    help="Write all the messages to this file as JSON lines")
+parser.add_argument("--no-progress", action="store_true",
+                    help="Do not show the progress line (it is only shown if the output is a terminal)")
+parser.add_argument("--metrics-port", type=int, default=None, metavar="PORT",
+                    help="Serve the metrics of the crawl on http://127.0.0.1:PORT/metrics (Prometheus format) and /stats (JSON)")
+parser.add_argument("--metrics-file", metavar="FILE", default=None,
+                    help="Write the metrics of the crawl to this JSON file every --metrics-interval seconds")
+parser.add_argument("--metrics-interval", type=float, default=10,
+                    help="Seconds between two writes of --metrics-file (default 10)")
+args = parser.parse_args()
+
+# Messages of the crawl, written by a background thread
+log_listener = setup_logging(args.log_level, args.log_file)
+
+# Metrics of the crawl
+metrics_server = None
+if args.metrics_port is not None:
+    metrics_server = MetricsServer(metrics, args.metrics_port)
+    metrics_server.start()
+    logger.info("Metrics available", extra={'url': "http://127.0.0.1:" + str(args.metrics_port) + "/metrics"})
+
+snapshot_writer = None
+if args.metrics_file:
+    snapshot_writer = SnapshotWriter(metrics, args.metrics_file, args.metrics_interval)
+    snapshot_writer.start()
+
+# The update mode needs the versions of the CRAN index
+if args.update and not args.index:
+    args.index = CRAN_PACKAGES_URL
+
 # List of packages in CRAN
 packages = []
 all_packages_names =  False
 
+# Checkpoint journal with the state of each package
+journal = None if args.no_journal else CrawlJournal(args.journal, args.max_failures)
+
+# Packages that could not be fetched or saved, by name, retried at the end
+retry_queue = {}
+
 # Create object of class DatabaseHandler
 # We instantiate the connection to the database
 db = DatabaseHandler()
 cnx = db.get_connection()
 
-# We load the CRAN packages in the packages list
-# The packages are obtained by scraping the CRAN page
-rh = RequestHandler()
-response = rh.do_request("https://cran.r-project.org/web/packages/available_packages_by_name.html", retry=True)
-
-# If the request was successful
-if response.status_code == 200:
+# The compressed columns and the dictionaries need the last migrations
+schema_version = db.schema_version()
+if schema_version < SCHEMA_VERSION:
+    logger.error("The database schema is out of date, run config/db/db_config.sh to apply the migrations",
+                 extra={'schema_version': schema_version, 'required': SCHEMA_VERSION})
+    log_listener.stop()
+    exit(1)
 
-    # We parse the HTML content of the web page using BeautifulSoup
-    # We extract the table that contains the information of the CRAN packages
-    soup = BeautifulSoup(response.content, "html.parser")
-    table = soup.find("table")
+# Batch writer, only used if more than one package is written in each transaction
+writer = BulkWriter(cnx, args.batch_size) if args.batch_size > 1 else None
 
-    # We scrape the table
-    scrape_table(table, packages)
+# Create object of class Scraper
+cache = ResponseCache(args.cache, args.cache_ttl, args.cache_size * 1024 * 1024) if args.cache else None
+rh = RequestHandler(cache=cache, pool_size=max(args.concurrency, 10), proxies=args.proxy,
+                    retry_policy=RetryPolicy(max_attempts=args.max_attempts), rate_options={'rate': args.rate},
+                    direct=args.direct, user_agents=args.user_agent)
+scraper = PackageScraper(rh, args.parser, args.cran_url)
+
+# Index mode: the packages are built from the CRAN index
+# Only the fields that are not in the index are taken from the HTML page of each package
+if args.index:
+    index = PackagesIndex(scraper, args.index)
+    packages = list(index.packages())
+    build_package = index.complete_package
 
     # If the list of packages is not empty
     if packages:
         all_packages_names = True
 
+# If the previous run did not finish, it is resumed with the list of packages
+# of the journal, without downloading the list again
+elif journal is not None and journal.unfinished():
+    build_package = lambda package: scraper.pkg_builder(package.name)
+    packages = [Package(name) for name, _ in journal.packages()]
+    all_packages_names = True
+
+    logger.info("Resuming from the journal", extra={'journal': args.journal, **journal.counts()})
+
+# We load the CRAN packages in the packages list
+# The packages are obtained by scraping the CRAN page
 else:
+    build_package = lambda package: scraper.pkg_builder(package.name)
+
+    # The names are read while the list is downloaded, without building the tree of the page
+    try:
+        packages = [Package(name) for name in package_names(rh, scraper.base_url)]
 
-    # Build the error message string
-    message = "Error making the request"
-    message += "Review the RequestHandler"
-    message += "The package list could not be obtained"
-    message += "Ending program execution"
+        # If the list of packages is not empty
+        if packages:
+            all_packages_names = True
 
-    # Print error message
-    print_colored(message, Fore.RED)
-    
+    except Exception as e:
+        logger.error("The package list could not be obtained, review the RequestHandler", extra={'exception': e.__class__.__name__, 'error': str(e)})
 
 # Show if the packages were obtained
-print("Initial data obtained:")
-if all_packages_names:
-    print_colored("OK", Fore.GREEN)
-else:
-    print_colored("ERROR", Fore.RED)
-    print("Finalizando ejecución del programa")
+if not all_packages_names:
+    logger.error("Initial data could not be obtained, ending program execution")
+    log_listener.stop()
     exit()
 
+logger.info("Initial data obtained", extra={'packages': len(packages)})
+
 
 
 # Process packages
 # ----------------
 
-# Get the number of packages that are already in the database
-query_result = db.execute_query("SELECT COUNT(*) FROM packages")
-num_packages_in_db = query_result[0][0]
+# Add the new packages to the journal
+if journal is not None:
+    journal.add_pending(packages)
 
-print("Starting to process packages...")
-print("Number of packages: ", len(packages))
-print("Number of packages saved in db: ", str(num_packages_in_db) + "/" + str(len(packages)), "(", round(num_packages_in_db / len(packages) * 100, 2), "%)")
+# Get the names and versions of the packages that are already in the database
+# They are loaded with one query, so that the packages can be skipped without asking the database again
+saved_packages = Package.get_saved_packages(cnx)
+num_packages_in_db = len(saved_packages)
 
+# Load the ids of the dependencies already in the database
+# so that the dependencies seen before are not looked up again
+Dependency.cache.load(cnx)
 
-# Create object of class Scraper
-scraper = PackageScraper(rh)
+# Load the dictionaries used to compress the texts
+text_codecs.load_dictionaries(cnx)
+
+logger.info("Starting to process packages", extra={
+    'packages': len(packages),
+    'saved_in_db': num_packages_in_db,
+    'percent': round(num_packages_in_db / len(packages) * 100, 2),
+})
+
+# Packages that are not in the database yet
+pending_packages = []
+
+# In serial mode, the packages are saved in this thread
+parallel_save = False
+
+# Packages of the database that are not saved in the journal
+already_saved = []
+
+# Progress line of the crawl, only shown in a terminal
+progress = ProgressDisplay(total=len(packages), done=num_packages_in_db)
+if not args.no_progress and sys.stdout.isatty():
+    progress.start()
 
 # Iterate over the packages
 for package in packages:
 
-    # Print the name of the package
-    print_colored("\nProcessing package: " + package.name, Fore.BLUE)
-
-    # Get the package from the database
-    p = Package(package.name).get_package(cnx)
+    logger.debug("Processing package", extra={'package': package.name})
 
     # If the package is already in the database, dont do anything
-    if p:
-        # buid message string
-        message = "Package already in database: " + package.name
-        message += "\nNumber of packages saved in db: " + str(num_packages_in_db) + "/" + str(len(packages)) + " (" + str(round(num_packages_in_db / len(packages) * 100, 2)) + "%)"
-
-        # Print message
-        print_colored(message, Fore.YELLOW)
+    # In update mode, only if the saved version is the same as the version in CRAN
+    if package.name in saved_packages and (not args.update or saved_packages[package.name] == package.version):
+        logger.debug("Package already in database", extra={'package': package.name})
+        progress.update(skipped=1)
+
+        # The journal of a previous run may not know that the package was saved
+        if journal is not None and journal.state(package.name) != CrawlJournal.SAVED:
+            already_saved.append((package.name, saved_packages[package.name]))
         continue
 
+    # In serial mode, process the package now
+    if args.concurrency <= 1:
+        process_package(package)
 
-    # Process the package
-    p = scraper.pkg_builder(package.name)
-    result = p.save(cnx)
-
-    # If the package wasn't saved in the database
-    if not result:
-        # Build the error message string
-        message = "Error saving package: " + p.name
-        message += "\nNumber of packages saved in db: " + str(num_packages_in_db) + "/" + str(len(packages)) + " (" + str(round(num_packages_in_db / len(packages) * 100, 2)) + "%)"
-        
-        # Print error message
-        print_colored(message, Fore.RED)
-        print("Ending program execution")
-        cnx.close()
-        exit()
+    # In concurrent mode, process it later together with the others
+    else:
+        pending_packages.append(package)
+
+# Update the journal with the packages found in the database
+if already_saved:
+    journal.mark_many(already_saved, CrawlJournal.SAVED)
+
+# Function to build a package and save it with a connection of the pool
+# Used by the workers when the database has a pool of connections
+def build_and_save_package(package):
+    p = build_package(package)
+    with db.connection() as worker_cnx:
+        with metrics.timer('stage_seconds', stage='db_save'):
+            p.save_result = p.save(worker_cnx)
+    return p
+
+# Concurrent mode: fetch the pending packages at the same time
+# The results are returned in order. If the database has a pool of connections
+# (and packages are not written in batches), each worker also saves its package;
+# otherwise, they are saved in this thread
+if pending_packages:
+    logger.info("Fetching packages", extra={'packages': len(pending_packages), 'concurrency': args.concurrency})
+
+    # Pipeline mode: the pages are downloaded by threads and parsed by processes
+    if args.parse_workers > 0 and not args.index:
+        pipeline = FetchParsePipeline(scraper, args.concurrency, args.parse_workers)
+        results = zip(pending_packages, (p for _, p in pipeline.run(package.name for package in pending_packages)))
 
-    # If the package was saved in the database
     else:
+        parallel_save = db.pool is not None and writer is None
+        crawler = AsyncCrawler(scraper, args.concurrency, build_and_save_package if parallel_save else build_package)
+        results = crawler.run(pending_packages)
 
-        # Increment the number of packages in the database
-        num_packages_in_db += 1
+    for package, p in results:
+        process_result(package, p)
+
+
+# Write the last batch
+if writer is not None:
+    flush_writer()
 
-        # buid message string
-        message = "Package saved: " + p.name
-        message += "\nNumber of packages saved in db: " + str(num_packages_in_db) + "/" + str(len(packages)) + " (" + str(round(num_packages_in_db / len(packages) * 100, 2)) + "%)"
+# Retry the packages that failed, one by one
+# The packages are saved in this thread
+# A package stays in retry_queue until it is saved
+parallel_save = False
+for retry_round in range(args.retry_rounds):
+    if not retry_queue:
+        break
 
-        # Print message
-        print_colored(message, Fore.GREEN)
+    logger.info("Retrying failed packages", extra={'packages': len(retry_queue), 'round': retry_round + 1, 'rounds': args.retry_rounds})
+    failed_packages = list(retry_queue.values())
 
+    for package in failed_packages:
+        logger.debug("Retrying package", extra={'package': package.name})
+        process_package(package)
+
+    if writer is not None:
+        flush_writer()
 
 # Close the connection to the database
 cnx.close()
+rh.close()
+if cache is not None:
+    cache.close()
+
+# Leave the last progress line
+progress.stop()
+
+# Show the packages that could not be processed
+if retry_queue:
+    logger.error("Packages could not be processed", extra={'count': len(retry_queue), 'packages': ', '.join(retry_queue)})
+    if journal is not None:
+        given_up = [name for name in journal.given_up() if name in retry_queue]
+        logger.info("The failed packages are retried in the next run", extra={'journal': args.journal})
+        if given_up:
+            logger.warning("Packages given up: they no longer keep the journal unfinished",
+                           extra={'count': len(given_up), 'failures': args.max_failures, 'packages': ', '.join(given_up)})
+else:
+    # Show final message
+    logger.info("All packages processed")
+
+if journal is not None:
+    journal.close()
+
+# Write the messages still in the queue
+log_listener.stop()
 
-# Show final message
-print_colored("All packages processed", Fore.GREEN)
+# Write the last values of the metrics
+if snapshot_writer is not None:
+    snapshot_writer.stop()
+if metrics_server is not None:
+    metrics_server.stop()
 
 # End of the program
 exit()